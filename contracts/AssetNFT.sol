@@ -4,23 +4,36 @@ pragma solidity ^0.8.20;
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/token/ERC721/ERC721.sol";
 
+interface IAssetCidSource {
+    function cidOfToken(uint256 tokenId) external view returns (string memory);
+}
+
 contract AssetNFT is ERC721, Ownable {
     uint256 public nextTokenId;
-    mapping(uint256 => string) private _tokenURIs;
+    // AssetRegistry: the only minter, and the source of each token's CID
+    address public registry;
 
     constructor() ERC721("AssetNFT", "ANFT") Ownable(msg.sender) {}
 
-    function mint(address to, string memory tokenURI_) external returns (uint256) {
+    // Called once after deploying AssetRegistry (see scripts/deploy.js).
+    function setRegistry(address registry_) external onlyOwner {
+        require(registry == address(0), "Registry already set");
+        require(registry_ != address(0), "Zero address");
+        registry = registry_;
+    }
+
+    function mint(address to) external returns (uint256) {
+        require(msg.sender == registry, "Not registry");
         uint256 tid = ++nextTokenId;
         // Use _mint instead of _safeMint so contracts (like AssetRegistry) that do not implement
         // IERC721Receiver can still receive the minted token. Registry manages custody.
         _mint(to, tid);
-        _tokenURIs[tid] = tokenURI_;
         return tid;
     }
 
+    // URI is derived from the CID kept by the registry instead of storing an "ipfs://" copy per token.
     function tokenURI(uint256 tokenId) public view override returns (string memory) {
         require(_ownerOf(tokenId) != address(0), "Nonexistent");
-        return _tokenURIs[tokenId];
+        return string.concat("ipfs://", IAssetCidSource(registry).cidOfToken(tokenId));
     }
 }
@@ -2,13 +2,15 @@
 pragma solidity ^0.8.20;
 
 import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
 
 interface IAssetNFT {
-    function mint(address to, string memory tokenURI_) external returns (uint256);
+    function mint(address to) external returns (uint256);
     function transferFrom(address from, address to, uint256 tokenId) external;
 }
 
 contract AssetRegistry is Ownable {
+    // Return type of the view functions (ABI unchanged for off-chain consumers).
     struct Asset {
         bytes32 assetHash;
         string ipfsCid;
@@ -17,16 +19,32 @@ contract AssetRegistry is Ownable {
         uint256 tokenId;
     }
 
+    // Storage layout: owner (20 bytes) + verified (1 byte) + tokenId (11 bytes) share one slot,
+    // the CID string follows. The asset hash is the mapping key, so it is not stored again.
+    struct Record {
+        address owner;
+        bool verified;
+        uint88 tokenId;
+        string ipfsCid;
+    }
+
+    // Bumped when the event layout changes; off-chain indexers refuse older registries.
+    // 2: AssetOwnerAssigned carries the logical owner of a new asset.
+    uint256 public constant REGISTRY_VERSION = 2;
+
     IAssetNFT public nft;
-    mapping(bytes32 => Asset) private assets;
+    mapping(bytes32 => Record) private _records;
     mapping(uint256 => bytes32) public token2Asset;
 
+    // `owner` is the caller of registerAsset(s) (usually the backend signer), as in earlier versions.
     event AssetRegistered(bytes32 indexed assetHash, address indexed owner, uint256 tokenId, string cid);
+    // Logical owner recorded for the asset, emitted right after AssetRegistered.
+    event AssetOwnerAssigned(bytes32 indexed assetHash, address indexed owner);
     event AssetVerified(bytes32 indexed assetHash, address indexed verifier, bool status);
     event AssetTransferred(bytes32 indexed assetHash, address indexed from, address indexed to, uint256 tokenId);
 
     modifier onlyAssetOwner(bytes32 assetHash) {
-        require(assets[assetHash].owner == msg.sender, "Not asset owner");
+        require(_records[assetHash].owner == msg.sender, "Not asset owner");
         _;
     }
 
@@ -39,53 +57,118 @@ contract AssetRegistry is Ownable {
     function registerAsset(bytes32 assetHash, string calldata ipfsCid, address owner_) external returns (uint256) {
         require(assetHash != bytes32(0), "Invalid hash");
         require(bytes(ipfsCid).length > 0, "Empty CID");
-        require(assets[assetHash].owner == address(0), "Asset exists");
+        require(_records[assetHash].owner == address(0), "Asset exists");
 
-        // Mint NFT to this registry contract so the registry can manage transfers
-        uint256 tid = nft.mint(address(this), string(abi.encodePacked("ipfs://", ipfsCid)));
+        return _register(assetHash, ipfsCid, owner_);
+    }
 
-        // record logical owner as provided by caller
-        address logicalOwner = owner_;
+    // Batch version of registerAsset: one transaction for many assets. Invalid or already
+    // registered items are skipped (tokenIds[i] == 0, no event) instead of reverting the batch,
+    // so callers can read per-item results from the AssetRegistered events.
+    function registerAssets(bytes32[] calldata assetHashes, string[] calldata ipfsCids, address[] calldata owners)
+        external
+        returns (uint256[] memory tokenIds)
+    {
+        require(assetHashes.length == ipfsCids.length && assetHashes.length == owners.length, "Length mismatch");
+
+        tokenIds = new uint256[](assetHashes.length);
+        for (uint256 i = 0; i < assetHashes.length; ++i) {
+            bytes32 h = assetHashes[i];
+            if (h == bytes32(0) || bytes(ipfsCids[i]).length == 0 || owners[i] == address(0)) continue;
+            if (_records[h].owner != address(0)) continue;
+            tokenIds[i] = _register(h, ipfsCids[i], owners[i]);
+        }
+    }
 
-        assets[assetHash] = Asset({
-            assetHash: assetHash,
-            ipfsCid: ipfsCid,
-            owner: logicalOwner,
-            verified: false,
-            tokenId: tid
-        });
+    function _register(bytes32 assetHash, string calldata ipfsCid, address owner_) internal returns (uint256) {
+        // Mint NFT to this registry contract so the registry can manage transfers.
+        // The token URI is derived from the CID stored here (AssetNFT.tokenURI), not copied.
+        uint256 tid = nft.mint(address(this));
+
+        // record logical owner as provided by caller
+        Record storage r = _records[assetHash];
+        r.owner = owner_;
+        r.tokenId = SafeCast.toUint88(tid);
+        r.ipfsCid = ipfsCid;
         token2Asset[tid] = assetHash;
 
         emit AssetRegistered(assetHash, msg.sender, tid, ipfsCid);
+        // separate event so off-chain indexers can rebuild ownership from events alone
+        emit AssetOwnerAssigned(assetHash, owner_);
         return tid;
     }
 
     function verifyAsset(bytes32 assetHash, bool status) external onlyOwner {
-        Asset storage a = assets[assetHash];
-        require(a.owner != address(0), "Not found");
-        a.verified = status;
+        Record storage r = _records[assetHash];
+        require(r.owner != address(0), "Not found");
+        r.verified = status;
         emit AssetVerified(assetHash, msg.sender, status);
     }
 
-    function getAsset(bytes32 assetHash) external view returns (Asset memory) {
-        Asset memory a = assets[assetHash];
-        require(a.owner != address(0), "Not found");
-        return a;
+    // Batch version of verifyAsset. Unknown assets are skipped (no AssetVerified event).
+    function verifyAssets(bytes32[] calldata assetHashes, bool[] calldata statuses) external onlyOwner {
+        require(assetHashes.length == statuses.length, "Length mismatch");
+
+        for (uint256 i = 0; i < assetHashes.length; ++i) {
+            Record storage r = _records[assetHashes[i]];
+            if (r.owner == address(0)) continue;
+            r.verified = statuses[i];
+            emit AssetVerified(assetHashes[i], msg.sender, statuses[i]);
+        }
+    }
+
+    function _asset(bytes32 assetHash, Record storage r) internal view returns (Asset memory) {
+        return Asset({
+            assetHash: assetHash,
+            ipfsCid: r.ipfsCid,
+            owner: r.owner,
+            verified: r.verified,
+            tokenId: r.tokenId
+        });
+    }
+
+    function getAsset(bytes32 assetHash) public view returns (Asset memory) {
+        Record storage r = _records[assetHash];
+        require(r.owner != address(0), "Not found");
+        return _asset(assetHash, r);
+    }
+
+    // Batch read for dashboards: unknown hashes give found[i] == false and an empty record
+    // instead of reverting the whole call.
+    function getAssets(bytes32[] calldata assetHashes)
+        external
+        view
+        returns (bool[] memory found, Asset[] memory records)
+    {
+        found = new bool[](assetHashes.length);
+        records = new Asset[](assetHashes.length);
+        for (uint256 i = 0; i < assetHashes.length; ++i) {
+            Record storage r = _records[assetHashes[i]];
+            if (r.owner == address(0)) continue;
+            found[i] = true;
+            records[i] = _asset(assetHashes[i], r);
+        }
     }
 
+    // Internal lookup (no external self-call).
     function getAssetByToken(uint256 tokenId) external view returns (Asset memory) {
-        bytes32 h = token2Asset[tokenId];
-        return this.getAsset(h);
+        return getAsset(token2Asset[tokenId]);
+    }
+
+    // Used by AssetNFT.tokenURI so the CID is stored once.
+    function cidOfToken(uint256 tokenId) external view returns (string memory) {
+        return _records[token2Asset[tokenId]].ipfsCid;
     }
 
     function transferAsset(bytes32 assetHash, address to) external onlyAssetOwner(assetHash) {
         require(to != address(0), "Zero address");
-        Asset storage a = assets[assetHash];
+        Record storage r = _records[assetHash];
         // The NFT itself is held by the registry contract (it was minted to address(this)).
         // Update owner record first, then transfer the token from registry to the new owner.
         address from = address(this);
-        a.owner = to;
-        nft.transferFrom(from, to, a.tokenId);
-        emit AssetTransferred(assetHash, from, to, a.tokenId);
+        uint256 tid = r.tokenId;
+        r.owner = to;
+        nft.transferFrom(from, to, tid);
+        emit AssetTransferred(assetHash, from, to, tid);
     }
 }
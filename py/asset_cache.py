@@ -0,0 +1,113 @@
+"""
+Read-through cache cho getAsset (LRU + TTL), dùng chung cho /asset/get và auth.
+
+- key: assetHash (bytes32), value: asset_codec.Asset (eth_call thô, decode theo vị trí)
+- invalidate khi backend ghi thành công (register/verify/transfer) và khi indexer thấy event
+- không cache lỗi "Not found" (asset có thể được đăng ký ngay sau đó)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from asset_codec import async_call_get_asset, call_get_asset
+from util_hex import hex_key
+
+ASSET_CACHE_SIZE = int(os.getenv("ASSET_CACHE_SIZE", "10000"))
+ASSET_CACHE_TTL = float(os.getenv("ASSET_CACHE_TTL", "30"))
+
+
+class AssetCache:
+    """LRU có thời hạn, thread-safe, kèm bộ đếm hit/miss/eviction."""
+
+    def __init__(self, maxsize: int = ASSET_CACHE_SIZE, ttl: float = ASSET_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, asset_hash):
+        key = hex_key(asset_hash)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, asset_hash, value):
+        if self.maxsize <= 0:
+            return
+        key = hex_key(asset_hash)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, asset_hash):
+        with self._lock:
+            if self._data.pop(hex_key(asset_hash), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+asset_cache = AssetCache()
+
+
+def get_asset(registry, asset_key_bytes):
+    """getAsset qua cache (Web3 sync). Lỗi từ contract (Not found...) được raise nguyên vẹn."""
+    result = asset_cache.get(asset_key_bytes)
+    if result is None:
+        result = call_get_asset(registry.w3, registry.address, asset_key_bytes)
+        asset_cache.put(asset_key_bytes, result)
+    return result
+
+
+async def async_get_asset(registry, asset_key_bytes):
+    """getAsset qua cache (AsyncWeb3)."""
+    result = asset_cache.get(asset_key_bytes)
+    if result is None:
+        result = await async_call_get_asset(registry.w3, registry.address, asset_key_bytes)
+        asset_cache.put(asset_key_bytes, result)
+    return result
+
+
+def on_registry_event(ev: dict):
+    """Listener cho indexer: event của asset nào thì xoá cache asset đó."""
+    asset_hash = ev.get("args", {}).get("assetHash")
+    if asset_hash is not None:
+        asset_cache.invalidate(asset_hash)
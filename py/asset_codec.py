@@ -0,0 +1,156 @@
+"""
+Encode/decode thô cho các hàm đọc của AssetRegistry (getAsset, getAssetByToken).
+
+Selector tính sẵn 1 lần, calldata ghép bằng bytes, kết quả eth_call decode theo vị trí
+vào record Asset (__slots__) - không tạo ContractFunction / không đi qua ABI codec của web3
+cho mỗi lần đọc.
+
+Layout kết quả (struct Asset có string -> tuple động):
+    [0x00] offset tới tuple (= 0x20)
+    tuple: assetHash | offset ipfsCid (tính từ đầu tuple) | owner | verified | tokenId | len(cid) | cid
+"""
+
+import os
+from functools import lru_cache
+
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput
+
+GET_ASSET_SELECTOR = bytes(Web3.keccak(text="getAsset(bytes32)")[:4])
+GET_ASSET_BY_TOKEN_SELECTOR = bytes(Web3.keccak(text="getAssetByToken(uint256)")[:4])
+
+# Số asset_key (string) giữ hash keccak trong bộ nhớ
+ASSET_KEY_HASH_CACHE = int(os.getenv("ASSET_KEY_HASH_CACHE", "65536"))
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+class Asset:
+    """Bản ghi asset đọc từ registry. Hỗ trợ truy cập theo vị trí như tuple cũ (hash, cid, owner, verified, tokenId)."""
+
+    __slots__ = ("asset_hash", "ipfs_cid", "owner", "verified", "token_id")
+
+    def __init__(self, asset_hash: bytes, ipfs_cid: str, owner: str, verified: bool, token_id: int):
+        self.asset_hash = asset_hash
+        self.ipfs_cid = ipfs_cid
+        self.owner = owner
+        self.verified = verified
+        self.token_id = token_id
+
+    def as_tuple(self) -> tuple:
+        return (self.asset_hash, self.ipfs_cid, self.owner, self.verified, self.token_id)
+
+    def __getitem__(self, index):
+        return self.as_tuple()[index]
+
+    def __len__(self):
+        return 5
+
+    def __iter__(self):
+        return iter(self.as_tuple())
+
+    def __eq__(self, other):
+        if isinstance(other, Asset):
+            return self.as_tuple() == other.as_tuple()
+        if isinstance(other, (tuple, list)):
+            return self.as_tuple() == tuple(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Asset{self.as_tuple()!r}"
+
+    def to_dict(self, asset_key: str = None, gateway_link=None) -> dict:
+        """
+        Dict trả cho client (cùng field với /asset/get).
+
+        gateway_link: hàm cid -> link ipfsGateway do caller truyền (server: ipfs_gateway.gateway_link),
+        codec không phụ thuộc module gateway; None -> ipfsGateway là None
+        """
+        return {
+            "asset_key": asset_key,
+            "owner": self.owner,
+            "verified": self.verified,
+            "tokenId": self.token_id,
+            "ipfsCid": self.ipfs_cid,
+            "ipfsGateway": gateway_link(self.ipfs_cid) if gateway_link is not None else None,
+        }
+
+
+@lru_cache(maxsize=ASSET_KEY_HASH_CACHE)
+def asset_key_hash(asset_key: str) -> bytes:
+    """keccak256(asset_key) - memo cho các key đọc nhiều."""
+    return bytes(Web3.keccak(text=asset_key))
+
+
+@lru_cache(maxsize=4096)
+def _checksum(raw20: bytes) -> str:
+    return Web3.to_checksum_address(raw20)
+
+
+def encode_get_asset(asset_hash) -> str:
+    """Calldata hex cho getAsset(bytes32)."""
+    asset_hash = bytes(asset_hash)
+    if len(asset_hash) != 32:
+        raise ValueError("asset_hash must be 32 bytes")
+    return "0x" + (GET_ASSET_SELECTOR + asset_hash).hex()
+
+
+def encode_get_asset_by_token(token_id: int) -> str:
+    """Calldata hex cho getAssetByToken(uint256)."""
+    return "0x" + (GET_ASSET_BY_TOKEN_SELECTOR + int(token_id).to_bytes(32, "big")).hex()
+
+
+def decode_asset(data) -> Asset:
+    """
+    Decode kết quả eth_call của getAsset/getAssetByToken.
+
+    Raises:
+        BadFunctionCallOutput nếu dữ liệu rỗng (không có contract) hoặc sai layout
+    """
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    data = bytes(data)
+    try:
+        base = int.from_bytes(data[0:32], "big")
+        head = data[base:base + 160]
+        if len(head) != 160:
+            raise ValueError("short tuple head")
+        cid_at = base + int.from_bytes(head[32:64], "big")
+        len_word = data[cid_at:cid_at + 32]
+        if len(len_word) != 32:
+            raise ValueError("short string length")
+        cid_len = int.from_bytes(len_word, "big")
+        cid_raw = data[cid_at + 32:cid_at + 32 + cid_len]
+        if len(cid_raw) != cid_len:
+            raise ValueError("short string")
+        return Asset(
+            head[0:32],
+            cid_raw.decode("utf-8"),
+            _checksum(head[76:96]),
+            head[127] != 0,
+            int.from_bytes(head[128:160], "big"),
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise BadFunctionCallOutput(
+            f"Could not decode getAsset output ({len(data)} bytes): {e}. "
+            "Is the registry deployed at this address?"
+        )
+
+
+def _call_params(registry_address: str, data: str) -> dict:
+    return {"to": registry_address, "data": data}
+
+
+def call_get_asset(w3, registry_address: str, asset_hash) -> Asset:
+    """getAsset qua eth_call thô (Web3 sync)."""
+    return decode_asset(w3.eth.call(_call_params(registry_address, encode_get_asset(asset_hash))))
+
+
+async def async_call_get_asset(w3, registry_address: str, asset_hash) -> Asset:
+    """getAsset qua eth_call thô (AsyncWeb3)."""
+    return decode_asset(await w3.eth.call(_call_params(registry_address, encode_get_asset(asset_hash))))
+
+
+async def async_call_get_asset_by_token(w3, registry_address: str, token_id: int) -> Asset:
+    """getAssetByToken qua eth_call thô (AsyncWeb3)."""
+    return decode_asset(await w3.eth.call(_call_params(registry_address, encode_get_asset_by_token(token_id))))
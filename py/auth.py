@@ -6,6 +6,9 @@ Kiểm tra quyền của user dựa trên role: Admin, Asset Owner, Public.
 from fastapi import HTTPException
 from web3 import Web3
 from util_contract import get_contracts
+from asset_cache import get_asset
+from request_chain import RequestChain, get_request_chain
+from asset_codec import Asset, asset_key_hash
 import os
 
 
@@ -41,7 +44,7 @@ def check_admin(caller_address: str):
 def check_asset_owner(asset_key: str, caller_address: str):
     """
     Kiểm tra caller có phải chủ sở hữu asset không.
-    Lấy owner từ contract registry.
+    Lấy owner từ contract registry (qua asset_cache).
     
     Args:
         asset_key: khóa asset (string, sẽ hash thành bytes32)
@@ -52,20 +55,50 @@ def check_asset_owner(asset_key: str, caller_address: str):
         HTTPException 404 nếu asset không tìm thấy
     """
     registry, _, w3, _ = get_contracts()
-    asset_key_bytes = Web3.keccak(text=asset_key)
+    asset_key_bytes = asset_key_hash(asset_key)
     
     # Lấy asset từ contract
     try:
-        asset = registry.functions.getAsset(asset_key_bytes).call()
+        asset = get_asset(registry, asset_key_bytes)
     except Exception as e:
         raise HTTPException(
             status_code=404,
             detail=f"Asset not found: {str(e)}"
         )
-    
-    # asset là tuple: (assetHash, ipfsCid, owner, verified, tokenId)
-    # owner là phần tử thứ 3 (index 2)
-    if isinstance(asset, (list, tuple)) and len(asset) >= 3:
+
+    _ensure_asset_owner(asset, caller_address)
+
+
+async def async_check_asset_owner(asset_key: str, caller_address: str, chain: RequestChain = None):
+    """
+    Giống check_asset_owner() nhưng gọi contract qua AsyncWeb3
+    (dùng trong endpoint async để không block event loop).
+
+    chain: RequestChain của request hiện tại (Depends(get_request_chain)); asset đọc ở đây
+    được memo nên endpoint đọc lại cùng asset không tốn thêm RPC.
+    """
+    if chain is None:
+        chain = await get_request_chain()
+    asset_key_bytes = asset_key_hash(asset_key)
+
+    try:
+        asset = await chain.get_asset(asset_key_bytes)
+    except Exception as e:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Asset not found: {str(e)}"
+        )
+
+    _ensure_asset_owner(asset, caller_address)
+    return asset
+
+
+def _ensure_asset_owner(asset, caller_address: str):
+    """So sánh owner của asset (asset_codec.Asset hoặc tuple) trả về từ contract với caller."""
+    # tuple: (assetHash, ipfsCid, owner, verified, tokenId) -> owner là index 2
+    if isinstance(asset, Asset):
+        owner = asset.owner
+    elif isinstance(asset, (list, tuple)) and len(asset) >= 3:
         owner = asset[2]  # owner address
     else:
         raise HTTPException(
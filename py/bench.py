@@ -0,0 +1,351 @@
+"""
+Benchmark các hot path của backend trên EVM in-process (eth-tester + py-evm), không cần RPC thật.
+
+Đo: get_contracts, build_and_send, getAsset (ABI web3 / codec thô), check_asset_owner (cache
+lạnh / nóng) và các endpoint FastAPI qua TestClient (ASGI, không mở cổng).
+EVM được mở qua JSON-RPC HTTP local, chain context sync/async do chính factory của util_contract
+tạo (HTTPProvider, RpcPool + SignerPool, ReceiptWatcher batch) giống server thật.
+
+Yêu cầu (không nằm trong requirements.txt):
+    pip install "eth-tester[py-evm]"
+    npx hardhat compile        # tạo artifacts/contracts/... (ABI + bytecode)
+
+Chạy trong thư mục py/:
+    python bench.py                                   # in bảng kết quả
+    python bench.py --save bench_baseline.json        # lưu baseline
+    python bench.py --compare bench_baseline.json     # so với baseline, exit 1 nếu chậm hơn
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web3 import Web3
+
+# Số lần đo mặc định mỗi case (có thể chỉnh qua --iterations)
+BENCH_ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "200"))
+BENCH_WARMUP = int(os.getenv("BENCH_WARMUP", "10"))
+# Chậm hơn baseline quá tỉ lệ này (theo p50) thì coi là regression
+BENCH_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.25"))
+
+
+# --- thống kê -----------------------------------------------------------------
+
+def percentile(samples: list, p: float) -> float:
+    """Percentile p (0-100) theo nội suy tuyến tính; samples không cần sort sẵn."""
+    if not samples:
+        raise ValueError("no samples")
+    data = sorted(samples)
+    k = (len(data) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (k - lo)
+
+
+def summarize(samples: list) -> dict:
+    """samples (giây) -> throughput + latency percentile (ms)."""
+    total = sum(samples)
+    return {
+        "n": len(samples),
+        "ops_per_sec": len(samples) / total if total else None,
+        "mean_ms": total / len(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = BENCH_TOLERANCE) -> list:
+    """
+    So kết quả với baseline (cùng tên case).
+
+    Returns:
+        list (case, baseline_p50_ms, current_p50_ms, ratio) cho các case chậm hơn tolerance
+    """
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = cur["p50_ms"] / base["p50_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, base["p50_ms"], cur["p50_ms"], ratio))
+    return regressions
+
+
+def measure(fn, iterations: int, warmup: int = BENCH_WARMUP) -> dict:
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(warmup + i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+# --- chain in-process -----------------------------------------------------------
+
+def _rpc_value(value):
+    """Kết quả đã format của web3 (int, bytes, AttributeDict lồng) -> dạng JSON-RPC (quantity/bytes là hex)."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return {k: _rpc_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rpc_value(v) for v in value]
+    return value
+
+
+def serve_eth_tester(w3: Web3):
+    """
+    Mở Web3(EthereumTesterProvider) qua JSON-RPC HTTP (cả batch) trên 127.0.0.1, để backend đi qua
+    đúng HTTPProvider / RpcPool như khi chạy với node thật. Request đi qua middleware của provider
+    (eth-tester trả field snake_case, middleware đổi về tên field JSON-RPC).
+
+    Returns:
+        (server, url) - gọi server.shutdown() + server_close() khi xong
+    """
+    lock = threading.Lock()  # eth-tester không thread-safe
+
+    def call(req: dict) -> dict:
+        out = {"jsonrpc": "2.0", "id": req.get("id")}
+        try:
+            with lock:
+                out["result"] = _rpc_value(w3.manager.request_blocking(req["method"], req.get("params") or []))
+        except Exception as e:
+            error = e.args[0] if e.args else str(e)
+            out["error"] = error if isinstance(error, dict) else {"code": -32000, "message": str(error)}
+        return out
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive như node thật
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            payload = json.dumps([call(r) for r in body] if isinstance(body, list) else call(body)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def use_chain(rpc_url: str, private_key: str, registry_address: str, nft_address: str):
+    """
+    Trỏ cấu hình chain (env cho validate_config + hằng số của util_contract) tới RPC / contract
+    cho trước; context sync/async được tạo lại lúc dùng bằng factory của util_contract.
+    """
+    import util_contract
+
+    os.environ.update(
+        SEPOLIA_RPC=rpc_url, PRIVATE_KEY=private_key, REGISTRY_ADDRESS=registry_address, NFT_ADDRESS=nft_address
+    )
+    util_contract.RPC_URL = rpc_url
+    util_contract.RPC_URLS = [rpc_url]
+    util_contract.RPC_WRITE_URLS = None
+    util_contract.PRIVATE_KEY = private_key
+    util_contract.REGISTRY_ADDRESS = registry_address
+    util_contract.NFT_ADDRESS = nft_address
+    util_contract.close_chain()
+
+
+def load_artifact(path):
+    if not os.path.exists(path):
+        raise RuntimeError(f"{path} not found (run: npx hardhat compile)")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not data.get("bytecode") or data["bytecode"] == "0x":
+        raise RuntimeError(f"{path} has no bytecode (run: npx hardhat compile)")
+    return data["abi"], data["bytecode"]
+
+
+def setup_chain():
+    """
+    Deploy AssetNFT + AssetRegistry lên eth-tester và nối NFT với registry (giống scripts/deploy.js),
+    mở EVM đó qua JSON-RPC HTTP local rồi trỏ util_contract tới (use_chain).
+
+    Returns:
+        rpc server (serve_eth_tester) - gọi shutdown() + server_close() khi xong
+    """
+    try:
+        from web3.providers.eth_tester import EthereumTesterProvider
+        import eth_tester  # noqa: F401
+    except ImportError:
+        raise RuntimeError('eth-tester is not installed: pip install "eth-tester[py-evm]"')
+
+    import util_contract
+
+    nft_abi, nft_bin = load_artifact(util_contract.NFT_ARTIFACT)
+    reg_abi, reg_bin = load_artifact(util_contract.REGISTRY_ARTIFACT)
+
+    provider = EthereumTesterProvider()
+    w3 = Web3(provider)
+    tester = provider.ethereum_tester
+    key = tester.backend.account_keys[0]
+    private_key = key.to_hex() if hasattr(key, "to_hex") else key
+    account = w3.eth.account.from_key(private_key)
+
+    def deploy(abi, bytecode, *args):
+        tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact(
+            {"from": account.address}
+        )
+        return w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+
+    nft_addr = deploy(nft_abi, nft_bin)
+    reg_addr = deploy(reg_abi, reg_bin, nft_addr)
+    # AssetNFT chỉ cho registry mint (giống scripts/deploy.js)
+    w3.eth.wait_for_transaction_receipt(
+        w3.eth.contract(address=nft_addr, abi=nft_abi).functions.setRegistry(reg_addr).transact({"from": account.address})
+    )
+
+    # server/auth đọc các biến này
+    os.environ["ADMIN_ADDRESS"] = account.address
+    os.environ.setdefault("PINATA_API_KEY", "bench")
+    os.environ.setdefault("PINATA_SECRET_API_KEY", "bench")
+
+    rpc, url = serve_eth_tester(w3)
+    use_chain(url, private_key, reg_addr, nft_addr)
+    return rpc
+
+
+# --- các case -------------------------------------------------------------------
+
+def run_benchmarks(iterations: int) -> dict:
+    rpc = setup_chain()
+
+    import util_contract
+    from asset_cache import asset_cache
+    from asset_codec import call_get_asset
+    from auth import check_asset_owner
+    from util_contract import build_and_send, get_contracts
+
+    # context sync do util_contract tự tạo (HTTPProvider + session keep-alive)
+    registry, _, w3, owner = get_contracts()
+    results = {}
+
+    results["get_contracts"] = measure(lambda i: get_contracts(), iterations)
+
+    def register(i):
+        h = Web3.keccak(text=f"bench-send-{i}")
+        build_and_send(w3, registry.functions.registerAsset(h, f"QmBench{i}", owner.address), owner)
+
+    results["build_and_send.registerAsset"] = measure(register, max(iterations // 4, 1))
+
+    known = Web3.keccak(text="bench-send-0")
+    results["getAsset.call_decode"] = measure(
+        lambda i: registry.functions.getAsset(known).call(), iterations
+    )
+    results["getAsset.raw_codec"] = measure(
+        lambda i: call_get_asset(w3, registry.address, known), iterations
+    )
+
+    def owner_cold(i):
+        asset_cache.clear()
+        check_asset_owner("bench-send-0", owner.address)
+
+    results["check_asset_owner.cold"] = measure(owner_cold, iterations)
+    results["check_asset_owner.warm"] = measure(
+        lambda i: check_asset_owner("bench-send-0", owner.address), iterations
+    )
+
+    from fastapi.testclient import TestClient
+    import server
+
+    # lifespan của server tạo context async (RpcPool, SignerPool có w3) và prewarm như khi deploy
+    with TestClient(server.app) as client:
+        ready = client.get("/readyz")
+        assert ready.status_code == 200, ready.text
+        def get_endpoint(i):
+            asset_cache.clear()
+            assert client.get("/asset/get", params={"asset_key": "bench-send-0"}).status_code == 200
+
+        results["GET /asset/get.cold"] = measure(get_endpoint, iterations)
+        results["GET /asset/get.warm"] = measure(
+            lambda i: client.get("/asset/get", params={"asset_key": "bench-send-0"}), iterations
+        )
+
+        keys = [f"bench-send-{i}" for i in range(min(50, max(iterations // 4, 1)))]
+        results["POST /asset/get-many.50"] = measure(
+            lambda i: client.post("/asset/get-many", json={"asset_keys": keys}), max(iterations // 10, 1)
+        )
+
+        def register_endpoint(i):
+            r = client.post("/asset/register", json={"asset_key": f"bench-api-{i}", "cid": f"QmApi{i}"})
+            assert r.status_code == 200, r.text
+
+        results["POST /asset/register"] = measure(register_endpoint, max(iterations // 4, 1))
+
+    util_contract.close_chain()
+    rpc.shutdown()
+    rpc.server_close()
+    return results
+
+
+def print_table(results: dict, regressions=()):
+    slow = {r[0] for r in regressions}
+    print(f"{'case':38} {'ops/s':>10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        flag = "  <-- regression" if name in slow else ""
+        print(f"{name:38} {r['ops_per_sec']:10.1f} {r['p50_ms']:9.3f} {r['p90_ms']:9.3f} {r['p99_ms']:9.3f}{flag}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backend benchmarks on an in-process EVM")
+    parser.add_argument("--iterations", type=int, default=BENCH_ITERATIONS)
+    parser.add_argument("--save", help="ghi kết quả làm baseline (JSON)")
+    parser.add_argument("--compare", help="so với file baseline (JSON)")
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.iterations)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+    print_table(results, regressions)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "iterations": args.iterations,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print("baseline saved:", args.save)
+
+    if regressions:
+        for name, base, cur, ratio in regressions:
+            print(f"REGRESSION {name}: p50 {base:.3f}ms -> {cur:.3f}ms (x{ratio:.2f})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Tính IPFS CID của file ngay trên server (không cần node IPFS), khớp với `ipfs add` mặc định.
+
+- chunker size-262144 (256 KiB), layout balanced, tối đa 174 link / node
+- CIDv0: leaf là node dag-pb bọc UnixFS File, encode base58btc (Qm...)
+- CIDv1: raw leaves (codec raw), node trung gian dag-pb, encode base32 (bafy.../bafk...)
+
+Dùng CidBuilder để tính dần khi stream file: bộ nhớ chỉ giữ 1 chunk và tối đa
+174 link mỗi tầng của cây.
+"""
+
+import base64
+import hashlib
+
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+
+UNIXFS_FILE = 2
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(value)) + value
+
+
+def _multihash(block: bytes) -> bytes:
+    return bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes=()) -> bytes:
+    out = _field_varint(1, UNIXFS_FILE)
+    if data:
+        out += _field_bytes(2, data)
+    out += _field_varint(3, filesize)
+    for size in blocksizes:
+        out += _field_varint(4, size)
+    return out
+
+
+def _pb_node(unixfs: bytes, links=()) -> bytes:
+    """Encode PBNode: Links (field 2) trước, Data (field 1) sau - đúng thứ tự canonical của dag-pb."""
+    out = b""
+    for cid_bytes, tsize in links:
+        link = _field_bytes(1, cid_bytes) + _field_bytes(2, b"") + _field_varint(3, tsize)
+        out += _field_bytes(2, link)
+    return out + _field_bytes(1, unixfs)
+
+
+def _cid_bytes(version: int, codec: int, block: bytes) -> bytes:
+    if version == 0:
+        return _multihash(block)
+    return _varint(1) + _varint(codec) + _multihash(block)
+
+
+def b58encode(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, r = divmod(n, 58)
+        out = _B58_ALPHABET[r] + out
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+def cid_to_str(cid_bytes: bytes) -> str:
+    """CIDv0 -> base58btc, CIDv1 -> base32 lowercase có prefix 'b' (multibase)."""
+    if cid_bytes[0] == SHA2_256:
+        return b58encode(cid_bytes)
+    return "b" + base64.b32encode(cid_bytes).decode().lower().rstrip("=")
+
+
+class CidBuilder:
+    """
+    Tính CID dần theo dữ liệu stream vào.
+
+    Mỗi phần tử trong cây là (cid_bytes, tsize, datasize): tsize là tổng kích thước
+    block của cả cây con (Tsize của link), datasize là số byte dữ liệu file trong cây con.
+    """
+
+    def __init__(self, version: int = 0, chunk_size: int = CHUNK_SIZE):
+        if version not in (0, 1):
+            raise ValueError("CID version must be 0 or 1")
+        self.version = version
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._buf = bytearray()
+        self._levels = [[]]
+        self._leaves = 0
+        self._root = None
+
+    def update(self, data: bytes):
+        self.size += len(data)
+        self._buf += data
+        while len(self._buf) >= self.chunk_size:
+            chunk = bytes(self._buf[:self.chunk_size])
+            del self._buf[:self.chunk_size]
+            self._add_leaf(chunk)
+
+    def _add_leaf(self, chunk: bytes):
+        if self.version == 0:
+            block = _pb_node(_unixfs_file(chunk, len(chunk)))
+            item = (_cid_bytes(0, CODEC_DAG_PB, block), len(block), len(chunk))
+        else:
+            item = (_cid_bytes(1, CODEC_RAW, chunk), len(chunk), len(chunk))
+        self._leaves += 1
+        self._push(0, item)
+
+    def _push(self, level: int, item):
+        if level == len(self._levels):
+            self._levels.append([])
+        self._levels[level].append(item)
+        if len(self._levels[level]) == MAX_LINKS:
+            self._push(level + 1, self._parent(self._levels[level]))
+            self._levels[level] = []
+
+    def _parent(self, children):
+        datasize = sum(c[2] for c in children)
+        block = _pb_node(
+            _unixfs_file(b"", datasize, [c[2] for c in children]),
+            [(c[0], c[1]) for c in children],
+        )
+        tsize = len(block) + sum(c[1] for c in children)
+        return _cid_bytes(self.version, CODEC_DAG_PB, block), tsize, datasize
+
+    def digest(self) -> bytes:
+        """CID dạng binary. Gọi sau khi đã update hết dữ liệu."""
+        if self._root is not None:
+            return self._root
+        if self._buf or self._leaves == 0:
+            # chunk cuối (hoặc file rỗng: 1 leaf rỗng)
+            self._add_leaf(bytes(self._buf))
+            self._buf = bytearray()
+
+        level = 0
+        while True:
+            items = self._levels[level]
+            if len(items) == 1 and not any(self._levels[level + 1:]):
+                self._root = items[0][0]
+                return self._root
+            if items:
+                self._levels[level] = []
+                self._push(level + 1, self._parent(items))
+            level += 1
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+    def cid(self) -> str:
+        return cid_to_str(self.digest())
+
+
+def compute_cid(data: bytes, version: int = 0) -> str:
+    """CID của nội dung bytes."""
+    builder = CidBuilder(version)
+    builder.update(data)
+    return builder.cid()
+
+
+def compute_cid_stream(fileobj, version: int = 0, read_size: int = 1024 * 1024):
+    """
+    CID của file object, đọc từng đoạn read_size.
+
+    Returns:
+        (cid, số byte đã đọc)
+    """
+    builder = CidBuilder(version)
+    while True:
+        chunk = fileobj.read(read_size)
+        if not chunk:
+            break
+        builder.update(chunk)
+    return builder.cid(), builder.size
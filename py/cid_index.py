@@ -0,0 +1,85 @@
+"""
+Index (SQLite) các nội dung đã pin lên IPFS, khoá theo CID tính tại server.
+
+Trước khi upload, ipfs_client tính CID của file; nếu CID đã có trong index thì
+trả lại CID đã pin mà không gửi file lên Pinata lần nữa.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+IPFS_DEDUP = os.getenv("IPFS_DEDUP", "true").lower() in ("true", "1", "yes")
+CID_INDEX_PATH = os.getenv("CID_INDEX_PATH", str(Path(__file__).resolve().parent / "cid_index.db"))
+
+
+class CidIndex:
+    """local_cid (CID tính tại server) -> cid do Pinata/IPFS trả về khi pin."""
+
+    def __init__(self, path: str = None):
+        self.path = path = path or CID_INDEX_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pinned (
+                local_cid TEXT PRIMARY KEY,
+                cid TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                filename TEXT,
+                pinned_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, local_cid: str):
+        """CID đã pin cho nội dung này (và tăng bộ đếm hit), None nếu chưa có."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT cid FROM pinned WHERE local_cid = ?", (local_cid,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pinned SET hits = hits + 1 WHERE local_cid = ?", (local_cid,))
+        return row[0]
+
+    def add(self, local_cid: str, cid: str, size: int, filename: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pinned (local_cid, cid, size, filename, pinned_at) VALUES (?, ?, ?, ?, ?)",
+                (local_cid, cid, size, filename, time.time()),
+            )
+
+    def forget(self, cid: str):
+        """Xoá entry (ví dụ khi đã unpin trên Pinata) để lần upload sau gửi lại file."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pinned WHERE cid = ? OR local_cid = ?", (cid, cid))
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM pinned"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "dedup_hits": hits}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_cid_index():
+    """CidIndex dùng chung (mở lazily); None nếu IPFS_DEDUP tắt."""
+    global _index
+    if not IPFS_DEDUP:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = CidIndex()
+        return _index
@@ -0,0 +1,52 @@
+"""
+Nạp và kiểm tra cấu hình (.env) cho cả process.
+
+- load_env(): đọc .env đúng 1 lần, mọi module gọi hàm này thay vì load_dotenv() riêng
+- validate_config(): kiểm tra 1 lần trong lifespan của server, không raise lúc import
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+_loaded = False
+_lock = threading.Lock()
+
+# Biến bắt buộc để server làm việc với chain (SEPOLIA_RPC có thể thay bằng RPC_URLS)
+REQUIRED_CHAIN_VARS = ("SEPOLIA_RPC", "PRIVATE_KEY", "REGISTRY_ADDRESS", "NFT_ADDRESS")
+
+
+def load_env():
+    """Đọc .env vào os.environ (chỉ lần gọi đầu tiên, không ghi đè biến đã có)."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
+
+
+def validate_config() -> dict:
+    """
+    Kiểm tra cấu hình hiện tại.
+
+    Returns:
+        {"errors": [...], "warnings": [...]} - errors: server không thể phục vụ chain,
+        warnings: một số tính năng bị tắt (upload IPFS, check admin)
+    """
+    load_env()
+    errors = [
+        f"{name} is not set"
+        for name in REQUIRED_CHAIN_VARS
+        if not os.getenv(name) and not (name == "SEPOLIA_RPC" and os.getenv("RPC_URLS"))
+    ]
+    warnings = []
+    if not os.getenv("ADMIN_ADDRESS"):
+        warnings.append("ADMIN_ADDRESS is not set (admin endpoints will fail)")
+    if not os.getenv("IPFS_API_URL") and not (
+        os.getenv("PINATA_API_KEY") and os.getenv("PINATA_SECRET_API_KEY")
+    ):
+        warnings.append("Pinata API keys are not set (IPFS upload disabled)")
+    return {"errors": errors, "warnings": warnings}
@@ -0,0 +1,95 @@
+"""
+Kiểm tra file người dùng giữ có đúng là nội dung đã đăng ký on-chain (so CID).
+
+- CID tính bằng cid.CidBuilder trong thread pool riêng (CHECK_CONTENT_WORKERS thread):
+  hashlib nhả GIL khi hash nên nhiều file được tính song song trên nhiều core
+- Body stream (application/octet-stream): nhận chunk tới đâu hash tới đó, hash đoạn trước
+  chạy song song với việc nhận đoạn sau; bộ nhớ chỉ giữ ~2 x CHECK_CONTENT_READ_SIZE
+- File multipart (Starlette đã spool ra đĩa): đọc từng đoạn CHECK_CONTENT_READ_SIZE trong thread
+- Phiên bản CID (v0 Qm... / v1 b...) lấy theo CID on-chain để tính cùng kiểu
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cid import CidBuilder, compute_cid_stream
+from ipfs_gateway import is_valid_cid
+
+# Số thread tính CID đồng thời (mặc định = số core)
+CHECK_CONTENT_WORKERS = int(os.getenv("CHECK_CONTENT_WORKERS", str(os.cpu_count() or 2)))
+# Kích thước mỗi đoạn đọc / hash (byte)
+CHECK_CONTENT_READ_SIZE = int(os.getenv("CHECK_CONTENT_READ_SIZE", str(1024 * 1024)))
+
+_executor = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=CHECK_CONTENT_WORKERS, thread_name_prefix="cid")
+    return _executor
+
+
+def cid_version(cid: str):
+    """0 cho CIDv0 (Qm...), 1 cho CIDv1 base32 (b...), None nếu không tính lại được."""
+    if not is_valid_cid(cid):
+        return None
+    return 0 if cid.startswith("Qm") else 1
+
+
+def file_cid(fileobj, version: int):
+    """(cid, size) của file object, đọc từ đầu."""
+    fileobj.seek(0)
+    return compute_cid_stream(fileobj, version, CHECK_CONTENT_READ_SIZE)
+
+
+async def async_file_cid(fileobj, version: int):
+    """file_cid trong thread pool tính CID."""
+    return await asyncio.get_running_loop().run_in_executor(_pool(), file_cid, fileobj, version)
+
+
+async def async_stream_cid(chunks, version: int):
+    """
+    (cid, size) của dữ liệu từ async iterator chunks (ví dụ request.stream()).
+
+    Đoạn đã nhận đủ CHECK_CONTENT_READ_SIZE được hash trong thread pool trong lúc nhận đoạn tiếp theo.
+    """
+    loop = asyncio.get_running_loop()
+    builder = CidBuilder(version)
+    buf = bytearray()
+    pending = None
+    async for chunk in chunks:
+        buf += chunk
+        if len(buf) >= CHECK_CONTENT_READ_SIZE:
+            if pending is not None:
+                await pending
+            pending = loop.run_in_executor(_pool(), builder.update, bytes(buf))
+            buf = bytearray()
+    if pending is not None:
+        await pending
+    if buf:
+        await loop.run_in_executor(_pool(), builder.update, bytes(buf))
+    return await loop.run_in_executor(_pool(), builder.cid), builder.size
+
+
+def check_result(asset_key: str, onchain_cid, computed_cid=None, size: int = None, filename: str = None) -> dict:
+    """
+    Kết quả cho 1 file. status:
+        match / mismatch, not_found (asset chưa đăng ký), unsupported_cid (CID on-chain không tính lại được)
+    """
+    if onchain_cid is None:
+        status = "not_found"
+    elif computed_cid is None:
+        status = "unsupported_cid"
+    else:
+        status = "match" if computed_cid == onchain_cid else "mismatch"
+    return {
+        "asset_key": asset_key,
+        "filename": filename,
+        "size": size,
+        "cid": computed_cid,
+        "onchain_cid": onchain_cid,
+        "match": status == "match",
+        "status": status,
+    }
@@ -0,0 +1,266 @@
+"""
+Phát event của registry + trạng thái tx tới nhiều client (SSE /events/stream, WebSocket /events/ws).
+
+- Nguồn duy nhất: listener của AssetIndexer (1 vòng eth_getLogs cho cả process) và tx_tracker;
+  mỗi event được fan-out vào hàng đợi của từng subscriber, không client nào gọi RPC
+- Lọc theo asset hash / owner / tên event ngay khi fan-out
+- Resume: cursor "block:logIndex" (SSE id / Last-Event-ID) hoặc from_block -> replay từ
+  IndexStore.events_since rồi nối tiếp event live, không trùng không sót
+- Mỗi subscriber có buffer giới hạn EVENT_STREAM_BUFFER message; client đọc chậm làm đầy buffer
+  thì bị ngắt với message "overflow" (kèm cursor để resume), không giữ bộ nhớ vô hạn
+"""
+
+import asyncio
+import json
+import os
+
+from metrics import EVENT_STREAM_MESSAGES, EVENT_STREAM_OVERFLOWS, EVENT_STREAM_SUBSCRIBERS
+from util_hex import hex_key
+
+# Số message tối đa chờ gửi cho 1 subscriber
+EVENT_STREAM_BUFFER = int(os.getenv("EVENT_STREAM_BUFFER", "256"))
+# Số subscriber tối đa (SSE + WebSocket)
+EVENT_STREAM_MAX_SUBSCRIBERS = int(os.getenv("EVENT_STREAM_MAX_SUBSCRIBERS", "1000"))
+# Gửi heartbeat khi không có event trong ... giây (giữ kết nối qua proxy)
+EVENT_STREAM_HEARTBEAT = float(os.getenv("EVENT_STREAM_HEARTBEAT", "15"))
+# Số event đọc từ SQLite mỗi lần khi replay
+EVENT_STREAM_REPLAY_PAGE = int(os.getenv("EVENT_STREAM_REPLAY_PAGE", "500"))
+
+CHAIN_EVENT_NAMES = ("AssetRegistered", "AssetOwnerAssigned", "AssetVerified", "AssetTransferred", "Reorg")
+STREAM_EVENT_NAMES = CHAIN_EVENT_NAMES + ("tx",)
+
+_OVERFLOW = object()
+
+
+class StreamFull(RuntimeError):
+    """Đã đủ EVENT_STREAM_MAX_SUBSCRIBERS subscriber."""
+
+
+def parse_cursor(raw: str):
+    """'block:logIndex' -> (block, logIndex). Raises ValueError nếu sai định dạng."""
+    block, log_index = raw.strip().split(":")
+    return int(block), int(log_index)
+
+
+def chain_message(ev: dict) -> dict:
+    """Event của indexer (live hoặc dòng events_since) -> message gửi cho client."""
+    # bytes32 -> hex; địa chỉ giữ nguyên dạng checksum
+    args = {k: hex_key(v) if isinstance(v, (bytes, bytearray)) else v for k, v in ev.get("args", {}).items()}
+    msg = {
+        "type": "chain",
+        "event": ev["name"],
+        "asset_hash": hex_key(args["assetHash"]) if "assetHash" in args else None,
+        "block_number": ev.get("block_number"),
+        "log_index": ev.get("log_index"),
+        "tx_hash": ev.get("tx_hash"),
+        "owner": ev.get("owner"),  # owner hiện tại của asset, do indexer gắn vào
+        "args": args,
+    }
+    # Reorg không có log_index -> không phải cursor hợp lệ
+    if msg["log_index"] is not None:
+        msg["id"] = f"{msg['block_number']}:{msg['log_index']}"
+    return msg
+
+
+def tx_message(record: dict) -> dict:
+    """Record của tx_tracker -> message gửi cho client."""
+    return {
+        "type": "tx",
+        "event": "tx",
+        "tx_hash": record["tx_hash"],
+        "kind": record.get("kind"),
+        "status": record["status"],
+        "assets": record.get("assets", []),
+        "block_number": record.get("block_number"),
+        "error": record.get("error"),
+    }
+
+
+def format_sse(msg: dict) -> str:
+    """1 message -> khung SSE. Chỉ event chain có id, nên Last-Event-ID luôn là cursor chain gần nhất."""
+    lines = []
+    if msg.get("id"):
+        lines.append(f"id: {msg['id']}")
+    lines.append(f"event: {msg['event']}")
+    lines.append("data: " + json.dumps(msg, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """
+    1 client đang nghe.
+
+    Args:
+        assets: tập asset hash (hex) cần nhận, None = mọi asset
+        owners: tập địa chỉ (checksum) cần nhận, None = mọi owner
+        names: tập tên event (CHAIN_EVENT_NAMES + "tx"), None = tất cả
+        maxsize: kích thước buffer
+    """
+
+    def __init__(self, assets=None, owners=None, names=None, maxsize: int = None):
+        self.assets = {hex_key(a) for a in assets} if assets else None
+        self.owners = {o.lower() for o in owners} if owners else None
+        self.names = set(names) if names else None
+        self.queue = asyncio.Queue(maxsize=EVENT_STREAM_BUFFER if maxsize is None else maxsize)
+        self.cursor = None  # (block, logIndex) của event chain cuối cùng đã gửi
+        self.overflowed = False
+        self.delivered = 0
+
+    def matches(self, msg: dict, addresses) -> bool:
+        if self.names is not None and msg["event"] not in self.names:
+            return False
+        if self.assets is not None:
+            hashes = msg["assets"] if msg["type"] == "tx" else [msg["asset_hash"]]
+            if not self.assets.intersection(hashes):
+                return False
+        if self.owners is not None and not self.owners.intersection(addresses):
+            return False
+        return True
+
+    def offer(self, msg: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            # bỏ phần đang chờ (client sẽ resume từ cursor) và báo overflow
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_OVERFLOW)
+            EVENT_STREAM_OVERFLOWS.inc()
+
+    def cursor_str(self):
+        return f"{self.cursor[0]}:{self.cursor[1]}" if self.cursor is not None else None
+
+
+class EventHub:
+    """Fan-out event tới các Subscription. publish() chạy trong event loop (listener là hàm sync)."""
+
+    def __init__(self):
+        self.store = None  # IndexStore khi indexer chạy: replay (đọc trong thread)
+        self._subscribers = set()
+        self.published = 0
+
+    def full(self) -> bool:
+        return len(self._subscribers) >= EVENT_STREAM_MAX_SUBSCRIBERS
+
+    def subscribe(self, assets=None, owners=None, names=None) -> Subscription:
+        """Raises: StreamFull nếu đã đủ subscriber."""
+        if self.full():
+            raise StreamFull("Too many event stream subscribers")
+        sub = Subscription(assets, owners, names)
+        self._subscribers.add(sub)
+        EVENT_STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subscribers.discard(sub)
+        EVENT_STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+    @staticmethod
+    def _addresses(msg: dict) -> set:
+        """
+        Địa chỉ liên quan tới message (lowercase), dùng cho bộ lọc owner: owner hiện tại do indexer
+        gắn vào event (không đọc SQLite trong event loop) + from/to của AssetTransferred.
+        AssetRegistered.owner là ví đã gửi tx nên không tính.
+        """
+        if msg["type"] != "chain":
+            return set()
+        args = msg["args"]
+        found = {args[k].lower() for k in ("from", "to") if isinstance(args.get(k), str)}
+        if msg["event"] == "AssetOwnerAssigned" and isinstance(args.get("owner"), str):
+            found.add(args["owner"].lower())
+        if msg.get("owner"):
+            found.add(msg["owner"].lower())
+        return found
+
+    def publish(self, msg: dict):
+        self.published += 1
+        if not self._subscribers:
+            return
+        need_owner = any(s.owners is not None for s in self._subscribers)
+        addresses = self._addresses(msg) if need_owner else set()
+        for sub in list(self._subscribers):
+            if sub.matches(msg, addresses):
+                sub.offer(msg)
+
+    def on_indexer_event(self, ev: dict):
+        """Listener cho AssetIndexer.add_listener."""
+        self.publish(chain_message(ev))
+
+    def on_tx_update(self, record: dict):
+        """Listener cho tx_tracker.add_listener."""
+        self.publish(tx_message(record))
+
+    async def _replay(self, sub: Subscription, cursor):
+        block, log_index = cursor
+        sub.cursor = cursor
+        while True:
+            rows = await asyncio.to_thread(
+                self.store.events_since, block, EVENT_STREAM_REPLAY_PAGE, log_index
+            )
+            if not rows:
+                return
+            for row in rows:
+                msg = chain_message(row)
+                block, log_index = row["block_number"], row["log_index"]
+                addresses = self._addresses(msg) if sub.owners is not None else set()
+                if sub.matches(msg, addresses):
+                    yield msg
+                sub.cursor = (block, log_index)
+            if len(rows) < EVENT_STREAM_REPLAY_PAGE:
+                return
+
+    async def messages(self, sub: Subscription, cursor=None, heartbeat: float = None):
+        """
+        Message cho 1 subscriber: replay từ cursor (nếu có) rồi event live.
+
+        Yield None khi không có event trong heartbeat giây (caller gửi heartbeat).
+        Kết thúc (sau message "overflow") khi buffer của subscriber bị đầy.
+        Luôn unsubscribe khi generator đóng.
+
+        Args:
+            cursor: (block, logIndex) - chỉ gửi event chain sau vị trí này; None = chỉ live
+        """
+        heartbeat = EVENT_STREAM_HEARTBEAT if heartbeat is None else heartbeat
+        try:
+            if cursor is not None and self.store is not None:
+                async for msg in self._replay(sub, cursor):
+                    yield self._delivered(sub, msg)
+            while True:
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if msg is _OVERFLOW:
+                    yield {"type": "overflow", "event": "overflow", "resume_from": sub.cursor_str()}
+                    return
+                # event live đã gửi trong lúc replay
+                if msg.get("id") and sub.cursor is not None and (msg["block_number"], msg["log_index"]) <= sub.cursor:
+                    continue
+                yield self._delivered(sub, msg)
+        finally:
+            self.unsubscribe(sub)
+
+    @staticmethod
+    def _delivered(sub: Subscription, msg: dict) -> dict:
+        if msg.get("id"):
+            sub.cursor = (msg["block_number"], msg["log_index"])
+        sub.delivered += 1
+        EVENT_STREAM_MESSAGES.labels(msg["type"]).inc()
+        return msg
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": EVENT_STREAM_MAX_SUBSCRIBERS,
+            "buffer": EVENT_STREAM_BUFFER,
+            "published": self.published,
+            "replay_available": self.store is not None,
+            "backlog": sorted((s.queue.qsize() for s in self._subscribers), reverse=True)[:10],
+        }
+
+
+event_hub = EventHub()
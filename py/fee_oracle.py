@@ -0,0 +1,225 @@
+"""
+Fee oracle EIP-1559 + ước lượng gas theo từng hàm contract.
+
+- fee: tính từ eth_feeHistory (base fee block kế tiếp + percentile priority fee),
+  cache theo block -> mọi tx gửi trong cùng block dùng chung 1 lần gọi RPC
+- gas: estimate_gas lần đầu cho mỗi selector, nhớ baseline (max đã thấy) rồi dùng
+  baseline * GAS_MARGIN cho các lần sau; estimate lại khi calldata dài hơn baseline
+  hoặc sau GAS_ESTIMATE_REFRESH lần dùng
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from web3 import Web3
+
+GWEI = 10 ** 9
+
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "10"))
+FEE_REWARD_PERCENTILE = float(os.getenv("FEE_REWARD_PERCENTILE", "50"))
+# maxFeePerGas = base fee block kế tiếp * FEE_BASE_MULTIPLIER + priority (chịu được base fee tăng vài block)
+FEE_BASE_MULTIPLIER = float(os.getenv("FEE_BASE_MULTIPLIER", "2"))
+FEE_MIN_PRIORITY_GWEI = float(os.getenv("FEE_MIN_PRIORITY_GWEI", "0.01"))
+FEE_MAX_PRIORITY_GWEI = float(os.getenv("FEE_MAX_PRIORITY_GWEI", "10"))
+FEE_MAX_GWEI = float(os.getenv("FEE_MAX_GWEI", "300"))
+# Thời gian tối đa giữ fee khi chưa biết có block mới (~ block time)
+FEE_CACHE_TTL = float(os.getenv("FEE_CACHE_TTL", "12"))
+# Fee cũ dùng khi node không hỗ trợ eth_feeHistory
+FALLBACK_MAX_FEE_GWEI = 30
+FALLBACK_PRIORITY_FEE_GWEI = 1
+
+GAS_MARGIN = float(os.getenv("GAS_MARGIN", "1.2"))
+GAS_ESTIMATE_REFRESH = int(os.getenv("GAS_ESTIMATE_REFRESH", "50"))
+
+
+def fees_from_history(history) -> dict:
+    """
+    Tính fee EIP-1559 từ kết quả eth_feeHistory(FEE_HISTORY_BLOCKS, "latest", [percentile]).
+
+    Returns:
+        dict block_number, base_fee_per_gas (block kế tiếp), max_priority_fee_per_gas, max_fee_per_gas
+    """
+    base_fees = history["baseFeePerGas"]
+    next_base = int(base_fees[-1])
+    rewards = sorted(int(r[0]) for r in (history.get("reward") or []) if r and int(r[0]) > 0)
+    priority = rewards[len(rewards) // 2] if rewards else int(FEE_MIN_PRIORITY_GWEI * GWEI)
+    priority = max(int(FEE_MIN_PRIORITY_GWEI * GWEI), min(priority, int(FEE_MAX_PRIORITY_GWEI * GWEI)))
+    max_fee = min(int(next_base * FEE_BASE_MULTIPLIER) + priority, int(FEE_MAX_GWEI * GWEI))
+    oldest = int(history["oldestBlock"])
+    return {
+        "block_number": oldest + len(base_fees) - 2,
+        "base_fee_per_gas": next_base,
+        "max_priority_fee_per_gas": priority,
+        "max_fee_per_gas": max(max_fee, priority),
+        "source": "fee_history",
+    }
+
+
+def fallback_fees() -> dict:
+    return {
+        "block_number": None,
+        "base_fee_per_gas": None,
+        "max_priority_fee_per_gas": FALLBACK_PRIORITY_FEE_GWEI * GWEI,
+        "max_fee_per_gas": FALLBACK_MAX_FEE_GWEI * GWEI,
+        "source": "fallback",
+    }
+
+
+class FeeOracle:
+    """Cache fee theo block; các coroutine gọi đồng thời dùng chung 1 request eth_feeHistory."""
+
+    def __init__(self, ttl: float = FEE_CACHE_TTL):
+        self.ttl = ttl
+        self._fees = None
+        self._fetched_at = 0.0
+        self._latest_seen = None
+        self._inflight = None
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def observe_block(self, block_number: int):
+        """Báo có block mới (từ indexer/receipt...) -> fee cũ hết hạn ngay."""
+        with self._lock:
+            if self._latest_seen is None or block_number > self._latest_seen:
+                self._latest_seen = block_number
+
+    def _cached(self):
+        with self._lock:
+            fees = self._fees
+            if fees is None or time.monotonic() - self._fetched_at >= self.ttl:
+                return None
+            if (
+                fees["block_number"] is not None
+                and self._latest_seen is not None
+                and self._latest_seen > fees["block_number"]
+            ):
+                return None
+            return fees
+
+    def _store(self, fees: dict):
+        with self._lock:
+            self._fees = fees
+            self._fetched_at = time.monotonic()
+            self.fetches += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._fees = None
+
+    def get_fees(self, w3) -> dict:
+        """Bản sync (Web3)."""
+        fees = self._cached()
+        if fees is None:
+            try:
+                history = w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_REWARD_PERCENTILE])
+                fees = fees_from_history(history)
+            except Exception as e:
+                print("WARN eth_feeHistory failed, using fallback fees:", e)
+                fees = fallback_fees()
+            self._store(fees)
+        return dict(fees)
+
+    async def async_get_fees(self, w3) -> dict:
+        """Bản async (AsyncWeb3); request đang bay được chia sẻ cho mọi caller."""
+        fees = self._cached()
+        if fees is not None:
+            return dict(fees)
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch(w3))
+        inflight = self._inflight
+        try:
+            return dict(await asyncio.shield(inflight))
+        finally:
+            if self._inflight is inflight and inflight.done():
+                self._inflight = None
+
+    async def _fetch(self, w3) -> dict:
+        try:
+            history = await w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_REWARD_PERCENTILE])
+            fees = fees_from_history(history)
+        except Exception as e:
+            print("WARN eth_feeHistory failed, using fallback fees:", e)
+            fees = fallback_fees()
+        self._store(fees)
+        return fees
+
+
+class GasEstimator:
+    """Baseline gas theo (contract, selector), dùng lại thay vì estimate_gas mỗi tx."""
+
+    def __init__(self, margin: float = GAS_MARGIN, refresh: int = GAS_ESTIMATE_REFRESH):
+        self.margin = margin
+        self.refresh = refresh
+        self._baselines = {}  # key -> [gas, calldata_len, uses]
+        self._lock = threading.Lock()
+        self.estimates = 0
+        self.memo_hits = 0
+
+    @staticmethod
+    def _key(tx_func):
+        data = tx_func._encode_transaction_data()
+        return (tx_func.address, data[:10]), len(data)
+
+    def _memo(self, key, calldata_len):
+        with self._lock:
+            entry = self._baselines.get(key)
+            if entry is None or calldata_len > entry[1] or entry[2] >= self.refresh:
+                return None
+            entry[2] += 1
+            self.memo_hits += 1
+            return int(entry[0] * self.margin)
+
+    def _remember(self, key, calldata_len, estimate):
+        with self._lock:
+            entry = self._baselines.get(key)
+            if entry is None or entry[2] >= self.refresh:
+                self._baselines[key] = [estimate, calldata_len, 0]
+            else:
+                entry[0] = max(entry[0], estimate)
+                entry[1] = max(entry[1], calldata_len)
+            self.estimates += 1
+        return int(estimate * self.margin)
+
+    def estimate(self, tx_func, sender: str) -> int:
+        key, calldata_len = self._key(tx_func)
+        gas = self._memo(key, calldata_len)
+        if gas is None:
+            gas = self._remember(key, calldata_len, tx_func.estimate_gas({"from": sender}))
+        return gas
+
+    async def async_estimate(self, tx_func, sender: str) -> int:
+        key, calldata_len = self._key(tx_func)
+        gas = self._memo(key, calldata_len)
+        if gas is None:
+            gas = self._remember(key, calldata_len, await tx_func.estimate_gas({"from": sender}))
+        return gas
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "selectors": {
+                    f"{addr}:{selector}": {"baseline": gas, "uses": uses}
+                    for (addr, selector), (gas, _, uses) in self._baselines.items()
+                },
+                "estimates": self.estimates,
+                "memo_hits": self.memo_hits,
+            }
+
+
+fee_oracle = FeeOracle()
+gas_estimator = GasEstimator()
+
+
+def describe_fees(fees: dict, gas: int) -> dict:
+    """Field fee trả về trong response (gwei cho dễ đọc)."""
+    base = fees.get("base_fee_per_gas")
+    return {
+        "gas_limit": gas,
+        "max_fee_per_gas_gwei": float(Web3.from_wei(fees["max_fee_per_gas"], "gwei")),
+        "max_priority_fee_per_gas_gwei": float(Web3.from_wei(fees["max_priority_fee_per_gas"], "gwei")),
+        "base_fee_per_gas_gwei": float(Web3.from_wei(base, "gwei")) if base is not None else None,
+        "fee_block": fees.get("block_number"),
+        "fee_source": fees.get("source"),
+    }
@@ -0,0 +1,139 @@
+"""
+Gộp request ghi trùng (single-flight) + Idempotency-Key cho các endpoint ghi.
+
+- Request cùng key đang chạy: request sau chờ kết quả của request đầu, không gửi tx thứ 2
+- Idempotency-Key: kết quả (thành công hoặc lỗi 4xx) được giữ IDEMPOTENCY_TTL giây để trả lại
+  cho request lặp lại; lỗi 5xx / lỗi RPC không được giữ -> client retry sẽ chạy lại
+- Cùng key nhưng tham số khác -> IdempotencyConflict
+- Lưu trong bộ nhớ của process (giống tx_tracker); nhiều worker thì mỗi worker 1 bảng riêng
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Thời gian giữ kết quả của request có Idempotency-Key (giây) và số kết quả tối đa
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+IDEMPOTENCY_MAX = int(os.getenv("IDEMPOTENCY_MAX", "10000"))
+
+# Header đánh dấu response dùng lại kết quả của request khác
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyConflict(RuntimeError):
+    """Key đang/đã được dùng cho request có tham số khác."""
+
+
+def fingerprint(params: dict) -> str:
+    """Digest của tham số request (không giữ giá trị gốc, ví dụ private key)."""
+    raw = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires")
+
+    def __init__(self, fingerprint: str, future):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires = None  # None = đang chạy
+
+
+class SingleFlight:
+    """
+    Bảng key -> request đang chạy / kết quả đã lưu.
+
+    Args:
+        maxsize: số kết quả đã lưu tối đa (request đang chạy không bị xoá)
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.executed = 0
+        self.shared = 0
+        self.conflicts = 0
+
+    async def run(self, key: str, fp: str, fn, ttl: float = 0):
+        """
+        Chạy fn() 1 lần cho mỗi key.
+
+        Args:
+            key: khoá gộp (endpoint + asset hash, hoặc endpoint + Idempotency-Key)
+            fp: fingerprint() của tham số request
+            fn: coroutine function không tham số
+            ttl: giữ kết quả bao lâu sau khi xong (0 = chỉ gộp lúc đang chạy)
+
+        Returns:
+            (kết quả, shared) - shared=True nếu dùng lại kết quả của request khác
+
+        Raises:
+            IdempotencyConflict nếu key đang/đã dùng với fingerprint khác; lỗi của fn được raise lại
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires is not None and entry.expires <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            if entry.fingerprint != fp:
+                self.conflicts += 1
+                raise IdempotencyConflict(key)
+            self.shared += 1
+            return await asyncio.shield(entry.future), True
+
+        entry = self._entries[key] = _Entry(fp, asyncio.get_running_loop().create_future())
+        self.executed += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            # request đầu bị huỷ: request đang chờ nhận lỗi thay vì bị huỷ theo
+            error = e if isinstance(e, Exception) else RuntimeError("Original request was cancelled")
+            entry.future.set_exception(error)
+            entry.future.exception()  # không có request chờ thì không cảnh báo "never retrieved"
+            # chỉ giữ lỗi phía client (4xx); lỗi khác để lần retry chạy lại
+            if ttl > 0 and getattr(e, "status_code", 500) < 500:
+                self._finish(key, entry, ttl)
+            else:
+                self._drop(key, entry)
+            raise
+        entry.future.set_result(result)
+        if ttl > 0:
+            self._finish(key, entry, ttl)
+        else:
+            self._drop(key, entry)
+        return result, False
+
+    def _drop(self, key: str, entry: _Entry):
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+
+    def _finish(self, key: str, entry: _Entry, ttl: float):
+        entry.expires = time.monotonic() + ttl
+        self._entries.move_to_end(key)
+        if len(self._entries) <= self.maxsize:
+            return
+        now = time.monotonic()
+        for old in [k for k, e in self._entries.items() if e.expires is not None and e.expires <= now]:
+            del self._entries[old]
+        # vẫn quá nhiều -> bỏ kết quả cũ nhất (không đụng request đang chạy)
+        for old in [k for k, e in self._entries.items() if e.expires is not None]:
+            if len(self._entries) <= self.maxsize:
+                break
+            del self._entries[old]
+
+    def stats(self) -> dict:
+        inflight = sum(1 for e in self._entries.values() if e.expires is None)
+        return {
+            "inflight": inflight,
+            "stored": len(self._entries) - inflight,
+            "executed": self.executed,
+            "shared": self.shared,
+            "conflicts": self.conflicts,
+            "ttl": IDEMPOTENCY_TTL,
+        }
+
+
+write_flights = SingleFlight()
@@ -0,0 +1,474 @@
+"""
+Event indexer cho AssetRegistry -> SQLite.
+
+Đọc AssetRegistered / AssetOwnerAssigned / AssetVerified / AssetTransferred bằng eth_getLogs:
+- backfill từ block deploy với range lớn (tự co/giãn khi provider giới hạn range/số log)
+- sau đó follow block mới, lưu asset + checkpoint block vào SQLite
+- reorg ngắn: so hash block đã lưu với chain, rollback event sau điểm rẽ nhánh rồi replay
+- owner lấy từ AssetOwnerAssigned (AssetRegistered.owner là ví đã gửi tx) -> chỉ index registry
+  có REGISTRY_VERSION >= MIN_REGISTRY_VERSION, registry deploy trước đó bị từ chối
+
+/asset/get?source=index đọc từ index này thay vì gọi getAsset trên chain.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+from pathlib import Path
+
+from web3 import Web3
+from web3.exceptions import ABIFunctionNotFound, BadFunctionCallOutput, ContractLogicError
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "false").lower() in ("true", "1", "yes")
+INDEX_DB_PATH = os.getenv("INDEX_DB_PATH", str(Path(__file__).resolve().parent / "asset_index.db"))
+# Range eth_getLogs ban đầu / nhỏ nhất / lớn nhất (số block)
+INDEX_CHUNK_BLOCKS = int(os.getenv("INDEX_CHUNK_BLOCKS", "5000"))
+INDEX_MIN_CHUNK_BLOCKS = int(os.getenv("INDEX_MIN_CHUNK_BLOCKS", "10"))
+INDEX_MAX_CHUNK_BLOCKS = int(os.getenv("INDEX_MAX_CHUNK_BLOCKS", "100000"))
+# Chu kỳ poll block mới (giây) và số block hash giữ lại để phát hiện reorg
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "4"))
+INDEX_REORG_DEPTH = int(os.getenv("INDEX_REORG_DEPTH", "64"))
+# Backoff khi eth_getLogs / RPC lỗi (timeout, rate limit, lỗi mạng): thử lại cùng range, không co range
+INDEX_RETRY_BASE_DELAY = float(os.getenv("INDEX_RETRY_BASE_DELAY", "1"))
+INDEX_RETRY_MAX_DELAY = float(os.getenv("INDEX_RETRY_MAX_DELAY", "60"))
+
+EVENT_NAMES = ("AssetRegistered", "AssetOwnerAssigned", "AssetVerified", "AssetTransferred")
+# Registry đầu tiên phát AssetOwnerAssigned (xem AssetRegistry.REGISTRY_VERSION)
+MIN_REGISTRY_VERSION = 2
+
+# Thông báo lỗi khi provider từ chối range/số log quá lớn. Chỉ các câu cụ thể của provider:
+# "exceeded" / "timeout" chung chung cũng xuất hiện ở lỗi rate limit / mạng, không phải do range
+RANGE_ERROR_MARKERS = (
+    "block range",                  # "block range is too large/wide", "exceed maximum block range"
+    "range is too large",
+    "query returned more than",     # infura: "query returned more than 10000 results"
+    "log response size exceeded",   # alchemy
+    "eth_getlogs is limited to",    # quicknode: "eth_getLogs is limited to a 10000 range"
+)
+
+
+def get_deploy_block() -> int:
+    """Block deploy của registry: REGISTRY_DEPLOY_BLOCK hoặc deploy-addresses.json, mặc định 0."""
+    env = os.getenv("REGISTRY_DEPLOY_BLOCK")
+    if env:
+        return int(env)
+    try:
+        with open(BASE_DIR / "deploy-addresses.json", "r", encoding="utf-8") as f:
+            return int(json.load(f).get("registryBlock") or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+async def check_registry_version(registry) -> int:
+    """
+    REGISTRY_VERSION của registry.
+
+    Raises:
+        RuntimeError nếu registry cũ hơn MIN_REGISTRY_VERSION: AssetRegistered của registry cũ
+        mang ví đã gửi tx chứ không phải owner, index sẽ sai owner
+    """
+    try:
+        version = await registry.functions.REGISTRY_VERSION().call()
+    except ABIFunctionNotFound as e:
+        raise RuntimeError("Registry ABI has no REGISTRY_VERSION: recompile the contracts") from e
+    except (BadFunctionCallOutput, ContractLogicError) as e:
+        raise RuntimeError(
+            "Registry was deployed before REGISTRY_VERSION (no AssetOwnerAssigned event): "
+            "redeploy it to use the indexer"
+        ) from e
+    if version < MIN_REGISTRY_VERSION:
+        raise RuntimeError(f"Registry version {version} < {MIN_REGISTRY_VERSION}: redeploy it to use the indexer")
+    return version
+
+
+def is_range_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return any(m in msg for m in RANGE_ERROR_MARKERS)
+
+
+def is_timeout_error(exc: Exception) -> bool:
+    """Timeout phía client (aiohttp/asyncio) hoặc node báo timeout -> thử lại sau backoff."""
+    msg = str(exc).lower()
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "timeout" in msg or "timed out" in msg
+
+
+def retry_delay(failures: int) -> float:
+    """Exponential backoff full jitter (giống Pinata client) cho lần lỗi liên tiếp thứ failures."""
+    return random.uniform(0, min(INDEX_RETRY_MAX_DELAY, INDEX_RETRY_BASE_DELAY * (2 ** failures)))
+
+
+def _jsonable(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    return value
+
+
+class IndexStore:
+    """SQLite store: bảng assets (trạng thái hiện tại), events (log đã decode), blocks (hash để phát hiện reorg)."""
+
+    def __init__(self, path: str = INDEX_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS assets (
+                asset_hash TEXT PRIMARY KEY,
+                ipfs_cid TEXT,
+                owner TEXT,
+                verified INTEGER NOT NULL DEFAULT 0,
+                token_id INTEGER,
+                updated_block INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                block_hash TEXT,
+                tx_hash TEXT,
+                name TEXT NOT NULL,
+                asset_hash TEXT NOT NULL,
+                args TEXT NOT NULL,
+                PRIMARY KEY (block_number, log_index)
+            );
+            CREATE INDEX IF NOT EXISTS events_asset ON events (asset_hash, block_number, log_index);
+            CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY CHECK (id = 1), block_number INTEGER);
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- checkpoint / block hash ---------------------------------------------
+
+    def get_checkpoint(self):
+        with self._lock:
+            row = self._conn.execute("SELECT block_number FROM checkpoint WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def recent_blocks(self):
+        """[(number, hash)] mới nhất trước."""
+        with self._lock:
+            return self._conn.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+
+    # --- ghi ----------------------------------------------------------------
+
+    def apply(self, events: list, to_block: int, to_block_hash: str = None):
+        """
+        Ghi 1 range đã index trong 1 transaction SQLite: event, asset, checkpoint, block hash.
+
+        events: list dict {"name", "args", "block_number", "log_index", "block_hash", "tx_hash"};
+        mỗi event được gắn thêm "owner" = owner của asset sau range này (listener không phải đọc lại DB)
+        """
+        with self._lock, self._conn:
+            for ev in events:
+                asset_hash = _jsonable(ev["args"]["assetHash"])
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        ev["block_number"], ev["log_index"], ev.get("block_hash"), ev.get("tx_hash"),
+                        ev["name"], asset_hash,
+                        json.dumps({k: _jsonable(v) for k, v in ev["args"].items()}),
+                    ),
+                )
+                if cur.rowcount:
+                    self._apply_event(ev["name"], asset_hash, ev["args"], ev["block_number"])
+            owners = self._owners({_jsonable(ev["args"]["assetHash"]) for ev in events})
+            for ev in events:
+                ev["owner"] = owners.get(_jsonable(ev["args"]["assetHash"]))
+
+            self._conn.execute(
+                "INSERT INTO checkpoint (id, block_number) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET block_number = excluded.block_number",
+                (to_block,),
+            )
+            if to_block_hash:
+                self._conn.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?)", (to_block, to_block_hash))
+                self._conn.execute(
+                    "DELETE FROM blocks WHERE number NOT IN "
+                    "(SELECT number FROM blocks ORDER BY number DESC LIMIT ?)",
+                    (INDEX_REORG_DEPTH,),
+                )
+
+    def _apply_event(self, name: str, asset_hash: str, args: dict, block_number: int):
+        if name == "AssetRegistered":
+            # args["owner"] là ví đã gửi tx; owner thật tới ngay sau qua AssetOwnerAssigned
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assets VALUES (?, ?, NULL, 0, ?, ?)",
+                (asset_hash, args["cid"], int(args["tokenId"]), block_number),
+            )
+        elif name == "AssetOwnerAssigned":
+            self._conn.execute(
+                "UPDATE assets SET owner = ?, updated_block = ? WHERE asset_hash = ?",
+                (args["owner"], block_number, asset_hash),
+            )
+        elif name == "AssetVerified":
+            self._conn.execute(
+                "UPDATE assets SET verified = ?, updated_block = ? WHERE asset_hash = ?",
+                (1 if args["status"] else 0, block_number, asset_hash),
+            )
+        elif name == "AssetTransferred":
+            self._conn.execute(
+                "UPDATE assets SET owner = ?, updated_block = ? WHERE asset_hash = ?",
+                (args["to"], block_number, asset_hash),
+            )
+
+    def _owners(self, asset_hashes) -> dict:
+        """{asset_hash: owner} của các asset (gọi trong lock)."""
+        keys = list(asset_hashes)
+        owners = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            owners.update(self._conn.execute(
+                f"SELECT asset_hash, owner FROM assets WHERE asset_hash IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return owners
+
+    def rollback(self, fork_block: int) -> dict:
+        """
+        Xoá mọi event sau fork_block (reorg) rồi dựng lại các asset bị ảnh hưởng
+        bằng cách replay event còn lại của chúng.
+
+        Returns:
+            {asset_hash: owner sau rollback (None nếu asset không còn)} của các asset bị ảnh hưởng
+        """
+        with self._lock, self._conn:
+            affected = [
+                r[0] for r in self._conn.execute(
+                    "SELECT DISTINCT asset_hash FROM events WHERE block_number > ?", (fork_block,)
+                )
+            ]
+            self._conn.execute("DELETE FROM events WHERE block_number > ?", (fork_block,))
+            self._conn.execute("DELETE FROM blocks WHERE number > ?", (fork_block,))
+            self._conn.execute("UPDATE checkpoint SET block_number = ? WHERE id = 1", (fork_block,))
+            for asset_hash in affected:
+                self._conn.execute("DELETE FROM assets WHERE asset_hash = ?", (asset_hash,))
+                rows = self._conn.execute(
+                    "SELECT name, args, block_number FROM events WHERE asset_hash = ? "
+                    "ORDER BY block_number, log_index",
+                    (asset_hash,),
+                ).fetchall()
+                for name, args, block_number in rows:
+                    self._apply_event(name, asset_hash, json.loads(args), block_number)
+            owners = self._owners(affected)
+        return {asset_hash: owners.get(asset_hash) for asset_hash in affected}
+
+    # --- đọc ----------------------------------------------------------------
+
+    def get_asset(self, asset_hash) -> dict:
+        key = _jsonable(asset_hash)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ipfs_cid, owner, verified, token_id, updated_block FROM assets WHERE asset_hash = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "ipfsCid": row[0],
+            "owner": row[1],
+            "verified": bool(row[2]),
+            "tokenId": row[3],
+            "updated_block": row[4],
+        }
+
+    def events_since(self, from_block: int, limit: int = 1000, after_log_index: int = -1) -> list:
+        """
+        Event đã index từ from_block (dùng để replay cho subscriber).
+
+        after_log_index: bỏ qua event của from_block có log_index <= giá trị này
+        (phân trang theo cursor (block, logIndex) mà không trùng event)
+        Mỗi dòng kèm "owner" hiện tại của asset (giống payload của listener).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.block_number, e.log_index, e.tx_hash, e.name, e.args, a.owner FROM events e "
+                "LEFT JOIN assets a ON a.asset_hash = e.asset_hash "
+                "WHERE e.block_number > ? OR (e.block_number = ? AND e.log_index > ?) "
+                "ORDER BY e.block_number, e.log_index LIMIT ?",
+                (from_block, from_block, after_log_index, limit),
+            ).fetchall()
+        return [
+            {
+                "block_number": r[0], "log_index": r[1], "tx_hash": r[2], "name": r[3], "args": json.loads(r[4]),
+                "owner": r[5],
+            }
+            for r in rows
+        ]
+
+
+class AssetIndexer:
+    """Chạy nền trong event loop của server: backfill rồi follow block mới."""
+
+    def __init__(self, store: IndexStore, start_block: int = None):
+        self.store = store
+        self.start_block = get_deploy_block() if start_block is None else start_block
+        self.chunk = INDEX_CHUNK_BLOCKS
+        self.chunk_ceiling = INDEX_MAX_CHUNK_BLOCKS  # giảm xuống khi provider từ chối range
+        self.head = None
+        # block đã index, giữ trong bộ nhớ: /index/status, /asset/get đọc không cần khoá SQLite
+        # (khoá bị giữ suốt transaction apply của 1 range backfill lớn)
+        self.checkpoint = None
+        self.listeners = []  # callback(event_dict) cho mỗi event mới (cache, event stream...)
+        self._task = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def start(self, w3, registry):
+        self._task = asyncio.create_task(self.run(w3, registry))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self, w3, registry):
+        failures = 0
+        while True:
+            try:
+                caught_up = await self.sync_once(w3, registry)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # timeout / rate limit / lỗi mạng: thử lại cùng range sau backoff
+                delay = retry_delay(failures)
+                failures += 1
+                kind = "timeout" if is_timeout_error(e) else "error"
+                print(f"WARN indexer {kind} (retry {failures} in {delay:.1f}s):", e)
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+            if caught_up:
+                await asyncio.sleep(INDEX_POLL_INTERVAL)
+
+    async def sync_once(self, w3, registry) -> bool:
+        """
+        Index 1 range block tiếp theo. Trả True khi đã bắt kịp head
+        (caller nên chờ INDEX_POLL_INTERVAL trước lần gọi sau).
+        """
+        await self._check_reorg(w3)
+
+        checkpoint = self.checkpoint = await asyncio.to_thread(self.store.get_checkpoint)
+        from_block = self.start_block if checkpoint is None else checkpoint + 1
+        self.head = await w3.eth.block_number
+        if from_block > self.head:
+            return True
+
+        to_block = min(from_block + self.chunk - 1, self.head)
+        try:
+            logs = await w3.eth.get_logs({
+                "address": registry.address,
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "topics": [[self._topic(registry, n) for n in EVENT_NAMES]],
+            })
+        except Exception as e:
+            if is_range_error(e) and self.chunk > INDEX_MIN_CHUNK_BLOCKS:
+                self.chunk_ceiling = self.chunk - 1
+                self.chunk = max(INDEX_MIN_CHUNK_BLOCKS, self.chunk // 2)
+                return False
+            raise
+
+        events = self._decode(registry, logs)
+        # chỉ cần hash block khi gần head (vùng có thể reorg)
+        to_hash = None
+        if self.head - to_block < INDEX_REORG_DEPTH:
+            to_hash = _jsonable((await w3.eth.get_block(to_block))["hash"])
+        # transaction SQLite chạy trong thread: range lớn khi backfill không chặn event loop
+        await asyncio.to_thread(self.store.apply, events, to_block, to_hash)
+        self.checkpoint = to_block
+
+        if to_block - from_block + 1 == self.chunk:
+            self.chunk = min(self.chunk_ceiling, int(self.chunk * 1.5))
+        for ev in events:
+            self._notify(ev)
+        return to_block >= self.head
+
+    async def _check_reorg(self, w3):
+        recent = await asyncio.to_thread(self.store.recent_blocks)
+        if not recent:
+            return
+        number, stored_hash = recent[0]
+        if _jsonable((await w3.eth.get_block(number))["hash"]) == stored_hash:
+            return
+
+        # tìm block đã lưu mới nhất còn khớp chain -> điểm rẽ nhánh
+        fork = None
+        for number, stored_hash in recent[1:]:
+            if _jsonable((await w3.eth.get_block(number))["hash"]) == stored_hash:
+                fork = number
+                break
+        if fork is None:
+            fork = recent[-1][0] - 1
+        affected = await asyncio.to_thread(self.store.rollback, fork)
+        self.checkpoint = fork
+        print(f"WARN indexer: reorg detected, rolled back to block {fork}")
+        for asset_hash, owner in affected.items():
+            self._notify({"name": "Reorg", "args": {"assetHash": asset_hash}, "block_number": fork, "owner": owner})
+
+    def _notify(self, ev: dict):
+        for callback in self.listeners:
+            try:
+                callback(ev)
+            except Exception as e:
+                print("WARN indexer listener:", e)
+
+    @staticmethod
+    def _topic(registry, name: str) -> str:
+        event_abi = next(e for e in registry.abi if e.get("type") == "event" and e.get("name") == name)
+        types = ",".join(i["type"] for i in event_abi["inputs"])
+        return _jsonable(Web3.keccak(text=f"{name}({types})"))
+
+    def _decode(self, registry, logs) -> list:
+        topics = {self._topic(registry, n): n for n in EVENT_NAMES}
+        events = []
+        for log in logs:
+            name = topics.get(_jsonable(log["topics"][0]).lower())
+            if name is None:
+                continue
+            decoded = registry.events[name]().process_log(log)
+            events.append({
+                "name": name,
+                "args": dict(decoded["args"]),
+                "block_number": decoded["blockNumber"],
+                "log_index": decoded["logIndex"],
+                "block_hash": _jsonable(decoded["blockHash"]),
+                "tx_hash": _jsonable(decoded["transactionHash"]),
+            })
+        return events
+
+
+_indexer = None
+
+
+def get_indexer():
+    """Indexer đang chạy (None nếu INDEXER_ENABLED=false hoặc chưa start)."""
+    return _indexer
+
+
+async def start_indexer(w3, registry):
+    global _indexer
+    if _indexer is None:
+        await check_registry_version(registry)
+        _indexer = AssetIndexer(IndexStore())
+        _indexer.start(w3, registry)
+    return _indexer
+
+
+async def stop_indexer():
+    global _indexer
+    if _indexer is not None:
+        await _indexer.stop()
+        _indexer.store.close()
+        _indexer = None
@@ -1,31 +1,344 @@
+import asyncio
+import email.utils
 import os
-import requests
-from dotenv import load_dotenv
+import random
+import threading
+import time
+import uuid
 
-load_dotenv()
+import httpx
+from cid import CidBuilder
+from cid_index import get_cid_index
+from config import load_env
+from metrics import PINATA_RETRIES, PINATA_UPLOAD_BYTES, PINATA_UPLOAD_SECONDS
+
+load_env()
 
 PINATA_API_KEY = os.getenv("PINATA_API_KEY")
 PINATA_SECRET_API_KEY = os.getenv("PINATA_SECRET_API_KEY")
+# Ghi đè base URL của Pinata (ví dụ fake server khi test)
+PINATA_API_URL = os.getenv("PINATA_API_URL", "https://api.pinata.cloud").rstrip("/")
+PINATA_UPLOAD_URL = f"{PINATA_API_URL}/pinning/pinFileToIPFS"
 
-if not PINATA_API_KEY or not PINATA_SECRET_API_KEY:
-    raise RuntimeError("Pinata API keys are not set")
+# Client async: số upload đồng thời tối đa, số lần retry (429/5xx/lỗi mạng), backoff (giây)
+PINATA_MAX_CONCURRENCY = int(os.getenv("PINATA_MAX_CONCURRENCY", "4"))
+PINATA_MAX_RETRIES = int(os.getenv("PINATA_MAX_RETRIES", "4"))
+PINATA_BACKOFF_BASE = float(os.getenv("PINATA_BACKOFF_BASE", "0.5"))
+PINATA_BACKOFF_MAX = float(os.getenv("PINATA_BACKOFF_MAX", "30"))
+# Timeout kết nối và timeout đọc/ghi mỗi lần gọi (giây)
+PINATA_CONNECT_TIMEOUT = float(os.getenv("PINATA_CONNECT_TIMEOUT", "10"))
+PINATA_TIMEOUT = float(os.getenv("PINATA_TIMEOUT", "120"))
+PINATA_POOL_SIZE = int(os.getenv("PINATA_POOL_SIZE", "10"))
 
-def upload_bytes(filename: str, content: bytes) -> str:
-    url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Node IPFS local (kubo HTTP API, ví dụ http://127.0.0.1:5001) dùng thay Pinata khi dev/test
+IPFS_API_URL = os.getenv("IPFS_API_URL")
+
+# Giới hạn kích thước file upload (mặc định 5 GiB) và kích thước mỗi chunk đọc từ file
+IPFS_MAX_UPLOAD_BYTES = int(os.getenv("IPFS_MAX_UPLOAD_BYTES", str(5 * 1024 ** 3)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """File vượt quá IPFS_MAX_UPLOAD_BYTES."""
+
+
+class UploadNotConfigured(RuntimeError):
+    """Chưa cấu hình IPFS_API_URL hay Pinata API keys (kiểm tra lúc upload, không phải lúc import)."""
+
+
+_stats = {
+    "uploads": 0,
+    "failures": 0,
+    "rejected_too_large": 0,
+    "deduplicated": 0,
+    "bytes": 0,
+    "seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def upload_stats() -> dict:
+    """Số upload (và số lần bỏ qua do trùng nội dung), tổng bytes, throughput trung bình (bytes/s)."""
+    with _stats_lock:
+        out = dict(_stats)
+    out["throughput_bytes_per_sec"] = (out["bytes"] / out["seconds"]) if out["seconds"] else None
+    return out
+
+
+def _record(outcome: str, nbytes: int = 0, seconds: float = 0.0):
+    with _stats_lock:
+        _stats[outcome] += 1
+        _stats["bytes"] += nbytes
+        _stats["seconds"] += seconds
 
-    files = {
-        "file": (filename, content)
-    }
 
+def _target():
+    """(url, headers, field chứa CID trong response) cho Pinata hoặc node IPFS local."""
+    if IPFS_API_URL:
+        return f"{IPFS_API_URL.rstrip('/')}/api/v0/add?pin=true", {}, "Hash"
+    if not PINATA_API_KEY or not PINATA_SECRET_API_KEY:
+        raise UploadNotConfigured("Pinata API keys are not set")
     headers = {
         "pinata_api_key": PINATA_API_KEY,
         "pinata_secret_api_key": PINATA_SECRET_API_KEY,
     }
+    return PINATA_UPLOAD_URL, headers, "IpfsHash"
+
+
+class _MultipartStream:
+    """
+    Body multipart/form-data sinh dần từ file object (đọc từng chunk, không giữ cả file).
+    Có __len__ khi biết size để gửi Content-Length thay vì chunked encoding.
+    """
+
+    def __init__(self, filename: str, fileobj, size: int = None, max_bytes: int = None):
+        self.boundary = uuid.uuid4().hex
+        safe_name = (filename or "file").replace('"', "'").replace("\r", "").replace("\n", "")
+        self.head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self.fileobj = fileobj
+        self.size = size
+        self.max_bytes = IPFS_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        self.sent = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+    async def aiter(self):
+        """Sinh body, đọc file trong thread (không block event loop)."""
+        yield self.head
+        while True:
+            chunk = await asyncio.to_thread(self.fileobj.read, UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.sent += len(chunk)
+            if self.sent > self.max_bytes:
+                raise UploadTooLarge(f"File exceeds {self.max_bytes} bytes")
+            yield chunk
+        yield self.tail
+
+
+def _local_cid(fileobj, max_bytes: int):
+    """
+    Tính CIDv0 của fileobj rồi seek về vị trí ban đầu (file phải seekable).
+
+    Returns:
+        (cid, size)
+    """
+    start = fileobj.tell()
+    builder = CidBuilder(0)
+    while True:
+        chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        builder.update(chunk)
+        if builder.size > max_bytes:
+            fileobj.seek(start)
+            raise UploadTooLarge(f"File exceeds {max_bytes} bytes")
+    fileobj.seek(start)
+    return builder.cid(), builder.size
+
+
+def _remember(index, local_cid: str, cid: str, size: int, filename: str):
+    if cid != local_cid:
+        # chunker/cidVersion của Pinata khác mặc định -> vẫn lưu mapping để dedup lần sau
+        print(f"WARN local CID {local_cid} != pinned CID {cid}")
+    index.add(local_cid, cid, size, filename)
+
+
+# --- client async (httpx) ------------------------------------------------------
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def retry_after_seconds(headers, now: float = None):
+    """
+    Thời gian chờ server yêu cầu: Retry-After (giây hoặc HTTP date) hoặc
+    RateLimit-Reset / X-RateLimit-Reset (giây còn lại hoặc epoch). None nếu không có.
+    """
+    value = headers.get("retry-after")
+    now = time.time() if now is None else now
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            return None
+    value = headers.get("ratelimit-reset") or headers.get("x-ratelimit-reset")
+    if value:
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        # giá trị lớn là epoch, nhỏ là số giây còn lại
+        return max(0.0, reset - now) if reset > 1e9 else reset
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Exponential backoff full jitter; server có Retry-After thì chờ ít nhất chừng đó."""
+    delay = random.uniform(0, min(PINATA_BACKOFF_MAX, PINATA_BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, PINATA_BACKOFF_MAX))
+    return delay
+
+
+class PinataClient:
+    """
+    Client pin file async: 1 httpx.AsyncClient keep-alive dùng chung (HTTP/2 nếu có gói h2),
+    semaphore giới hạn số upload đồng thời, retry 429/5xx/lỗi mạng với backoff có jitter.
+    """
+
+    def __init__(self, max_concurrency: int = None, max_retries: int = None):
+        self.max_retries = PINATA_MAX_RETRIES if max_retries is None else max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency or PINATA_MAX_CONCURRENCY)
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(PINATA_TIMEOUT, connect=PINATA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=PINATA_POOL_SIZE, max_keepalive_connections=PINATA_POOL_SIZE
+            ),
+        )
+        self.retries = 0
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def pin_file(self, filename: str, fileobj, size: int = None, max_bytes: int = None) -> str:
+        """
+        Upload (stream) fileobj lên Pinata / IPFS_API_URL, retry khi cần.
+
+        Retry cần đọc lại file từ đầu nên chỉ retry khi fileobj seekable.
+
+        Returns:
+            CID do Pinata/IPFS trả về
+
+        Raises:
+            UploadTooLarge nếu file vượt giới hạn
+            UploadNotConfigured nếu chưa cấu hình Pinata/IPFS_API_URL
+            RuntimeError nếu Pinata trả lỗi (hoặc hết lượt retry)
+        """
+        url, headers, cid_field = _target()
+        start = fileobj.tell() if fileobj.seekable() else None
+        attempt = 0
+        while True:
+            if attempt and start is not None:
+                fileobj.seek(start)
+            body = _MultipartStream(filename, fileobj, size, max_bytes)
+            req_headers = dict(headers, **{"Content-Type": body.content_type})
+            if size is not None:
+                req_headers["Content-Length"] = str(len(body))
+
+            started = time.monotonic()
+            try:
+                async with self._semaphore:
+                    started = time.monotonic()
+                    res = await self._client.post(url, content=body.aiter(), headers=req_headers)
+            except UploadTooLarge:
+                _record("rejected_too_large")
+                raise
+            except httpx.TransportError as e:
+                res, error = None, e
+                PINATA_UPLOAD_SECONDS.labels("network_error").observe(time.monotonic() - started)
+            else:
+                error = None
+                elapsed = time.monotonic() - started
+                if res.status_code == 200:
+                    PINATA_UPLOAD_SECONDS.labels("ok").observe(elapsed)
+                    PINATA_UPLOAD_BYTES.inc(body.sent)
+                    _record("uploads", body.sent, elapsed)
+                    return res.json()[cid_field]
+                PINATA_UPLOAD_SECONDS.labels(f"http_{res.status_code}").observe(elapsed)
+
+            retryable = res is None or res.status_code in RETRY_STATUS
+            if not retryable or attempt >= self.max_retries or start is None:
+                _record("failures")
+                if res is None:
+                    raise RuntimeError(f"Pinata upload failed: {error!r}") from error
+                raise RuntimeError(f"Pinata upload failed: {res.status_code} {res.text}")
+
+            delay = backoff_delay(attempt, retry_after_seconds(res.headers) if res is not None else None)
+            attempt += 1
+            self.retries += 1
+            PINATA_RETRIES.inc()
+            await asyncio.sleep(delay)
+
+
+_client = None
+
+
+def get_pinata_client() -> PinataClient:
+    """PinataClient dùng chung cho process (tạo lazily trong event loop đang chạy)."""
+    global _client
+    if _client is None:
+        _client = PinataClient()
+    return _client
+
+
+async def close_pinata_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def async_upload(filename: str, fileobj, size: int = None, max_bytes: int = None) -> str:
+    """
+    Upload file lên Pinata (hoặc IPFS_API_URL), stream từng chunk từ fileobj.
+
+    Nếu fileobj seekable và IPFS_DEDUP bật: tính CID tại server trước (trong thread), nội dung
+    đã pin rồi (có trong cid_index) thì trả CID cũ, không upload lại; ngược lại pin qua PinataClient
+    (timeout, retry/backoff, giới hạn số upload đồng thời).
+
+    Args:
+        filename: tên file
+        fileobj: file object đọc được (ví dụ UploadFile.file)
+        size: kích thước file nếu biết (để gửi Content-Length)
+        max_bytes: giới hạn kích thước (mặc định IPFS_MAX_UPLOAD_BYTES)
+
+    Returns:
+        CID của file
 
-    res = requests.post(url, files=files, headers=headers)
+    Raises:
+        UploadTooLarge nếu file vượt giới hạn
+        UploadNotConfigured nếu chưa cấu hình Pinata/IPFS_API_URL
+        RuntimeError nếu Pinata/IPFS trả lỗi
+    """
+    max_bytes = IPFS_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if size is not None and size > max_bytes:
+        _record("rejected_too_large")
+        raise UploadTooLarge(f"File exceeds {max_bytes} bytes")
 
-    if res.status_code != 200:
-        raise RuntimeError(f"Pinata upload failed: {res.status_code} {res.text}")
+    index = get_cid_index()
+    local_cid = None
+    if index is not None and fileobj.seekable():
+        try:
+            local_cid, size = await asyncio.to_thread(_local_cid, fileobj, max_bytes)
+        except UploadTooLarge:
+            _record("rejected_too_large")
+            raise
+        cid = await asyncio.to_thread(index.lookup, local_cid)
+        if cid is not None:
+            _record("deduplicated")
+            return cid
 
-    ipfs_hash = res.json()["IpfsHash"]
-    return ipfs_hash
+    cid = await get_pinata_client().pin_file(filename, fileobj, size, max_bytes)
+    if local_cid is not None:
+        await asyncio.to_thread(_remember, index, local_cid, cid, size, filename)
+    return cid
@@ -0,0 +1,310 @@
+"""
+Proxy đọc nội dung IPFS (GET /ipfs/{cid}) có cache trên đĩa, thay cho link gateway public.
+
+- Cache theo CID trong IPFS_CACHE_DIR, tổng dung lượng <= IPFS_CACHE_MAX_BYTES, xoá file ít dùng
+  nhất trước (LRU). Nội dung theo CID không đổi nên không cần TTL / invalidate
+- Miss: tải từ IPFS_GATEWAY_URL (stream ra file tạm), nhiều request cùng CID đang miss dùng chung
+  1 lần tải; kiểm tra CID của nội dung tải về bằng cid.py trước khi đưa vào cache
+- File upload qua /ipfs/upload được đưa luôn vào cache (không phải tải lại lần đầu)
+- IPFS_PUBLIC_GATEWAY: base của link ipfsGateway trả cho client (đặt thành <api>/ipfs để dùng proxy này)
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
+
+from cid import CidBuilder
+from config import load_env
+from metrics import IPFS_GATEWAY_REQUESTS
+
+load_env()
+
+# Gateway upstream để tải nội dung khi cache miss
+IPFS_GATEWAY_URL = os.getenv("IPFS_GATEWAY_URL", "https://gateway.pinata.cloud").rstrip("/")
+# Base link ipfsGateway trong response của API
+IPFS_PUBLIC_GATEWAY = os.getenv("IPFS_PUBLIC_GATEWAY", "https://gateway.pinata.cloud/ipfs").rstrip("/")
+IPFS_CACHE_DIR = os.getenv("IPFS_CACHE_DIR", str(Path(__file__).resolve().parent / "ipfs_cache"))
+# Tổng dung lượng cache (mặc định 1 GiB) và kích thước tối đa 1 file tải từ upstream (mặc định 100 MB)
+IPFS_CACHE_MAX_BYTES = int(os.getenv("IPFS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+IPFS_FETCH_MAX_BYTES = int(os.getenv("IPFS_FETCH_MAX_BYTES", str(100 * 1024 * 1024)))
+IPFS_FETCH_TIMEOUT = float(os.getenv("IPFS_FETCH_TIMEOUT", "60"))
+# So CID của nội dung tải về với CID được yêu cầu (chỉ đúng với file add bằng chunker mặc định)
+IPFS_CACHE_VERIFY = os.getenv("IPFS_CACHE_VERIFY", "true").lower() in ("true", "1", "yes")
+
+# CIDv0 (Qm..., base58btc) hoặc CIDv1 base32 (b...); CID cũng là tên file trong cache
+_CID_RE = re.compile(r"^(Qm[1-9A-HJ-NP-Za-km-z]{44}|b[a-z2-7]{50,100})$")
+_TMP_PREFIX = ".tmp-"
+
+
+class CidNotFound(LookupError):
+    """Upstream không có nội dung cho CID."""
+
+
+class UpstreamError(RuntimeError):
+    """Tải từ gateway upstream thất bại (lỗi mạng, HTTP lỗi, quá lớn, sai CID)."""
+
+
+def is_valid_cid(cid: str) -> bool:
+    return bool(_CID_RE.match(cid or ""))
+
+
+def gateway_link(cid: str):
+    """Link ipfsGateway trả cho client (None nếu không có CID)."""
+    return f"{IPFS_PUBLIC_GATEWAY}/{cid}" if cid else None
+
+
+class DiskCidCache:
+    """
+    File cache theo CID, LRU theo dung lượng. Thread-safe (ghi file chạy trong thread).
+
+    Thứ tự LRU giữ trong bộ nhớ; khi khởi động dựng lại từ mtime của file có sẵn.
+    """
+
+    def __init__(self, directory: str = IPFS_CACHE_DIR, max_bytes: int = IPFS_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # cid -> [size, content_type]
+        self.size = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for path in self.directory.iterdir():
+            if path.name.startswith(_TMP_PREFIX):
+                path.unlink(missing_ok=True)  # file tạm của lần chạy trước bị ngắt
+            elif is_valid_cid(path.name) and path.is_file():
+                st = path.stat()
+                files.append((st.st_mtime, path.name, st.st_size))
+        for _, cid, size in sorted(files):
+            self._entries[cid] = [size, None]
+            self.size += size
+        self._evict()
+
+    def path(self, cid: str) -> Path:
+        return self.directory / cid
+
+    def lookup(self, cid: str):
+        """(path, size, content_type) nếu có trong cache, ngược lại None."""
+        with self._lock:
+            entry = self._entries.get(cid)
+            if entry is None:
+                return None
+            self._entries.move_to_end(cid)
+            return self.path(cid), entry[0], entry[1]
+
+    def discard(self, cid: str):
+        """Bỏ entry (file đã bị xoá ngoài cache)."""
+        with self._lock:
+            entry = self._entries.pop(cid, None)
+            if entry is not None:
+                self.size -= entry[0]
+
+    def temp_path(self) -> Path:
+        return self.directory / f"{_TMP_PREFIX}{uuid.uuid4().hex}"
+
+    def commit(self, cid: str, tmp_path: Path, size: int, content_type: str = None):
+        """Đổi tên file tạm thành file của CID (atomic) rồi xoá bớt file cũ nếu vượt dung lượng."""
+        os.replace(tmp_path, self.path(cid))
+        with self._lock:
+            old = self._entries.pop(cid, None)
+            if old is not None:
+                self.size -= old[0]
+            self._entries[cid] = [size, content_type]
+            self.size += size
+            self._evict()
+
+    def _evict(self):
+        # luôn giữ entry mới nhất, kể cả khi 1 file lớn hơn max_bytes
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            cid, (size, _) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            # file đang được gửi cho client vẫn đọc được sau unlink (POSIX)
+            self.path(cid).unlink(missing_ok=True)
+
+    def put_file(self, cid: str, fileobj, content_type: str = None) -> int:
+        """Chép fileobj (seekable, đọc từ đầu) vào cache. Trả số byte đã ghi."""
+        tmp = self.temp_path()
+        try:
+            fileobj.seek(0)
+            with open(tmp, "wb") as out:
+                shutil.copyfileobj(fileobj, out, 1024 * 1024)
+                size = out.tell()
+            self.commit(cid, tmp, size, content_type)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class IpfsGateway:
+    """
+    Cache + tải upstream có gộp request.
+
+    Args:
+        cache: DiskCidCache
+        upstream: base URL gateway (https://host, tải {upstream}/ipfs/{cid})
+        verify: kiểm tra CID của nội dung tải về
+    """
+
+    def __init__(self, cache: DiskCidCache, upstream: str = IPFS_GATEWAY_URL, verify: bool = IPFS_CACHE_VERIFY):
+        self.cache = cache
+        self.upstream = upstream.rstrip("/")
+        self.verify = verify
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(IPFS_FETCH_TIMEOUT, connect=10), follow_redirects=True
+        )
+        self._inflight = {}  # cid -> Task tải từ upstream
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetch_errors = 0
+
+    async def aclose(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self._client.aclose()
+
+    async def get(self, cid: str):
+        """
+        (path, size, content_type) của CID, tải từ upstream nếu chưa có.
+
+        Raises:
+            ValueError nếu CID sai định dạng
+            CidNotFound nếu upstream trả 404
+            UpstreamError nếu tải thất bại
+        """
+        if not is_valid_cid(cid):
+            raise ValueError(f"Invalid CID: {cid}")
+        found = self.cache.lookup(cid)
+        if found is not None:
+            self.hits += 1
+            IPFS_GATEWAY_REQUESTS.labels("hit").inc()
+            return found
+
+        task = self._inflight.get(cid)
+        if task is None:
+            self.misses += 1
+            IPFS_GATEWAY_REQUESTS.labels("miss").inc()
+            task = asyncio.create_task(self._fetch(cid))
+            self._inflight[cid] = task
+            task.add_done_callback(lambda t: self._fetch_done(cid, t))
+        else:
+            self.coalesced += 1
+            IPFS_GATEWAY_REQUESTS.labels("coalesced").inc()
+        # shield: client đầu tiên ngắt kết nối thì các client khác vẫn nhận kết quả
+        return await asyncio.shield(task)
+
+    def _fetch_done(self, cid: str, task):
+        self._inflight.pop(cid, None)
+        # mọi request chờ đã huỷ thì không ai đọc lỗi -> tránh cảnh báo "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, cid: str):
+        tmp = self.cache.temp_path()
+        builder = CidBuilder(0 if cid.startswith("Qm") else 1) if self.verify else None
+        try:
+            async with self._client.stream("GET", f"{self.upstream}/ipfs/{cid}") as res:
+                if res.status_code == 404:
+                    raise CidNotFound(cid)
+                if res.status_code != 200:
+                    raise UpstreamError(f"Gateway returned {res.status_code} for {cid}")
+                length = res.headers.get("content-length")
+                if length and length.isdigit() and int(length) > IPFS_FETCH_MAX_BYTES:
+                    raise UpstreamError(f"Content exceeds {IPFS_FETCH_MAX_BYTES} bytes")
+                content_type = res.headers.get("content-type")
+                size = 0
+                # ghi file + hash trong thread; đoạn trước được ghi trong lúc nhận đoạn tiếp theo
+                out = await asyncio.to_thread(open, tmp, "wb")
+                loop = asyncio.get_running_loop()
+                pending = None
+
+                def write(chunk: bytes):
+                    out.write(chunk)
+                    if builder is not None:
+                        builder.update(chunk)
+
+                try:
+                    async for chunk in res.aiter_bytes(256 * 1024):
+                        size += len(chunk)
+                        if size > IPFS_FETCH_MAX_BYTES:
+                            raise UpstreamError(f"Content exceeds {IPFS_FETCH_MAX_BYTES} bytes")
+                        if pending is not None:
+                            await pending
+                        pending = loop.run_in_executor(None, write, chunk)
+                    if pending is not None:
+                        await pending
+                finally:
+                    # chờ lần ghi đang chạy (nếu lỗi giữa chừng) rồi mới đóng file
+                    if pending is not None:
+                        await asyncio.gather(pending, return_exceptions=True)
+                    await asyncio.to_thread(out.close)
+            if builder is not None and await asyncio.to_thread(builder.cid) != cid:
+                raise UpstreamError(f"Gateway content does not match CID {cid}")
+            self.cache.commit(cid, tmp, size, content_type)
+            return self.cache.path(cid), size, content_type
+        except CidNotFound:
+            IPFS_GATEWAY_REQUESTS.labels("not_found").inc()
+            raise
+        except Exception as e:
+            self.fetch_errors += 1
+            IPFS_GATEWAY_REQUESTS.labels("error").inc()
+            if isinstance(e, httpx.HTTPError):
+                raise UpstreamError(f"Gateway request failed: {e!r}") from e
+            raise
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    async def seed(self, cid: str, fileobj, content_type: str = None):
+        """Đưa file vừa upload vào cache (chép trong thread). Bỏ qua nếu đã có / không đọc lại được."""
+        if not is_valid_cid(cid) or not fileobj.seekable() or self.cache.lookup(cid) is not None:
+            return
+        await asyncio.to_thread(self.cache.put_file, cid, fileobj, content_type)
+
+    def stats(self) -> dict:
+        return dict(
+            self.cache.stats(),
+            upstream=self.upstream,
+            hits=self.hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            fetch_errors=self.fetch_errors,
+            inflight=len(self._inflight),
+        )
+
+
+_gateway = None
+
+
+def get_ipfs_gateway() -> IpfsGateway:
+    """IpfsGateway dùng chung (tạo thư mục cache + client lazily, không phải lúc import)."""
+    global _gateway
+    if _gateway is None:
+        _gateway = IpfsGateway(DiskCidCache())
+    return _gateway
+
+
+async def close_ipfs_gateway():
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
@@ -0,0 +1,139 @@
+"""
+Prometheus metrics cho API (GET /metrics).
+
+- latency từng endpoint (theo route template)
+- số lần + latency từng JSON-RPC method thực sự gửi tới provider (web3 middleware)
+- thời gian chờ receipt, upload Pinata (bytes, latency, retry)
+- asset cache / upload stats được đọc lúc scrape (collector)
+- số RPC mỗi request (contextvar) -> header X-RPC-Calls để profile
+"""
+
+import contextvars
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+RPC_CALLS_HEADER = "X-RPC-Calls"
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latency của HTTP request theo endpoint",
+    ["method", "route", "status"],
+)
+RPC_REQUESTS = Counter(
+    "rpc_requests_total", "Số JSON-RPC request gửi tới provider", ["method", "outcome"],
+)
+RPC_SECONDS = Histogram(
+    "rpc_request_duration_seconds", "Latency JSON-RPC theo method", ["method"],
+)
+RPC_ENDPOINT_REQUESTS = Counter(
+    "rpc_endpoint_requests_total", "Số HTTP request tới từng RPC endpoint", ["endpoint", "outcome"],
+)
+RPC_HEDGES = Counter("rpc_hedged_requests_total", "Số request đọc được gửi thêm bản hedge")
+RECEIPT_WAIT_SECONDS = Histogram(
+    "tx_receipt_wait_seconds", "Thời gian chờ receipt của transaction", ["outcome"],
+    buckets=(0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300),
+)
+SIGNER_BALANCE = Gauge("signer_balance_eth", "Số dư của từng signer (ETH)", ["address"])
+SIGNER_INFLIGHT = Gauge("signer_inflight_transactions", "Số tx đang gửi / chờ receipt của từng signer", ["address"])
+EVENT_STREAM_SUBSCRIBERS = Gauge("event_stream_subscribers", "Số client đang nghe /events/stream và /events/ws")
+EVENT_STREAM_MESSAGES = Counter("event_stream_messages_total", "Số message đã phát tới subscriber", ["type"])
+EVENT_STREAM_OVERFLOWS = Counter(
+    "event_stream_overflows_total", "Số subscriber bị ngắt vì đọc chậm (buffer đầy)",
+)
+PINATA_UPLOAD_SECONDS = Histogram(
+    "pinata_upload_duration_seconds", "Latency upload lên Pinata/IPFS (mỗi lần thử)", ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+PINATA_UPLOAD_BYTES = Counter("pinata_upload_bytes_total", "Số byte đã upload lên Pinata/IPFS")
+PINATA_RETRIES = Counter("pinata_retries_total", "Số lần retry upload Pinata")
+IPFS_GATEWAY_REQUESTS = Counter(
+    "ipfs_gateway_requests_total", "Request GET /ipfs/{cid} theo kết quả cache", ["outcome"],
+)
+
+# Bộ đếm RPC của request HTTP hiện tại (list 1 phần tử để task con cộng dồn được)
+_request_rpc_calls = contextvars.ContextVar("request_rpc_calls", default=None)
+
+
+def start_request_accounting():
+    """Bắt đầu đếm RPC cho request hiện tại; trả token để reset."""
+    return _request_rpc_calls.set([0])
+
+
+def request_rpc_calls() -> int:
+    counter = _request_rpc_calls.get()
+    return counter[0] if counter is not None else 0
+
+
+def end_request_accounting(token):
+    _request_rpc_calls.reset(token)
+
+
+def record_rpc(method: str, seconds: float, ok: bool, count: int = 1):
+    RPC_REQUESTS.labels(method, "ok" if ok else "error").inc(count)
+    RPC_SECONDS.labels(method).observe(seconds)
+    counter = _request_rpc_calls.get()
+    if counter is not None:
+        counter[0] += count
+
+
+def rpc_metrics_middleware(make_request, w3):
+    """Web3 middleware (sync): đặt ở lớp trong cùng để chỉ đếm request thật tới provider."""
+    def middleware(method, params):
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = make_request(method, params)
+            ok = "error" not in response
+            return response
+        finally:
+            record_rpc(method, time.perf_counter() - start, ok)
+    return middleware
+
+
+async def async_rpc_metrics_middleware(make_request, w3):
+    """Web3 middleware (async)."""
+    async def middleware(method, params):
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = await make_request(method, params)
+            ok = "error" not in response
+            return response
+        finally:
+            record_rpc(method, time.perf_counter() - start, ok)
+    return middleware
+
+
+class _StatsCollector:
+    """Đọc asset_cache.stats() / upload_stats() lúc scrape thay vì nhân đôi bộ đếm."""
+
+    def describe(self):
+        # không có describe() thì REGISTRY.register gọi collect() ngay lúc import
+        # -> import asset_cache/ipfs_client (đọc cấu hình) chỉ vì import metrics
+        return []
+
+    def collect(self):
+        from asset_cache import asset_cache
+        cache = asset_cache.stats()
+        yield GaugeMetricFamily("asset_cache_size", "Số entry trong asset cache", value=cache["size"])
+        for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            yield CounterMetricFamily(f"asset_cache_{name}", f"asset cache {name}", value=cache[name])
+
+        try:
+            from ipfs_client import upload_stats
+        except Exception:
+            return
+        uploads = upload_stats()
+        family = CounterMetricFamily("ipfs_uploads", "Kết quả upload IPFS", labels=["outcome"])
+        for outcome in ("uploads", "failures", "rejected_too_large", "deduplicated"):
+            family.add_metric([outcome], uploads[outcome])
+        yield family
+
+
+REGISTRY.register(_StatsCollector())
+
+
+def render():
+    """(body, content_type) cho GET /metrics."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
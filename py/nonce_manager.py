@@ -0,0 +1,144 @@
+"""
+Cấp nonce cục bộ cho signer của backend.
+
+Thay vì hỏi get_transaction_count() cho mỗi transaction (2 request đồng thời sẽ
+nhận cùng 1 nonce), mỗi signer có 1 NonceManager:
+- seed 1 lần từ transaction count ở block "pending"
+- cấp nonce tăng dần (atomic, dùng được từ thread lẫn event loop)
+- nonce đã cấp nhưng tx không broadcast được -> đưa vào danh sách "gap" để cấp lại trước
+- resync từ node khi gặp lỗi "nonce too low" / tx bị drop khỏi mempool
+"""
+
+import heapq
+import threading
+
+# Thông báo lỗi của các node phổ biến (geth, erigon, hardhat, anvil, alchemy...)
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+    "nonce has already been used",
+)
+
+
+def is_nonce_error(exc: Exception) -> bool:
+    """True nếu lỗi từ node cho thấy nonce cục bộ đã lệch so với chain."""
+    msg = str(exc).lower()
+    return any(m in msg for m in NONCE_ERROR_MARKERS)
+
+
+class NonceManager:
+    """Bộ cấp nonce cho 1 địa chỉ signer."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._lock = threading.Lock()
+        self._next = None       # nonce kế tiếp sẽ cấp (None = chưa seed)
+        self._gaps = []         # heap các nonce đã cấp nhưng không được dùng
+        self._inflight = set()  # nonce đã cấp, đang build/broadcast
+
+    @property
+    def seeded(self) -> bool:
+        return self._next is not None
+
+    def seed(self, pending_count: int):
+        """Seed từ get_transaction_count(address, "pending") nếu chưa seed."""
+        with self._lock:
+            if self._next is None:
+                self._next = pending_count
+
+    def allocate(self, w3) -> int:
+        """Cấp nonce kế tiếp (Web3 sync). Chỉ gọi RPC ở lần đầu để seed."""
+        if self._next is None:
+            self.seed(w3.eth.get_transaction_count(self.address, "pending"))
+        return self._take()
+
+    async def async_allocate(self, w3) -> int:
+        """Giống allocate() nhưng cho AsyncWeb3."""
+        if self._next is None:
+            self.seed(await w3.eth.get_transaction_count(self.address, "pending"))
+        return self._take()
+
+    def _take(self) -> int:
+        with self._lock:
+            while self._gaps:
+                nonce = heapq.heappop(self._gaps)
+                if nonce < self._next and nonce not in self._inflight:
+                    break
+            else:
+                # sau resync, nonce đang broadcast dở có thể >= _next -> bỏ qua
+                while self._next in self._inflight:
+                    self._next += 1
+                nonce = self._next
+                self._next += 1
+            self._inflight.add(nonce)
+            return nonce
+
+    def confirm(self, nonce: int):
+        """Tx với nonce này đã được node nhận (broadcast thành công)."""
+        with self._lock:
+            self._inflight.discard(nonce)
+
+    def release(self, nonce: int):
+        """
+        Tx với nonce này không được broadcast (lỗi build/sign/send không liên quan nonce).
+        Nonce chưa bị tiêu trên chain nên phải cấp lại, nếu không các tx sau sẽ kẹt sau gap.
+        """
+        with self._lock:
+            self._inflight.discard(nonce)
+            if self._next is not None and nonce < self._next:
+                heapq.heappush(self._gaps, nonce)
+
+    def resync(self, pending_count: int):
+        """
+        Đồng bộ lại với node sau lỗi nonce hoặc tx bị drop.
+
+        pending_count đã tính cả tx đang nằm trong mempool, nên:
+        - mọi nonce < pending_count đã được dùng -> bỏ khỏi gap
+        - nonce >= pending_count mà ta tưởng đã gửi thì thực ra đã bị drop -> cấp lại từ pending_count
+        """
+        with self._lock:
+            self._next = pending_count
+            self._gaps = []
+
+    def has_gap(self, pending_count: int) -> bool:
+        """
+        True nếu node đang đứng ở nonce thấp hơn mức ta đã cấp mà nonce đó không còn
+        đang được xử lý cục bộ -> tx tại pending_count đã bị drop, các tx sau sẽ kẹt.
+        """
+        with self._lock:
+            if self._next is None or pending_count >= self._next:
+                return False
+            return pending_count not in self._inflight and pending_count not in self._gaps
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "address": self.address,
+                "next_nonce": self._next,
+                "inflight": sorted(self._inflight),
+                "gaps": sorted(self._gaps),
+            }
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(address: str) -> NonceManager:
+    """Trả về NonceManager dùng chung cho địa chỉ (tạo mới nếu chưa có)."""
+    key = address.lower()
+    with _managers_lock:
+        mgr = _managers.get(key)
+        if mgr is None:
+            mgr = _managers[key] = NonceManager(address)
+        return mgr
+
+
+def reset_nonce_managers():
+    """Xoá toàn bộ trạng thái nonce (dùng khi đổi RPC/chain hoặc trong test)."""
+    with _managers_lock:
+        _managers.clear()
@@ -0,0 +1,192 @@
+"""
+Chờ receipt cho nhiều transaction bằng 1 vòng lặp theo block (thay cho mỗi tx 1 vòng poll).
+
+Vòng lặp chỉ chạy khi có tx đang chờ: mỗi RECEIPT_POLL_INTERVAL giây hỏi eth_blockNumber,
+khi có block mới (hoặc có hash mới đăng ký) thì lấy receipt của mọi hash đang chờ trong
+1 JSON-RPC batch rồi resolve các future. Số RPC cho việc chờ receipt tỉ lệ với số block,
+không tỉ lệ với số tx x số lần poll.
+"""
+
+import asyncio
+import contextvars
+import os
+
+from eth_utils import to_checksum_address, to_int
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from fee_oracle import fee_oracle
+from util_hex import hex_key
+
+# Khoảng thời gian hỏi block mới (giây); Sepolia ~12s/block nên 1s là đủ nhanh
+RECEIPT_POLL_INTERVAL = float(os.getenv("RECEIPT_POLL_INTERVAL", "1.0"))
+
+
+# Field của receipt / log trong JSON-RPC: số dạng hex, bytes dạng hex, địa chỉ
+_RECEIPT_INTS = ("blockNumber", "cumulativeGasUsed", "effectiveGasPrice", "gasUsed", "status",
+                 "transactionIndex", "type", "blobGasUsed", "blobGasPrice")
+_RECEIPT_BYTES = ("blockHash", "transactionHash", "logsBloom", "root")
+_RECEIPT_ADDRESSES = ("from", "to", "contractAddress")
+_LOG_INTS = ("blockNumber", "logIndex", "transactionIndex")
+_LOG_BYTES = ("blockHash", "transactionHash", "data")
+
+
+def _format_fields(raw: dict, ints, byte_fields, addresses) -> dict:
+    out = dict(raw)
+    for k in ints:
+        if isinstance(out.get(k), str):
+            out[k] = to_int(hexstr=out[k])
+    for k in byte_fields:
+        if isinstance(out.get(k), str):
+            out[k] = HexBytes(out[k])
+    for k in addresses:
+        if out.get(k):
+            out[k] = to_checksum_address(out[k])
+    return out
+
+
+def format_receipt(raw: dict) -> AttributeDict:
+    """
+    Receipt JSON-RPC thô (kết quả batch) -> AttributeDict cùng kiểu với w3.eth.get_transaction_receipt,
+    chỉ dùng API public (eth_utils / hexbytes) thay vì formatter nội bộ của web3.
+    """
+    receipt = _format_fields(raw, _RECEIPT_INTS, _RECEIPT_BYTES, _RECEIPT_ADDRESSES)
+    logs = []
+    for log in raw.get("logs") or []:
+        log = _format_fields(log, _LOG_INTS, _LOG_BYTES, ("address",))
+        log["topics"] = [HexBytes(t) for t in log.get("topics", [])]
+        logs.append(log)
+    receipt["logs"] = logs
+    return AttributeDict.recursive(receipt)
+
+
+class ReceiptWatcher:
+    """
+    Watcher dùng chung cho 1 AsyncWeb3.
+
+    Args:
+        w3: AsyncWeb3
+        batch: coroutine (calls) -> [(result, error)] gửi JSON-RPC batch (util_contract.async_rpc_batch);
+               None -> gọi eth_getTransactionReceipt song song
+        poll_interval: giây giữa 2 lần hỏi block
+    """
+
+    def __init__(self, w3, batch=None, poll_interval: float = None):
+        self.w3 = w3
+        self.batch = batch
+        self.poll_interval = RECEIPT_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._pending = {}      # hash -> Future receipt
+        self._waiters = {}      # hash -> số coroutine đang chờ
+        self._unchecked = set()  # hash mới đăng ký, chưa hỏi receipt lần nào
+        self._task = None
+        self._last_block = None
+        self.blocks_seen = 0
+        self.receipt_fetches = 0
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def wait(self, tx_hash, timeout: float):
+        """
+        Chờ receipt của tx_hash.
+
+        Raises:
+            TimeExhausted nếu quá timeout giây chưa có receipt
+        """
+        key = hex_key(tx_hash)
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = self._pending[key] = asyncio.get_running_loop().create_future()
+            self._unchecked.add(key)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        self._ensure_running()
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(
+                f"Transaction {key} is not in the chain after {timeout} seconds"
+            )
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not fut.done():
+                    self._forget(key)
+
+    def _forget(self, key: str):
+        fut = self._pending.pop(key, None)
+        self._unchecked.discard(key)
+        if fut is not None and not fut.done():
+            fut.cancel()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            # context rỗng: RPC của watcher không tính vào X-RPC-Calls của request đầu tiên
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+    async def _run(self):
+        while self._pending:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("WARN receipt watcher:", e)
+            if self._pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _tick(self):
+        block = await self.w3.eth.block_number
+        new_block = block != self._last_block
+        if new_block:
+            self._last_block = block
+            self.blocks_seen += 1
+            fee_oracle.observe_block(block)
+        # block mới: hỏi mọi hash; không thì chỉ hỏi hash vừa đăng ký (có thể đã mined sẵn)
+        keys = list(self._pending) if new_block else [k for k in self._pending if k in self._unchecked]
+        self._unchecked.difference_update(keys)
+        if not keys:
+            return
+        self.receipt_fetches += 1
+        for key, receipt in zip(keys, await self._fetch(keys)):
+            fut = self._pending.get(key)
+            if receipt is not None and fut is not None:
+                del self._pending[key]
+                if not fut.done():
+                    fut.set_result(receipt)
+
+    async def _fetch(self, keys: list) -> list:
+        """Receipt (AttributeDict) hoặc None (chưa mined / lỗi) cho từng hash."""
+        if self.batch is not None and len(keys) > 1:
+            results = await self.batch([("eth_getTransactionReceipt", [k]) for k in keys])
+            return [
+                format_receipt(result) if result and not error else None
+                for result, error in results
+            ]
+
+        async def one(key):
+            try:
+                return await self.w3.eth.get_transaction_receipt(key)
+            except TransactionNotFound:
+                return None
+
+        return await asyncio.gather(*(one(k) for k in keys))
+
+    async def close(self):
+        """Huỷ vòng lặp và các future đang chờ (gọi khi shutdown)."""
+        for key in list(self._pending):
+            self._forget(key)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "last_block": self._last_block,
+            "blocks_seen": self.blocks_seen,
+            "receipt_fetches": self.receipt_fetches,
+            "running": self._task is not None and not self._task.done(),
+        }
@@ -0,0 +1,57 @@
+"""
+Chain context theo phạm vi 1 request (FastAPI dependency).
+
+Giữ handle chain (registry, nft, w3, signer, signer pool) lấy 1 lần cho cả request và memo các
+lần đọc chain (getAsset, get_code): mỗi lần đọc khác nhau chỉ gọi RPC tối đa 1 lần
+trong 1 request, kể cả khi auth helper và endpoint cùng cần.
+"""
+
+import asyncio
+
+from asset_cache import async_get_asset
+from util_contract import get_async_contracts, get_signer_pool
+from util_hex import hex_key
+
+
+class RequestChain:
+    """Handle chain + memo đọc chain cho 1 request. Lỗi cũng được memo (Not found...)."""
+
+    __slots__ = ("registry", "nft", "w3", "owner", "signers", "_memo")
+
+    def __init__(self, registry, nft, w3, owner, signers=None):
+        self.registry = registry
+        self.nft = nft
+        self.w3 = w3
+        self.owner = owner
+        self.signers = signers
+        self._memo = {}
+
+    async def _once(self, key, factory):
+        fut = self._memo.get(key)
+        if fut is None:
+            fut = self._memo[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(fut)
+
+    async def get_asset(self, asset_hash):
+        """getAsset(hash) (qua asset_cache), tối đa 1 lần / request."""
+        return await self._once(
+            ("getAsset", hex_key(asset_hash)),
+            lambda: async_get_asset(self.registry, asset_hash),
+        )
+
+    async def get_code(self, address: str) -> bytes:
+        return await self._once(("getCode", address.lower()), lambda: self.w3.eth.get_code(address))
+
+    def forget_asset(self, asset_hash):
+        """Bỏ memo sau khi chính request này ghi asset đó."""
+        self._memo.pop(("getAsset", hex_key(asset_hash)), None)
+
+    def reads(self) -> int:
+        """Số lần đọc khác nhau đã thực hiện (debug/test)."""
+        return len(self._memo)
+
+
+async def get_request_chain() -> RequestChain:
+    """FastAPI dependency: `chain: RequestChain = Depends(get_request_chain)`."""
+    registry, nft, w3, owner = await get_async_contracts()
+    return RequestChain(registry, nft, w3, owner, await get_signer_pool())
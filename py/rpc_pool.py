@@ -0,0 +1,248 @@
+"""
+Pool nhiều RPC endpoint cho AsyncWeb3.
+
+- Đọc: gửi tới endpoint khoẻ có latency (EWMA) thấp nhất, lỗi mạng / HTTP 429 / 5xx thì
+  chuyển sang endpoint kế tiếp
+- eth_call (và các đọc idempotent khác) chậm quá RPC_HEDGE_AFTER_MS thì gửi thêm 1 bản
+  sang endpoint thứ 2, lấy kết quả về trước (hedged request)
+- Ghi (sendRawTransaction, nonce "pending"): chỉ gửi tới tập write theo thứ tự cấu hình,
+  để mempool / pending nonce nhất quán; chỉ failover khi endpoint chính lỗi
+- Endpoint lỗi liên tiếp RPC_EJECT_AFTER lần bị loại RPC_EJECT_SECONDS giây, hết hạn thì
+  được thử lại (lỗi tiếp là bị loại ngay)
+"""
+
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+from metrics import RPC_ENDPOINT_REQUESTS, RPC_HEDGES
+
+# Gửi bản hedge sau bao lâu (ms); 0 = tắt hedging
+RPC_HEDGE_AFTER_MS = float(os.getenv("RPC_HEDGE_AFTER_MS", "300"))
+# Số lỗi liên tiếp trước khi loại endpoint, và thời gian loại (giây)
+RPC_EJECT_AFTER = int(os.getenv("RPC_EJECT_AFTER", "3"))
+RPC_EJECT_SECONDS = float(os.getenv("RPC_EJECT_SECONDS", "30"))
+# Timeout mỗi request tới 1 endpoint (giây)
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+
+# Hệ số EWMA cho latency
+LATENCY_ALPHA = 0.2
+
+WRITE_METHODS = ("eth_sendRawTransaction", "eth_sendTransaction")
+HEDGE_METHODS = ("eth_call", "eth_getCode", "eth_getBalance", "eth_getStorageAt")
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def split_urls(value: str) -> list:
+    """'url1, url2' -> [url1, url2] (bỏ trùng, giữ thứ tự)."""
+    urls = []
+    for url in (value or "").split(","):
+        url = url.strip()
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def endpoint_label(url: str) -> str:
+    """host[:port] của URL - không đưa path (thường chứa API key) vào metrics/log."""
+    parts = urlsplit(url)
+    return parts.netloc.rsplit("@", 1)[-1] or url
+
+
+def is_write(method: str, params) -> bool:
+    if method in WRITE_METHODS:
+        return True
+    # nonce "pending" phụ thuộc mempool của node -> hỏi đúng node nhận tx
+    return method == "eth_getTransactionCount" and len(params or ()) > 1 and params[1] == "pending"
+
+
+class EndpointError(RuntimeError):
+    """Endpoint trả HTTP 429/5xx hoặc body không phải JSON-RPC."""
+
+
+class Endpoint:
+    """Thống kê 1 RPC endpoint."""
+
+    __slots__ = ("url", "label", "latency", "requests", "errors", "consecutive_errors", "ejected_until")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.label = endpoint_label(url)
+        self.latency = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.ejected_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def record_latency(self, seconds: float):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_ALPHA * (seconds - self.latency)
+
+    def record_ok(self, seconds: float):
+        self.requests += 1
+        self.consecutive_errors = 0
+        self.ejected_until = 0.0
+        self.record_latency(seconds)
+
+    def record_error(self, now: float):
+        self.requests += 1
+        self.errors += 1
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= RPC_EJECT_AFTER:
+            self.ejected_until = now + RPC_EJECT_SECONDS
+
+    def stats(self, now: float) -> dict:
+        return {
+            "endpoint": self.label,
+            "healthy": self.healthy(now),
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejected_for": round(self.ejected_until - now, 1) if not self.healthy(now) else 0,
+        }
+
+
+class RpcPool:
+    """
+    Pool endpoint đọc/ghi dùng chung 1 aiohttp session (keep-alive).
+
+    Args:
+        read_urls: endpoint cho request đọc (định tuyến theo latency)
+        write_urls: endpoint cho request ghi (theo thứ tự); mặc định = read_urls
+        session: aiohttp.ClientSession dùng chung
+    """
+
+    def __init__(self, read_urls: list, write_urls: list = None, session=None, hedge_after_ms: float = None):
+        if not read_urls:
+            raise RuntimeError("No RPC endpoint configured")
+        self._endpoints = {}
+        self.readers = [self._endpoint(u) for u in read_urls]
+        self.writers = [self._endpoint(u) for u in (write_urls or read_urls)]
+        self.session = session
+        self.hedge_after = (RPC_HEDGE_AFTER_MS if hedge_after_ms is None else hedge_after_ms) / 1000.0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def _endpoint(self, url: str) -> Endpoint:
+        if url not in self._endpoints:
+            self._endpoints[url] = Endpoint(url)
+        return self._endpoints[url]
+
+    def candidates(self, write: bool = False) -> list:
+        """Thứ tự thử: endpoint khoẻ trước (đọc: latency tăng dần, chưa đo coi như 0), bị loại xếp cuối."""
+        now = time.monotonic()
+        if write:
+            pool = list(self.writers)
+        else:
+            pool = sorted(self.readers, key=lambda e: e.latency or 0.0)
+        return [e for e in pool if e.healthy(now)] + [e for e in pool if not e.healthy(now)]
+
+    async def _post(self, endpoint: Endpoint, data: bytes):
+        started = time.perf_counter()
+        try:
+            async with self.session.post(
+                endpoint.url,
+                data=data,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT),
+            ) as resp:
+                if resp.status in RETRY_STATUS:
+                    raise EndpointError(f"{endpoint.label} returned HTTP {resp.status}")
+                resp.raise_for_status()
+                body = await resp.read()
+            result = json.loads(body)
+        except asyncio.CancelledError:
+            # bị huỷ vì bản hedge về trước: vẫn ghi nhận là chậm ít nhất chừng này
+            endpoint.record_latency(time.perf_counter() - started)
+            raise
+        except Exception:
+            endpoint.record_error(time.monotonic())
+            RPC_ENDPOINT_REQUESTS.labels(endpoint.label, "error").inc()
+            raise
+        endpoint.record_ok(time.perf_counter() - started)
+        RPC_ENDPOINT_REQUESTS.labels(endpoint.label, "ok").inc()
+        return result
+
+    async def _failover(self, endpoints: list, data: bytes):
+        error = None
+        for endpoint in endpoints:
+            try:
+                return await self._post(endpoint, data)
+            except Exception as e:
+                error = e
+        raise error
+
+    async def _hedged(self, endpoints: list, data: bytes):
+        """Gửi tới endpoint nhanh nhất; chậm quá hedge_after thì gửi thêm tới endpoint kế tiếp."""
+        primary = asyncio.ensure_future(self._post(endpoints[0], data))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                if primary.exception() is None:
+                    return primary.result()
+                return await self._failover(endpoints[1:], data)
+
+            self.hedges += 1
+            RPC_HEDGES.inc()
+            backup = asyncio.ensure_future(self._failover(endpoints[1:], data))
+            tasks.append(backup)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def request(self, data: bytes, write: bool = False, hedge: bool = False):
+        """
+        Gửi 1 body JSON-RPC (đơn hoặc batch) và trả body đã parse.
+
+        Raises:
+            lỗi của endpoint cuối cùng nếu mọi endpoint đều lỗi
+        """
+        endpoints = self.candidates(write)
+        if hedge and self.hedge_after > 0 and len(endpoints) > 1:
+            return await self._hedged(endpoints, data)
+        return await self._failover(endpoints, data)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "readers": [e.stats(now) for e in self.readers],
+            "writers": [e.label for e in self.writers],
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class PooledAsyncHTTPProvider(AsyncJSONBaseProvider):
+    """Provider AsyncWeb3 gửi request qua RpcPool (thay cho AsyncHTTPProvider 1 URL)."""
+
+    def __init__(self, pool: RpcPool):
+        super().__init__()
+        self.pool = pool
+
+    async def make_request(self, method, params):
+        data = self.encode_rpc_request(method, params)
+        return await self.pool.request(
+            data, write=is_write(method, params), hedge=method in HEDGE_METHODS
+        )
@@ -1,17 +1,158 @@
-from fastapi import FastAPI, UploadFile, File, Form, Body, Request, HTTPException, Header
+import time
+
+# Mốc bắt đầu import (đo thời gian import / boot của worker)
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import mimetypes
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import (
+    FastAPI, UploadFile, File, Form, Body, Request, HTTPException, Header, Query, Depends,
+    WebSocket, WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from web3 import Web3
-from web3.exceptions import ABIFunctionNotFound, BadFunctionCallOutput
+from web3.exceptions import BadFunctionCallOutput, TransactionNotFound
+from web3.logs import DISCARD
 
-from ipfs_client import upload_bytes
-from util_contract import get_contracts, build_and_send
-from auth import check_admin, check_asset_owner, parse_user_address
+from config import load_env, validate_config
+from ipfs_client import (
+    IPFS_MAX_UPLOAD_BYTES,
+    UploadNotConfigured,
+    UploadTooLarge,
+    async_upload,
+    close_pinata_client,
+    upload_stats,
+)
+from cid_index import get_cid_index
+from idempotency import IDEMPOTENCY_TTL, IDEMPOTENT_REPLAYED_HEADER, IdempotencyConflict, fingerprint, write_flights
+from content_check import async_file_cid, async_stream_cid, check_result, cid_version
+from ipfs_gateway import CidNotFound, UpstreamError, close_ipfs_gateway, gateway_link, get_ipfs_gateway
+from fee_oracle import describe_fees, fee_oracle, gas_estimator
+from metrics import (
+    HTTP_REQUEST_SECONDS,
+    RPC_CALLS_HEADER,
+    end_request_accounting,
+    render as render_metrics,
+    request_rpc_calls,
+    start_request_accounting,
+)
+from util_contract import (
+    get_async_contracts,
+    async_build_and_send,
+    async_wait_for_receipt,
+    init_async_chain,
+    close_async_chain,
+    async_chain_health,
+    async_rpc_batch,
+    get_receipt_watcher,
+    get_signer_pool,
+)
+from auth import check_admin, async_check_asset_owner, parse_user_address
+from request_chain import RequestChain, get_request_chain
+from signer_pool import SignerPool
+from asset_codec import Asset, asset_key_hash, decode_asset, encode_get_asset
+import tx_tracker
+from indexer import INDEXER_ENABLED, get_indexer, start_indexer, stop_indexer
+from asset_cache import asset_cache, on_registry_event
+from event_stream import STREAM_EVENT_NAMES, StreamFull, event_hub, format_sse, parse_cursor
 
-from dotenv import load_dotenv
-load_dotenv()
-import os
+load_env()
+
+# Mặc định endpoint ghi có chờ receipt không; false -> fire-and-track (trả tx hash ngay)
+TX_WAIT_RECEIPT = os.getenv("TX_WAIT_RECEIPT", "true").lower() in ("true", "1", "yes")
+# Long-poll tối đa cho GET /tx/{hash}?wait=... (giây)
+TX_LONG_POLL_MAX = float(os.getenv("TX_LONG_POLL_MAX", "60"))
+# Batch: số item tối đa / tx, gas tối đa / tx (dưới block gas limit) và hệ số an toàn cho estimate
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_GAS = int(os.getenv("BATCH_MAX_GAS", "15000000"))
+BATCH_GAS_MARGIN = float(os.getenv("BATCH_GAS_MARGIN", "1.2"))
+# /asset/get-many: số key tối đa / request và số key / eth_call getAssets
+GET_MANY_MAX = int(os.getenv("GET_MANY_MAX", "500"))
+GET_MANY_CHUNK = int(os.getenv("GET_MANY_CHUNK", "200"))
+# /asset/check-content: số file tối đa / request multipart
+CHECK_CONTENT_MAX_FILES = int(os.getenv("CHECK_CONTENT_MAX_FILES", "50"))
 
-app = FastAPI(title="Asset Tokenization API")
+
+# /readyz chưa ready thì thử prewarm lại, tối đa 1 lần mỗi READY_RETRY_INTERVAL giây
+READY_RETRY_INTERVAL = float(os.getenv("READY_RETRY_INTERVAL", "5"))
+
+_startup = {
+    "ready": False,
+    "config": None,
+    "error": None,
+    "import_seconds": None,
+    "boot_seconds": None,
+    "prewarm_seconds": None,
+    "attempted_at": 0.0,
+}
+_prewarm_lock = asyncio.Lock()
+
+
+async def _prewarm() -> bool:
+    """
+    Chuẩn bị mọi thứ request đầu tiên cần: ABI + contract + session keep-alive,
+    probe RPC (block hiện tại), cache phí và số dư các signer. Thành công -> worker ready.
+    """
+    async with _prewarm_lock:
+        if _startup["ready"]:
+            return True
+        _startup["attempted_at"] = time.monotonic()
+        if _startup["config"]["errors"]:
+            _startup["error"] = "; ".join(_startup["config"]["errors"])
+            return False
+        started = time.perf_counter()
+        try:
+            ctx = await init_async_chain()
+            await fee_oracle.async_get_fees(ctx.w3)
+            await ctx.signers.refresh_balances()
+        except Exception as e:
+            _startup["error"] = str(e)
+            return False
+        _startup.update(
+            ready=True,
+            error=None,
+            prewarm_seconds=time.perf_counter() - started,
+            boot_seconds=time.perf_counter() - _IMPORT_STARTED,
+        )
+        return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Kiểm tra cấu hình 1 lần, rồi prewarm chain context trước khi nhận request.
+    # Nếu RPC/cấu hình lỗi thì vẫn cho server chạy (/readyz trả 503); endpoint sẽ báo lỗi khi được gọi.
+    _startup["config"] = validate_config()
+    for problem in _startup["config"]["errors"] + _startup["config"]["warnings"]:
+        print("WARN config:", problem)
+    if not await _prewarm():
+        print("WARN chain init failed:", _startup["error"])
+    if INDEXER_ENABLED:
+        try:
+            registry, _, w3, _ = await get_async_contracts()
+            idx = await start_indexer(w3, registry)
+            idx.add_listener(on_registry_event)
+            idx.add_listener(event_hub.on_indexer_event)
+            event_hub.store = idx.store
+        except Exception as e:
+            print("WARN indexer start failed:", e)
+    yield
+    event_hub.store = None
+    await stop_indexer()
+    await tx_tracker.shutdown()
+    await close_pinata_client()
+    await close_ipfs_gateway()
+    await close_async_chain()
+    _startup.update(ready=False, boot_seconds=None, prewarm_seconds=None)
+
+
+# Trạng thái tx fire-and-track -> event stream
+tx_tracker.add_listener(event_hub.on_tx_update)
+
+app = FastAPI(title="Asset Tokenization API", lifespan=lifespan)
 
 # CORS cho frontend React (localhost:5173)
 app.add_middleware(
@@ -20,17 +161,154 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[RPC_CALLS_HEADER, IDEMPOTENT_REPLAYED_HEADER],
 )
 
 
+@app.middleware("http")
+async def reject_oversized_upload(request: Request, call_next):
+    """Từ chối sớm (413) upload có Content-Length vượt giới hạn, trước khi parse multipart."""
+    if request.url.path == "/ipfs/upload":
+        length = request.headers.get("content-length")
+        # chừa 64 KiB cho phần header multipart
+        if length and length.isdigit() and int(length) > IPFS_MAX_UPLOAD_BYTES + 65536:
+            return JSONResponse(status_code=413, content={"detail": "File too large"})
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Latency theo route + số JSON-RPC request đã gửi trong request (header X-RPC-Calls)."""
+    token = start_request_accounting()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[RPC_CALLS_HEADER] = str(request_rpc_calls())
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route is not None else "unmatched", str(status)
+        ).observe(time.perf_counter() - started)
+        end_request_accounting(token)
+
+
+def parse_bool(v_raw) -> bool:
+    """Chuẩn hoá giá trị verified từ JSON/form/query -> bool."""
+    if isinstance(v_raw, bool):
+        return v_raw
+    v = str(v_raw).strip().lower()
+    return v in ["true", "1", "yes", "y", "on"]
+
+
+def invalidate_assets(asset_hashes, chain: RequestChain = None):
+    """
+    Xoá cache các asset mà tx vừa ghi (trả về callback dùng cho tx_tracker).
+    chain: RequestChain của request đã ghi -> bỏ luôn memo getAsset để đọc lại trong request thấy giá trị mới.
+    """
+    def invalidate(_record=None):
+        for h in asset_hashes:
+            asset_cache.invalidate(h)
+            if chain is not None:
+                chain.forget_asset(h)
+    return invalidate
+
+
+async def send_tx(w3, tx_func, signer, kind: str, wait: bool = None, asset_hashes=(), chain: RequestChain = None):
+    """
+    Gửi tx qua async_build_and_send.
+
+    wait=None -> theo TX_WAIT_RECEIPT. wait=False -> trả ngay sau khi broadcast,
+    tx_tracker chờ receipt ở nền; kèm tx_status/status_url trong extra để client tra cứu.
+    asset_hashes: các asset bị tx thay đổi -> invalidate asset_cache khi tx mined.
+    chain: RequestChain của request (nếu có) -> bỏ memo getAsset của các asset đó.
+
+    Returns:
+        (tx_hash, extra) - extra là dict field bổ sung cho response (luôn có "fees": gas limit/fee đã dùng)
+    """
+    if wait is None:
+        wait = TX_WAIT_RECEIPT
+    invalidate = invalidate_assets(asset_hashes, chain)
+    fees = {}
+    tx_hash = await async_build_and_send(w3, tx_func, signer, wait=wait, info=fees)
+    invalidate()
+    if wait:
+        return tx_hash, {"fees": fees}
+
+    record = tx_tracker.track(
+        tx_hash, async_wait_for_receipt(w3, tx_hash, signer), kind=kind, on_complete=invalidate,
+        assets=asset_hashes,
+    )
+    return tx_hash, {
+        "fees": fees,
+        "tx_status": record["status"],
+        "status_url": f"/tx/{record['tx_hash']}",
+    }
+
+
+async def single_flight(
+    endpoint: str, response: Response, idempotency_key, caller: str, asset_hash, params: dict, fn
+):
+    """
+    Chạy phần gửi tx của endpoint ghi 1 lần cho các request trùng:
+    - cùng (endpoint, asset_hash) đang chạy -> chờ kết quả của request đầu (không gửi tx thứ 2)
+    - có header Idempotency-Key -> kết quả được trả lại cho request cùng caller + key
+      trong IDEMPOTENCY_TTL giây (caller: địa chỉ mà request đại diện; caller khác dùng
+      trùng key không nhận được kết quả của nhau)
+    Response dùng lại kết quả có header Idempotent-Replayed: true.
+
+    Raises:
+        HTTPException 409 nếu asset đang có request ghi khác tham số,
+        422 nếu Idempotency-Key đã dùng cho request khác tham số
+    """
+    fp = fingerprint(params)
+
+    key_flight = f"{endpoint}:key:{caller.lower()}:{idempotency_key}"
+
+    async def coalesced():
+        if asset_hash is None:
+            return await fn(), False
+        return await write_flights.run(f"{endpoint}:asset:{bytes(asset_hash).hex()}", fp, fn)
+
+    try:
+        if idempotency_key:
+            if len(idempotency_key) > 255:
+                raise HTTPException(status_code=400, detail="Idempotency-Key too long (max 255)")
+            (result, shared), replayed = await write_flights.run(key_flight, fp, coalesced, ttl=IDEMPOTENCY_TTL)
+            shared = shared or replayed
+        else:
+            result, shared = await coalesced()
+    except IdempotencyConflict as e:
+        # conflict theo asset không được lưu theo Idempotency-Key (không có status_code) -> retry được
+        if idempotency_key and e.args[0] == key_flight:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was used with different parameters")
+        raise HTTPException(status_code=409, detail="Another write for this asset is in progress")
+    if shared:
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+    return result
+
+
 # 1. Upload file lên IPFS (Pinata)
 @app.post("/ipfs/upload")
 async def ipfs_upload(file: UploadFile = File(...)):
-    content = await file.read()
-    cid = upload_bytes(file.filename, content)
+    # Starlette đã spool file ra temp file; async_upload đọc từng chunk từ đó
+    # và pin qua client httpx dùng chung (keep-alive, retry, giới hạn đồng thời)
+    try:
+        cid = await async_upload(file.filename, file.file, file.size)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadNotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    # file đã có sẵn trên đĩa -> đưa vào cache của GET /ipfs/{cid}
+    try:
+        await get_ipfs_gateway().seed(cid, file.file, file.content_type)
+    except Exception as e:
+        print("WARN ipfs cache seed:", e)
     return {
         "cid": cid,
-        "gateway": f"https://gateway.pinata.cloud/ipfs/{cid}"
+        "gateway": gateway_link(cid),
     }
 
 
@@ -39,14 +317,21 @@ async def ipfs_upload(file: UploadFile = File(...)):
 @app.post("/asset/register")
 async def asset_register(
     request: Request,
+    response: Response,
     user_address: str = Form(None),
-    x_user_address: str = Header(None)
+    x_user_address: str = Header(None),
+    idempotency_key: str = Header(None),
+    wait: bool = Query(None),
+    chain: RequestChain = Depends(get_request_chain),
 ):
     """
     Đăng ký asset mới.
     - Ai cũng có thể gọi endpoint này.
     - Hỗ trợ cả form-data và JSON body.
     - user_address sẽ trở thành owner của asset (tùy chọn).
+    - ?wait=false: trả tx hash ngay sau broadcast, tra trạng thái qua GET /tx/{hash}.
+    - Request trùng (double-click, retry) cho cùng asset dùng chung 1 tx; header Idempotency-Key
+      để được trả lại kết quả khi retry sau khi request đầu đã xong.
     """
     # Parse payload: hỗ trợ JSON body hoặc form-data
     asset_key = None
@@ -76,36 +361,46 @@ async def asset_register(
     if asset_key is None or cid is None:
         raise HTTPException(status_code=400, detail="asset_key và cid là bắt buộc (form hoặc JSON)")
 
+    registry, w3, owner = chain.registry, chain.w3, chain.owner
+
     # Parse user address (optional, nếu không có sẽ dùng private key từ .env)
     if user_address or x_user_address:
         user_addr = parse_user_address(user_address, x_user_address)
     else:
         # Dùng address từ PRIVATE_KEY trong .env
-        _, _, w3_init, owner_account = get_contracts()
-        user_addr = owner_account.address
-
-    registry, nft, w3, owner = get_contracts()
+        user_addr = owner.address
 
     # assetKey trong Solidity là bytes32 -> hash từ chuỗi khóa
-    asset_key_bytes = Web3.keccak(text=asset_key)
+    asset_key_bytes = asset_key_hash(asset_key)
 
-    try:
-        # New registerAsset signature accepts owner address so backend can register on behalf
-        tx_hash = build_and_send(
-            w3,
-            registry.functions.registerAsset(asset_key_bytes, cid, Web3.to_checksum_address(user_addr)),
-            owner,
-        )
-    except Exception as e:
-        # Trả lỗi rõ ràng cho client (chỉ dùng cho dev)
-        raise HTTPException(status_code=500, detail=f"Register failed: {str(e)}")
+    async def register():
+        try:
+            # New registerAsset signature accepts owner address so backend can register on behalf
+            # registerAsset không cần quyền owner -> ký bằng signer ít việc nhất trong pool
+            async with chain.signers.lease() as signer:
+                tx_hash, tx_extra = await send_tx(
+                    w3,
+                    registry.functions.registerAsset(asset_key_bytes, cid, Web3.to_checksum_address(user_addr)),
+                    signer,
+                    "register",
+                    wait,
+                    asset_hashes=[asset_key_bytes],
+                    chain=chain,
+                )
+        except Exception as e:
+            # Trả lỗi rõ ràng cho client (chỉ dùng cho dev)
+            raise HTTPException(status_code=500, detail=f"Register failed: {str(e)}")
 
-    return {
-        "tx_hash": tx_hash.hex(),
-        "asset_key": asset_key,
-        "cid": cid,
-        "user_address": user_addr
-    }
+        return {
+            "tx_hash": tx_hash.hex(),
+            "asset_key": asset_key,
+            "cid": cid,
+            "user_address": user_addr,
+            **tx_extra,
+        }
+
+    params = {"asset_key": asset_key, "cid": cid, "user_address": user_addr, "wait": wait}
+    return await single_flight("register", response, idempotency_key, user_addr, asset_key_bytes, params, register)
 
 
 # 3. Verify / unverify tài sản
@@ -113,24 +408,28 @@ async def asset_register(
 @app.post("/asset/verify")
 async def asset_verify(
     request: Request,
+    response: Response,
     user_address: str = Form(None),
-    x_user_address: str = Header(None)
+    x_user_address: str = Header(None),
+    idempotency_key: str = Header(None),
+    wait: bool = Query(None),
+    chain: RequestChain = Depends(get_request_chain),
 ):
     """
     Xác thực (verify) hoặc bỏ xác thực (unverify) asset.
     - Chỉ admin (contract owner) có quyền gọi.
     - user_address phải là admin address (từ form hoặc header).
+    - ?wait=false: trả tx hash ngay sau broadcast, tra trạng thái qua GET /tx/{hash}.
     """
+    registry, w3, owner = chain.registry, chain.w3, chain.owner
+
     # Kiểm tra quyền admin
     if user_address or x_user_address:
         admin_addr = parse_user_address(user_address, x_user_address)
-        check_admin(admin_addr)
     else:
         # Nếu không có param, dùng address từ PRIVATE_KEY (giả định là admin)
-        _, _, _, owner_account = get_contracts()
-        check_admin(owner_account.address)
-
-    registry, nft, w3, owner = get_contracts()
+        admin_addr = owner.address
+    check_admin(admin_addr)
 
     asset_key = None
     v_raw = None
@@ -166,55 +465,75 @@ async def asset_verify(
         raise HTTPException(status_code=400, detail="asset_key và verified là bắt buộc")
 
     # 5. Chuẩn hoá verified -> bool
-    if isinstance(v_raw, bool):
-        is_verified = v_raw
-    else:
-        v = str(v_raw).strip().lower()
-        is_verified = v in ["true", "1", "yes", "y", "on"]
+    is_verified = parse_bool(v_raw)
 
-    asset_key_bytes = Web3.keccak(text=asset_key)
+    asset_key_bytes = asset_key_hash(asset_key)
 
-    try:
-        tx_hash = build_and_send(
-            w3,
-            registry.functions.verifyAsset(asset_key_bytes, is_verified),
-            owner,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Verify failed: {str(e)}")
+    async def verify():
+        try:
+            tx_hash, tx_extra = await send_tx(
+                w3,
+                registry.functions.verifyAsset(asset_key_bytes, is_verified),
+                owner,
+                "verify",
+                wait,
+                asset_hashes=[asset_key_bytes],
+                chain=chain,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Verify failed: {str(e)}")
 
-    return {
-        "tx_hash": tx_hash.hex(),
-        "asset_key": asset_key,
-        "verified": is_verified,
-    }
+        return {
+            "tx_hash": tx_hash.hex(),
+            "asset_key": asset_key,
+            "verified": is_verified,
+            **tx_extra,
+        }
+
+    params = {"asset_key": asset_key, "verified": is_verified, "wait": wait}
+    return await single_flight("verify", response, idempotency_key, admin_addr, asset_key_bytes, params, verify)
 
 
 # 4. Truy xuất thông tin tài sản
 # PUBLIC: bất kỳ ai cũng có thể xem
 @app.get("/asset/get")
-async def asset_get(asset_key: str):
+async def asset_get(asset_key: str, source: str = "chain"):
     """
     Lấy thông tin chi tiết của một asset.
     - Ai cũng có thể gọi endpoint này (public).
+    - ?source=index: đọc từ event index (SQLite) nếu indexer đang chạy, kèm indexed_block
+      để biết độ mới; asset chưa có trong index thì fallback gọi chain.
     """
-    registry, nft, w3, _ = get_contracts()
+    asset_key_bytes = asset_key_hash(asset_key)
 
-    asset_key_bytes = Web3.keccak(text=asset_key)
+    if source == "index" and get_indexer() is not None:
+        idx = get_indexer()
+        # đọc SQLite trong thread: không chờ khoá của IndexStore trên event loop
+        record = await asyncio.to_thread(idx.store.get_asset, asset_key_bytes)
+        if record is not None:
+            return {
+                "asset_key": asset_key,
+                "owner": record["owner"],
+                "verified": record["verified"],
+                "tokenId": record["tokenId"],
+                "ipfsCid": record["ipfsCid"],
+                "ipfsGateway": gateway_link(record["ipfsCid"]),
+                "source": "index",
+                "indexed_block": idx.checkpoint,
+                "head_block": idx.head,
+            }
 
-    # Gọi contract: ưu tiên mapping public assets, nếu không có thì dùng getAsset(...)
+    chain = await get_request_chain()
+    registry = chain.registry
+
+    # getAsset qua eth_call thô (asset_codec), decode theo vị trí vào Asset
     try:
-        result = registry.functions.getAsset(asset_key_bytes).call()
-    except ABIFunctionNotFound:
-        raise HTTPException(
-            status_code=500,
-            detail="Contract không có function 'getAsset' trong ABI. Kiểm tra lại AssetRegistry.sol hoặc ABI."
-        )
+        result = await chain.get_asset(asset_key_bytes)
     except BadFunctionCallOutput as e:
         # Thường xảy ra khi không có code tại address (contract chưa deploy ở chain này),
         # hoặc ABI/chức năng không khớp khiến decode thất bại.
         try:
-            code = w3.eth.get_code(registry.address)
+            code = await chain.get_code(registry.address)
             code_len = len(code)
         except Exception:
             code_len = None
@@ -226,60 +545,190 @@ async def asset_get(asset_key: str):
         )
         raise HTTPException(status_code=502, detail=detail)
 
-    # result phải là tuple / list
-    if not isinstance(result, (list, tuple)):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Kiểu dữ liệu trả về bất ngờ từ contract: {type(result)}"
-        )
+    return result.to_dict(asset_key, gateway_link)
 
-    # Tự nhận diện từng field theo kiểu
-    # owner: string địa chỉ 0x...
-    owner = next(
-        (x for x in result if isinstance(x, str) and x.startswith("0x") and len(x) == 42),
-        None,
-    )
-    # verified: bool (lưu ý bool là subclass của int nên dùng type(x) is bool)
-    verified = next(
-        (x for x in result if type(x) is bool),
-        None,
-    )
-    # tokenId: int nhưng không phải bool
-    token_id = next(
-        (x for x in result if isinstance(x, int) and type(x) is not bool),
-        None,
-    )
-    # ipfsCid: string không phải địa chỉ 0x...
-    ipfs_cid = next(
-        (x for x in result if isinstance(x, str) and not x.startswith("0x")),
-        None,
-    )
 
-    if owner is None or verified is None or token_id is None or ipfs_cid is None:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Không parse được tuple asset từ contract: {result}"
-        )
+# 4b. Tra cứu nhiều asset trong 1 request (getAssets view hoặc JSON-RPC batch)
+def format_asset(asset_key: str, result: Asset) -> dict:
+    """Asset -> dict trả cho client (kèm found=True)."""
+    out = result.to_dict(asset_key, gateway_link)
+    out["found"] = True
+    return out
 
-    return {
-        "asset_key": asset_key,
-        "owner": owner,
-        "verified": bool(verified),
-        "tokenId": int(token_id),
-        "ipfsCid": ipfs_cid,
-        "ipfsGateway": f"https://gateway.pinata.cloud/ipfs/{ipfs_cid}" if ipfs_cid else None,
-    }
+
+async def get_many_view(registry, hashes: list) -> list:
+    """getAssets(bytes32[]) theo chunk GET_MANY_CHUNK; trả list (result|None, error|None)."""
+    chunks = [hashes[i:i + GET_MANY_CHUNK] for i in range(0, len(hashes), GET_MANY_CHUNK)]
+    replies = await asyncio.gather(*(registry.functions.getAssets(c).call() for c in chunks))
+    out = []
+    for found, records in replies:
+        for ok, rec in zip(found, records):
+            out.append((Asset(*rec), None) if ok else (None, "Not found"))
+    return out
+
+
+def is_revert_error(message: str) -> bool:
+    """Lỗi eth_call là revert của contract (không phải lỗi transport / node)."""
+    return "revert" in (message or "").lower()
+
+
+async def get_many_rpc_batch(registry, w3, hashes: list) -> list:
+    """
+    Fallback cho contract chưa có getAssets: mỗi key 1 eth_call getAsset, gộp chung 1 JSON-RPC batch.
+    getAsset chỉ revert khi asset chưa đăng ký -> "Not found" như found=false của getAssets.
+    """
+    calls = [("eth_call", [{"to": registry.address, "data": encode_get_asset(h)}, "latest"]) for h in hashes]
+    out = []
+    for i in range(0, len(calls), GET_MANY_CHUNK):
+        for result, error in await async_rpc_batch(calls[i:i + GET_MANY_CHUNK]):
+            if error is not None:
+                out.append((None, "Not found" if is_revert_error(error) else error))
+            else:
+                out.append((decode_asset(result), None))
+    return out
+
+
+async def resolve_assets(keys: list):
+    """
+    asset_key -> (Asset|None, error|None): asset_cache trước, phần thiếu đọc bằng getAssets
+    (fallback JSON-RPC batch getAsset). Trả (resolved, method).
+    """
+    registry, nft, w3, _ = await get_async_contracts()
+
+    resolved = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        h = asset_key_hash(key)
+        cached = asset_cache.get(h)
+        if cached is not None:
+            resolved[key] = (cached, None)
+        else:
+            missing.append((key, h))
+
+    method = "cache"
+    if missing:
+        hashes = [h for _, h in missing]
+        try:
+            replies = await get_many_view(registry, hashes)
+            method = "getAssets"
+        except Exception:
+            try:
+                replies = await get_many_rpc_batch(registry, w3, hashes)
+                method = "rpc-batch"
+            except Exception as e:
+                replies = [(None, f"RPC error: {str(e)}")] * len(hashes)
+        for (key, h), (result, error) in zip(missing, replies):
+            if result is not None:
+                asset_cache.put(h, result)
+            resolved[key] = (result, error)
+    return resolved, method
+
+
+@app.post("/asset/get-many")
+async def asset_get_many(request: Request):
+    """
+    Lấy nhiều asset trong 1 request (public).
+    - JSON body: {"asset_keys": ["doc-001", ...]} hoặc list trực tiếp.
+    - Ưu tiên asset_cache, phần còn thiếu đọc bằng getAssets(bytes32[]);
+      contract cũ chưa có getAssets thì dùng JSON-RPC batch getAsset.
+    - results giữ đúng thứ tự asset_keys; key không tồn tại/lỗi có found=false + error.
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        data = None
+    keys = data.get("asset_keys") or data.get("assetKeys") if isinstance(data, dict) else data
+    if not isinstance(keys, list) or not keys or not all(isinstance(k, str) for k in keys):
+        raise HTTPException(status_code=400, detail="asset_keys (list string) là bắt buộc")
+    if len(keys) > GET_MANY_MAX:
+        raise HTTPException(status_code=400, detail=f"Tối đa {GET_MANY_MAX} asset_keys mỗi request")
+
+    resolved, method = await resolve_assets(keys)
+
+    results = []
+    for key in keys:
+        result, error = resolved[key]
+        if result is None:
+            results.append({"asset_key": key, "found": False, "error": error})
+        else:
+            results.append(format_asset(key, result))
+    return {"results": results, "method": method}
+
+
+# 4c. Kiểm tra file có đúng nội dung đã đăng ký (so CID tính tại server với ipfsCid on-chain)
+async def onchain_cids(keys: list) -> dict:
+    """asset_key -> ipfsCid on-chain (None nếu chưa đăng ký). Raises HTTPException 502 nếu lỗi RPC."""
+    resolved, _ = await resolve_assets(keys)
+    out = {}
+    for key, (result, error) in resolved.items():
+        if result is None and error != "Not found":
+            raise HTTPException(status_code=502, detail=f"Cannot read asset {key}: {error}")
+        out[key] = result.ipfs_cid if result is not None else None
+    return out
+
+
+@app.post("/asset/check-content")
+async def asset_check_content(request: Request, asset_key: str = Query(None)):
+    """
+    So file với ipfsCid on-chain của asset (public, không ghi gì).
+
+    - Body thô (application/octet-stream) + ?asset_key=...: CID tính trong lúc nhận body, không lưu file.
+      Asset chưa đăng ký -> 404 trước khi đọc body.
+    - multipart/form-data: các field file + asset_key theo cặp, cùng thứ tự (tối đa CHECK_CONTENT_MAX_FILES);
+      các file được tính CID song song.
+
+    Returns:
+        1 kết quả (body thô) hoặc {"results": [...], "matched": n}; status match/mismatch/not_found/unsupported_cid
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        if not asset_key:
+            raise HTTPException(status_code=400, detail="asset_key là bắt buộc")
+        onchain = (await onchain_cids([asset_key]))[asset_key]
+        if onchain is None:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        version = cid_version(onchain)
+        if version is None:
+            return check_result(asset_key, onchain)
+        cid, size = await async_stream_cid(request.stream(), version)
+        return check_result(asset_key, onchain, cid, size)
+
+    form = await request.form(max_files=CHECK_CONTENT_MAX_FILES)
+    try:
+        files = form.getlist("file")
+        keys = form.getlist("asset_key")
+        if not files or len(files) != len(keys) or not all(hasattr(f, "read") for f in files):
+            raise HTTPException(
+                status_code=400, detail="Cần các cặp field file + asset_key (cùng số lượng, cùng thứ tự)"
+            )
+        cids = await onchain_cids(keys)
+
+        async def check(key, upload):
+            onchain = cids[key]
+            version = cid_version(onchain) if onchain is not None else None
+            if version is None:
+                return check_result(key, onchain, filename=upload.filename)
+            cid, size = await async_file_cid(upload.file, version)
+            return check_result(key, onchain, cid, size, upload.filename)
+
+        results = await asyncio.gather(*(check(k, f) for k, f in zip(keys, files)))
+    finally:
+        await form.close()
+    return {"results": results, "matched": sum(r["match"] for r in results)}
 
 
 # 5. Chuyển quyền sở hữu asset
 # ASSET OWNER ONLY: chỉ chủ sở hữu asset mới có thể transfer
 @app.post("/asset/transfer")
 async def asset_transfer(
+    response: Response,
     asset_key: str = Form(...),
     to_address: str = Form(...),
     user_address: str = Form(None),
     owner_private_key: str = Form(None),
-    x_user_address: str = Header(None)
+    x_user_address: str = Header(None),
+    idempotency_key: str = Header(None),
+    wait: bool = Query(None),
+    chain: RequestChain = Depends(get_request_chain),
 ):
     """
     Chuyển quyền sở hữu asset sang địa chỉ khác.
@@ -287,15 +736,17 @@ async def asset_transfer(
     - user_address phải là hiện tại owner của asset.
     - Nếu owner_private_key được cung cấp, backend sẽ ký tx với private key đó.
       Nếu không, sẽ dùng PRIVATE_KEY từ .env (fallback).
+    - ?wait=false: trả tx hash ngay sau broadcast, tra trạng thái qua GET /tx/{hash}.
     """
-    # Kiểm tra quyền asset owner
+    registry, w3, owner = chain.registry, chain.w3, chain.owner
+
+    # Kiểm tra quyền asset owner (asset đọc 1 lần, memo trong chain của request)
     if user_address or x_user_address:
         owner_addr = parse_user_address(user_address, x_user_address)
-        check_asset_owner(asset_key, owner_addr)
     else:
         # Nếu không có param, dùng address từ PRIVATE_KEY
-        _, _, _, owner_account = get_contracts()
-        check_asset_owner(asset_key, owner_account.address)
+        owner_addr = owner.address
+    await async_check_asset_owner(asset_key, owner_addr, chain)
 
     # Kiểm tra to_address hợp lệ
     try:
@@ -306,8 +757,7 @@ async def asset_transfer(
             detail="Invalid to_address format"
         )
 
-    registry, nft, w3, owner = get_contracts()
-    asset_key_bytes = Web3.keccak(text=asset_key)
+    asset_key_bytes = asset_key_hash(asset_key)
 
     # Nếu có owner_private_key, dùng nó để ký tx; nếu không, dùng owner từ .env
     signer = owner
@@ -317,23 +767,475 @@ async def asset_transfer(
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid owner_private_key: {str(e)}")
 
+    async def transfer():
+        try:
+            tx_hash, tx_extra = await send_tx(
+                w3,
+                registry.functions.transferAsset(asset_key_bytes, to_addr),
+                signer,
+                "transfer",
+                wait,
+                asset_hashes=[asset_key_bytes],
+                chain=chain,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Transfer failed: {str(e)}")
+
+        return {
+            "tx_hash": tx_hash.hex(),
+            "asset_key": asset_key,
+            "to_address": to_addr,
+            **tx_extra,
+        }
+
+    params = {"asset_key": asset_key, "to_address": to_addr, "signer": signer.address, "wait": wait}
+    return await single_flight("transfer", response, idempotency_key, owner_addr, asset_key_bytes, params, transfer)
+
+# 5b. Batch register / verify (registerAssets / verifyAssets)
+async def read_batch_items(request: Request):
+    """Đọc JSON body dạng {"items": [...], ...} hoặc list trực tiếp."""
+    try:
+        data = await request.json()
+    except Exception:
+        data = None
+    if isinstance(data, list):
+        data = {"items": data}
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="items (list trong JSON body) là bắt buộc")
+    return data, items
+
+
+async def send_batch(w3, signer, entries: list, build_tx, kind: str, wait: bool = None):
+    """
+    Chia entries thành các chunk (<= BATCH_MAX_ITEMS item, gas <= BATCH_MAX_GAS) và gửi
+    mỗi chunk bằng 1 tx. Các chunk được gửi đồng thời (nonce cấp bởi NonceManager).
+    Ước lượng gas + chia chunk xong mới lease signer, mỗi chunk cuối cùng 1 lease.
+
+    Args:
+        signer: account ký mọi chunk, hoặc SignerPool (mỗi chunk lấy signer ít việc nhất)
+        entries: danh sách item đã validate
+        build_tx: hàm chunk -> ContractFunction (registerAssets/verifyAssets)
+
+    Returns:
+        list dict theo từng chunk: {"entries", "tx_hash", "receipt", "extra", "error"}
+    """
+    if wait is None:
+        wait = TX_WAIT_RECEIPT
+
+    # registerAssets/verifyAssets tốn gas như nhau với mọi signer -> ước lượng bằng 1 địa chỉ
+    estimate_from = signer.primary.address if isinstance(signer, SignerPool) else signer.address
+
+    async def plan(chunk):
+        """Chunk sẽ gửi [{"entries", "gas_limit"}] (chia đôi khi quá BATCH_MAX_GAS), lỗi: [{"entries", "error"}]."""
+        try:
+            estimate = await build_tx(chunk).estimate_gas({"from": estimate_from})
+        except Exception as e:
+            return [{"entries": chunk, "error": f"estimate_gas failed: {str(e)}"}]
+
+        gas = int(estimate * BATCH_GAS_MARGIN)
+        if gas > BATCH_MAX_GAS and len(chunk) > 1:
+            # chunk vẫn quá lớn so với block gas limit -> chia đôi
+            mid = len(chunk) // 2
+            halves = await asyncio.gather(plan(chunk[:mid]), plan(chunk[mid:]))
+            return halves[0] + halves[1]
+        return [{"entries": chunk, "gas_limit": gas}]
+
+    async def send_chunk(out):
+        if "error" in out:
+            return out
+        # chỉ lease sau khi đã chia xong: mỗi chunk đúng 1 lease / 1 signer
+        if isinstance(signer, SignerPool):
+            async with signer.lease() as leased:
+                return await send_chunk_as(out, leased)
+        return await send_chunk_as(out, signer)
+
+    async def send_chunk_as(out, signer):
+        chunk, gas = out["entries"], out["gas_limit"]
+        tx_func = build_tx(chunk)
+        out["fees"] = {}
+        invalidate = invalidate_assets([e["key_bytes"] for e in chunk])
+        try:
+            tx_hash = await async_build_and_send(w3, tx_func, signer, wait=False, gas=gas, info=out["fees"])
+        except Exception as e:
+            out["error"] = str(e)
+            return out
+        invalidate()
+
+        out["tx_hash"] = tx_hash.hex()
+        if wait:
+            try:
+                out["receipt"] = await async_wait_for_receipt(w3, tx_hash, signer)
+            except Exception as e:
+                out["error"] = f"Receipt wait failed: {str(e)}"
+            invalidate()
+        else:
+            record = tx_tracker.track(
+                tx_hash, async_wait_for_receipt(w3, tx_hash, signer), kind=kind, on_complete=invalidate,
+                assets=[e["key_bytes"] for e in chunk],
+            )
+            out["status_url"] = f"/tx/{record['tx_hash']}"
+        return out
+
+    chunks = [entries[i:i + BATCH_MAX_ITEMS] for i in range(0, len(entries), BATCH_MAX_ITEMS)]
+    planned = [out for group in await asyncio.gather(*(plan(c) for c in chunks)) for out in group]
+    return list(await asyncio.gather(*(send_chunk(out) for out in planned)))
+
+
+def batch_item_results(sent: list, results: list, event, done_status: str, skip_reason: str):
+    """
+    Điền kết quả từng item (theo thứ tự request) từ event trong receipt của mỗi chunk.
+    Item có event -> done_status; không có event -> skipped (contract bỏ qua item đó).
+    """
+    transactions = []
+    for chunk in sent:
+        tx_info = {"tx_hash": chunk.get("tx_hash"), "items": len(chunk["entries"]), "fees": chunk.get("fees")}
+        receipt = chunk.get("receipt")
+        emitted = {}
+        if receipt is not None:
+            tx_info["status"] = "mined" if receipt["status"] == 1 else "failed"
+            tx_info["gas_used"] = receipt["gasUsed"]
+            for ev in event().process_receipt(receipt, errors=DISCARD):
+                emitted[bytes(ev["args"]["assetHash"])] = ev["args"]
+        elif chunk.get("status_url"):
+            tx_info["status"] = "pending"
+            tx_info["status_url"] = chunk["status_url"]
+        if chunk.get("error"):
+            tx_info["error"] = chunk["error"]
+        transactions.append(tx_info)
+
+        for entry in chunk["entries"]:
+            res = results[entry["index"]]
+            res["tx_hash"] = chunk.get("tx_hash")
+            if chunk.get("error"):
+                res["status"] = "error"
+                res["error"] = chunk["error"]
+            elif receipt is None:
+                res["status"] = "submitted"
+            elif receipt["status"] != 1:
+                res["status"] = "error"
+                res["error"] = "Transaction reverted"
+            elif bytes(entry["key_bytes"]) in emitted:
+                res["status"] = done_status
+                args = emitted[bytes(entry["key_bytes"])]
+                if "tokenId" in args:
+                    res["tokenId"] = int(args["tokenId"])
+            else:
+                res["status"] = "skipped"
+                res["reason"] = skip_reason
+    return transactions
+
+
+@app.post("/asset/register-batch")
+async def asset_register_batch(
+    request: Request,
+    response: Response,
+    x_user_address: str = Header(None),
+    idempotency_key: str = Header(None),
+    wait: bool = Query(None),
+):
+    """
+    Đăng ký nhiều asset trong ít transaction (registerAssets).
+    - Ai cũng có thể gọi (giống /asset/register).
+    - JSON body: {"items": [{"asset_key", "cid", "user_address"?}], "user_address"?}
+      user_address của item > user_address chung > X-User-Address > PRIVATE_KEY.
+    - Payload lớn được chia chunk theo BATCH_MAX_ITEMS / BATCH_MAX_GAS.
+    - results giữ thứ tự items: registered / skipped (đã tồn tại) / invalid / error / submitted.
+    - Header Idempotency-Key: retry cùng key trả lại kết quả lần đầu thay vì gửi lại batch.
+    """
+    data, items = await read_batch_items(request)
+    registry, nft, w3, owner = await get_async_contracts()
+
+    if data.get("user_address") or x_user_address:
+        default_owner = parse_user_address(data.get("user_address"), x_user_address)
+    else:
+        default_owner = owner.address
+
+    results = []
+    entries = []
+    seen = set()
+    for i, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        asset_key = item.get("asset_key") or item.get("assetKey")
+        cid = item.get("cid") or item.get("ipfsCid")
+        res = {"asset_key": asset_key, "cid": cid}
+        results.append(res)
+
+        if not asset_key or not cid:
+            res.update(status="invalid", error="asset_key và cid là bắt buộc")
+            continue
+        if asset_key in seen:
+            res.update(status="invalid", error="asset_key bị trùng trong batch")
+            continue
+        try:
+            item_owner = Web3.to_checksum_address(item.get("user_address") or default_owner)
+        except Exception:
+            res.update(status="invalid", error="Invalid Ethereum address format")
+            continue
+
+        seen.add(asset_key)
+        res["user_address"] = item_owner
+        entries.append({
+            "index": i,
+            "key_bytes": asset_key_hash(asset_key),
+            "cid": cid,
+            "owner": item_owner,
+        })
+
+    async def register_batch():
+        transactions = []
+        if entries:
+            sent = await send_batch(
+                w3,
+                await get_signer_pool(),
+                entries,
+                lambda chunk: registry.functions.registerAssets(
+                    [e["key_bytes"] for e in chunk],
+                    [e["cid"] for e in chunk],
+                    [e["owner"] for e in chunk],
+                ),
+                "register-batch",
+                wait,
+            )
+            transactions = batch_item_results(
+                sent, results, registry.events.AssetRegistered, "registered", "Asset exists"
+            )
+
+        return {"results": results, "transactions": transactions}
+
+    params = {"results": results, "wait": wait}
+    return await single_flight(
+        "register-batch", response, idempotency_key, default_owner, None, params, register_batch
+    )
+
+
+@app.post("/asset/verify-batch")
+async def asset_verify_batch(
+    request: Request,
+    response: Response,
+    x_user_address: str = Header(None),
+    idempotency_key: str = Header(None),
+    wait: bool = Query(None),
+):
+    """
+    Verify / unverify nhiều asset trong ít transaction (verifyAssets).
+    - Chỉ admin (giống /asset/verify).
+    - JSON body: {"items": [{"asset_key", "verified"}], "user_address"?}
+    - results giữ thứ tự items: updated / skipped (không tìm thấy) / invalid / error / submitted.
+    - Header Idempotency-Key: như /asset/register-batch.
+    """
+    data, items = await read_batch_items(request)
+    registry, nft, w3, owner = await get_async_contracts()
+
+    if data.get("user_address") or x_user_address:
+        admin_addr = parse_user_address(data.get("user_address"), x_user_address)
+    else:
+        admin_addr = owner.address
+    check_admin(admin_addr)
+
+    results = []
+    entries = []
+    for i, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        asset_key = item.get("asset_key") or item.get("assetKey")
+        v_raw = item.get("verified", item.get("isVerified", item.get("status")))
+        res = {"asset_key": asset_key}
+        results.append(res)
+
+        if not asset_key or v_raw is None:
+            res.update(status="invalid", error="asset_key và verified là bắt buộc")
+            continue
+
+        res["verified"] = parse_bool(v_raw)
+        entries.append({
+            "index": i,
+            "key_bytes": asset_key_hash(asset_key),
+            "verified": res["verified"],
+        })
+
+    async def verify_batch():
+        transactions = []
+        if entries:
+            sent = await send_batch(
+                w3,
+                owner,
+                entries,
+                lambda chunk: registry.functions.verifyAssets(
+                    [e["key_bytes"] for e in chunk],
+                    [e["verified"] for e in chunk],
+                ),
+                "verify-batch",
+                wait,
+            )
+            transactions = batch_item_results(
+                sent, results, registry.events.AssetVerified, "updated", "Not found"
+            )
+
+        return {"results": results, "transactions": transactions}
+
+    params = {"results": results, "wait": wait}
+    return await single_flight("verify-batch", response, idempotency_key, admin_addr, None, params, verify_batch)
+
+
+# 6. Trạng thái transaction (dùng với chế độ fire-and-track ?wait=false)
+@app.get("/tx/{tx_hash}")
+async def tx_status(tx_hash: str, wait: float = 0):
+    """
+    Trả trạng thái tx: pending / mined / failed (+ block, gas used).
+    - ?wait=N: long-poll tối đa N giây (giới hạn TX_LONG_POLL_MAX) tới khi tx hết pending.
+    - Tx không do server này theo dõi (ví dụ sau restart) thì hỏi trực tiếp node.
+    """
+    if not (tx_hash.startswith("0x") and len(tx_hash) == 66):
+        raise HTTPException(status_code=400, detail="Invalid tx hash format")
+
+    wait = max(0.0, min(wait, TX_LONG_POLL_MAX))
+    record = await tx_tracker.wait_status(tx_hash, wait)
+    if record is not None and (record["status"] != "pending" or record["completed_at"] is None):
+        return record
+
+    _, _, w3, _ = await get_async_contracts()
+    try:
+        receipt = await w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        receipt = None
+
+    out = record or {"tx_hash": tx_hash.lower(), "kind": None}
+    if receipt is not None:
+        out.update(tx_tracker.receipt_to_record(receipt))
+        return out
+
+    try:
+        await w3.eth.get_transaction(tx_hash)
+    except TransactionNotFound:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    out["status"] = "pending"
+    return out
+
+
+# 7. Event stream (SSE / WebSocket) thay cho việc client poll /asset/get
+def parse_stream_params(asset, asset_hash, owner, events, from_block, cursor):
+    """
+    Bộ lọc + cursor resume chung cho /events/stream và /events/ws.
+
+    Returns:
+        (filters, start) - filters là kwargs cho event_hub.subscribe, start là (block, logIndex) hoặc None
+
+    Raises:
+        HTTPException 400 nếu tham số sai, 503 nếu cần resume mà indexer không chạy
+    """
+    def split(raw):
+        return [v.strip() for v in raw.split(",") if v.strip()] if raw else []
+
+    assets = [asset_key_hash(k) for k in split(asset)]
+    for h in split(asset_hash):
+        if not (h.startswith("0x") and len(h) == 66):
+            raise HTTPException(status_code=400, detail=f"Invalid asset_hash: {h}")
+        assets.append(h)
     try:
-        tx_hash = build_and_send(
-            w3,
-            registry.functions.transferAsset(asset_key_bytes, to_addr),
-            signer,
+        owners = [Web3.to_checksum_address(a) for a in split(owner)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid Ethereum address format")
+    names = split(events)
+    unknown = set(names) - set(STREAM_EVENT_NAMES)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown events: {sorted(unknown)}; allowed: {list(STREAM_EVENT_NAMES)}"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Transfer failed: {str(e)}")
 
-    return {
-        "tx_hash": tx_hash.hex(),
-        "asset_key": asset_key,
-        "to_address": to_addr,
-    }
+    start = None
+    if cursor:
+        try:
+            start = parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor, expected <block>:<logIndex>")
+    elif from_block is not None:
+        start = (from_block, -1)
+    if start is not None and event_hub.store is None:
+        raise HTTPException(status_code=503, detail="Event index is not running, resume is unavailable")
+    if event_hub.full():
+        raise HTTPException(status_code=503, detail="Too many event stream subscribers")
+    return {"assets": assets or None, "owners": owners or None, "names": names or None}, start
 
-import os
-print("DEBUG SEPOLIA_RPC:", os.getenv("SEPOLIA_RPC"))
+
+@app.get("/events/stream")
+async def events_stream(
+    asset: str = None,
+    asset_hash: str = None,
+    owner: str = None,
+    events: str = None,
+    from_block: int = None,
+    last_event_id: str = Header(None),
+):
+    """
+    Server-Sent Events: event của registry (cần INDEXER_ENABLED) + trạng thái tx fire-and-track.
+
+    - Lọc: ?asset=<key,...> | ?asset_hash=<0x...,...> | ?owner=<address,...> | ?events=AssetRegistered,...,tx
+    - Resume: header Last-Event-ID (EventSource tự gửi khi reconnect) hoặc ?from_block=N
+    - Client đọc chậm -> nhận event "overflow" rồi bị ngắt; reconnect với Last-Event-ID để đọc tiếp
+    """
+    filters, start = parse_stream_params(asset, asset_hash, owner, events, from_block, last_event_id)
+
+    async def body():
+        try:
+            sub = event_hub.subscribe(**filters)
+        except StreamFull:
+            return
+        try:
+            yield ": connected\n\n"
+            async for msg in event_hub.messages(sub, start):
+                yield format_sse(msg) if msg is not None else ": ping\n\n"
+        finally:
+            event_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/events/ws")
+async def events_ws(
+    websocket: WebSocket,
+    asset: str = None,
+    asset_hash: str = None,
+    owner: str = None,
+    events: str = None,
+    from_block: int = None,
+    cursor: str = None,
+):
+    """WebSocket tương đương /events/stream: mỗi message là 1 JSON, resume bằng ?cursor=<block>:<logIndex>."""
+    try:
+        filters, start = parse_stream_params(asset, asset_hash, owner, events, from_block, cursor)
+        sub = event_hub.subscribe(**filters)
+    except (HTTPException, StreamFull) as e:
+        await websocket.close(code=1008, reason=str(getattr(e, "detail", e)))
+        return
+
+    messages = event_hub.messages(sub, start)
+    try:
+        await websocket.accept()
+        async for msg in messages:
+            await websocket.send_json(msg if msg is not None else {"type": "ping"})
+        # overflow: báo xong thì đóng, client reconnect với cursor = resume_from
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await messages.aclose()
+        event_hub.unsubscribe(sub)
+
+
+@app.get("/events/stats")
+async def events_stats():
+    """Số subscriber đang nghe, message đã phát, buffer đang chờ của các client chậm nhất."""
+    return event_hub.stats()
+
+
+@app.get("/idempotency/stats")
+async def idempotency_stats():
+    """Request ghi đang chạy / kết quả Idempotency-Key đang lưu, số lần dùng lại và conflict."""
+    return write_flights.stats()
 
 
 @app.get("/admin")
@@ -343,13 +1245,168 @@ async def get_admin():
     return {"admin": admin}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Bộ đếm của asset cache (hit/miss/eviction...)."""
+    return asset_cache.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (endpoint latency, RPC theo method, receipt wait, Pinata, cache)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/fees")
+async def fees():
+    """Fee EIP-1559 hiện dùng cho tx (cache theo block) và baseline gas theo từng hàm."""
+    _, _, w3, _ = await get_async_contracts()
+    current = await fee_oracle.async_get_fees(w3)
+    return {"fees": describe_fees(current, None), "gas": gas_estimator.stats()}
+
+
+@app.get("/ipfs/stats")
+async def ipfs_stats():
+    """Bộ đếm upload IPFS: số lần, tổng bytes, throughput, index CID đã pin (dedup)."""
+    out = upload_stats()
+    index = get_cid_index()
+    out["cid_index"] = index.stats() if index is not None else None
+    out["gateway_cache"] = get_ipfs_gateway().stats()
+    return out
+
+
+class CidFileResponse(FileResponse):
+    """FileResponse với ETag = CID; nội dung theo CID không đổi nên If-Range khớp ETag là đủ để dùng Range."""
+
+    def _should_use_range(self, http_if_range, stat_result) -> bool:
+        return http_if_range == self.headers.get("etag") or super()._should_use_range(http_if_range, stat_result)
+
+
+@app.get("/ipfs/{cid}")
+async def ipfs_get(cid: str, request: Request, filename: str = None):
+    """
+    Nội dung IPFS theo CID từ cache trên đĩa (tải từ IPFS_GATEWAY_URL khi chưa có).
+    Hỗ trợ Range, ETag/If-None-Match (ETag = CID); ?filename= đặt tên + Content-Type khi tải về.
+    """
+    etag = f'"{cid}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    # nội dung của CID không đổi: client đã có bản nào thì bản đó luôn đúng
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    gateway = get_ipfs_gateway()
+    for _ in range(2):
+        try:
+            path, _, content_type = await gateway.get(cid)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except CidNotFound:
+            raise HTTPException(status_code=404, detail="CID not found")
+        except UpstreamError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        try:
+            stat_result = await asyncio.to_thread(os.stat, path)
+            break
+        except FileNotFoundError:
+            # bị xoá (evict) giữa lookup và stat -> tải lại 1 lần
+            gateway.cache.discard(cid)
+    else:
+        raise HTTPException(status_code=502, detail="Cached file disappeared")
+
+    return CidFileResponse(
+        path,
+        headers=headers,
+        media_type=(mimetypes.guess_type(filename)[0] if filename else None)
+        or content_type or "application/octet-stream",
+        filename=filename,
+        stat_result=stat_result,
+        content_disposition_type="inline",
+    )
+
+
+@app.get("/index/status")
+async def index_status():
+    """Trạng thái event indexer: block đã index, head, độ trễ, range eth_getLogs hiện tại."""
+    idx = get_indexer()
+    if idx is None:
+        return {"enabled": INDEXER_ENABLED, "running": False}
+    checkpoint = idx.checkpoint
+    return {
+        "enabled": INDEXER_ENABLED,
+        "running": True,
+        "start_block": idx.start_block,
+        "indexed_block": checkpoint,
+        "head_block": idx.head,
+        "lag_blocks": (idx.head - checkpoint) if (idx.head is not None and checkpoint is not None) else None,
+        "chunk_blocks": idx.chunk,
+    }
+
+
+@app.get("/health")
+async def health():
+    """Trạng thái kết nối RPC (cache vài giây, không tốn RPC mỗi lần gọi)."""
+    return await async_chain_health()
+
+
+@app.get("/rpc/pool")
+async def rpc_pool_stats():
+    """Latency / lỗi / trạng thái loại của từng RPC endpoint trong pool, số lần hedge, receipt watcher."""
+    try:
+        ctx = await init_async_chain(check_connection=False)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return dict(ctx.pool.stats(), receipts=get_receipt_watcher(ctx.w3).stats())
+
+
+@app.get("/signers")
+async def signers_stats():
+    """Các ví ký tx của backend: số tx đang xử lý, đã gửi, số dư (ETH), cờ số dư thấp."""
+    try:
+        signers = await get_signer_pool()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"signers": signers.stats(), "min_balance_eth": signers.min_balance_wei / 10 ** 18}
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: process còn phục vụ được (không gọi RPC) + thời gian import/boot."""
+    return {
+        "status": "ok",
+        "ready": _startup["ready"],
+        "import_seconds": _startup["import_seconds"],
+        "boot_seconds": _startup["boot_seconds"],
+        "prewarm_seconds": _startup["prewarm_seconds"],
+    }
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 khi cấu hình hợp lệ, chain context đã prewarm và RPC còn trả lời
+    (health cache vài giây); ngược lại 503 kèm lý do.
+    """
+    if _startup["config"] is None:
+        _startup["config"] = validate_config()
+    if not _startup["ready"] and time.monotonic() - _startup["attempted_at"] >= READY_RETRY_INTERVAL:
+        await _prewarm()
+    body = {"ready": _startup["ready"], "error": _startup["error"], "config": _startup["config"]}
+    if _startup["ready"]:
+        chain = await async_chain_health()
+        body["chain"] = chain
+        if not chain["ok"]:
+            body.update(ready=False, error=chain["error"])
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+
 @app.get("/debug/contracts")
 async def debug_contracts():
     """Debug helper: trả về địa chỉ contract theo .env và chiều dài code trên chain để kiểm tra deploy/accident.
     Useful for quick validation from browser.
     """
     try:
-        registry, nft, w3, owner = get_contracts()
+        registry, nft, w3, owner = await get_async_contracts()
     except Exception as e:
         return {"error": f"get_contracts failed: {str(e)}"}
 
@@ -358,8 +1415,8 @@ async def debug_contracts():
         out["registry_address"] = registry.address
         out["nft_address"] = nft.address
         try:
-            code_reg = w3.eth.get_code(registry.address)
-            code_nft = w3.eth.get_code(nft.address)
+            code_reg = await w3.eth.get_code(registry.address)
+            code_nft = await w3.eth.get_code(nft.address)
             out["registry_code_length"] = len(code_reg)
             out["nft_code_length"] = len(code_nft)
         except Exception as e:
@@ -375,3 +1432,6 @@ async def debug_contracts():
         return {"error": str(e)}
 
     return out
+
+
+_startup["import_seconds"] = time.perf_counter() - _IMPORT_STARTED
@@ -0,0 +1,133 @@
+"""
+Pool nhiều ví nóng (hot wallet) để ký các tx không cần quyền riêng (registerAsset/registerAssets).
+
+- Signer = account PRIVATE_KEY (owner của registry) + các key trong SIGNER_KEYS
+- Mỗi tx lấy signer đang ít việc nhất (số tx đang gửi / chờ receipt), nonce của từng
+  signer do NonceManager riêng cấp -> nhiều chuỗi nonce chạy song song
+- Số dư được làm mới nền mỗi SIGNER_BALANCE_TTL giây; signer dưới SIGNER_MIN_BALANCE_ETH
+  bị bỏ qua khi còn signer khác đủ tiền
+- Tx cần quyền owner (verifyAsset/verifyAssets) vẫn ký bằng PRIVATE_KEY, không qua pool
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import asynccontextmanager
+
+from metrics import SIGNER_BALANCE, SIGNER_INFLIGHT
+
+# Private key các signer phụ, cách nhau bởi dấu phẩy
+SIGNER_KEYS = [k.strip() for k in os.getenv("SIGNER_KEYS", "").split(",") if k.strip()]
+# Ngưỡng số dư tối thiểu (ETH) và chu kỳ làm mới số dư (giây)
+SIGNER_MIN_BALANCE_ETH = float(os.getenv("SIGNER_MIN_BALANCE_ETH", "0.005"))
+SIGNER_BALANCE_TTL = float(os.getenv("SIGNER_BALANCE_TTL", "60"))
+
+WEI_PER_ETH = 10 ** 18
+
+
+class _Slot:
+    __slots__ = ("account", "inflight", "sent", "balance", "index")
+
+    def __init__(self, account, index: int):
+        self.account = account
+        self.index = index
+        self.inflight = 0
+        self.sent = 0
+        self.balance = None  # wei, None = chưa biết
+
+
+class SignerPool:
+    """
+    Args:
+        accounts: LocalAccount; phần tử đầu là signer chính (owner)
+        w3: AsyncWeb3 để đọc số dư (None = không theo dõi số dư)
+        min_balance_wei: ngưỡng số dư thấp
+    """
+
+    def __init__(self, accounts: list, w3=None, min_balance_wei: int = None):
+        slots, seen = [], set()
+        for account in accounts:
+            if account.address not in seen:
+                seen.add(account.address)
+                slots.append(_Slot(account, len(slots)))
+        if not slots:
+            raise RuntimeError("Signer pool is empty")
+        self._slots = slots
+        self.w3 = w3
+        self.min_balance_wei = (
+            int(SIGNER_MIN_BALANCE_ETH * WEI_PER_ETH) if min_balance_wei is None else min_balance_wei
+        )
+        self._balances_at = 0.0
+        self._refresh_task = None
+
+    @property
+    def primary(self):
+        return self._slots[0].account
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _funded(self, slot: _Slot) -> bool:
+        return slot.balance is None or slot.balance >= self.min_balance_wei
+
+    def _pick(self) -> _Slot:
+        """Signer đủ tiền đang ít việc nhất (hoà thì ưu tiên signer ít tx đã gửi hơn)."""
+        candidates = [s for s in self._slots if self._funded(s)] or self._slots
+        return min(candidates, key=lambda s: (s.inflight, s.sent, s.index))
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Mượn 1 signer trong lúc build/gửi (và chờ receipt nếu có):
+
+            async with signers.lease() as signer:
+                await async_build_and_send(w3, tx_func, signer)
+        """
+        self._maybe_refresh()
+        slot = self._pick()
+        slot.inflight += 1
+        slot.sent += 1
+        SIGNER_INFLIGHT.labels(slot.account.address).set(slot.inflight)
+        try:
+            yield slot.account
+        finally:
+            slot.inflight -= 1
+            SIGNER_INFLIGHT.labels(slot.account.address).set(slot.inflight)
+
+    def _maybe_refresh(self):
+        if self.w3 is None or time.monotonic() - self._balances_at < SIGNER_BALANCE_TTL:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._balances_at = time.monotonic()
+            # context rỗng: RPC đọc số dư không tính vào X-RPC-Calls của request hiện tại
+            self._refresh_task = contextvars.Context().run(asyncio.ensure_future, self.refresh_balances())
+
+    async def refresh_balances(self) -> dict:
+        """Đọc số dư mọi signer (song song). Lỗi RPC -> giữ số dư cũ."""
+        self._balances_at = time.monotonic()
+        results = await asyncio.gather(
+            *(self.w3.eth.get_balance(s.account.address) for s in self._slots), return_exceptions=True
+        )
+        for slot, balance in zip(self._slots, results):
+            if isinstance(balance, Exception):
+                print(f"WARN signer balance {slot.account.address}:", balance)
+                continue
+            slot.balance = balance
+            SIGNER_BALANCE.labels(slot.account.address).set(balance / WEI_PER_ETH)
+            if balance < self.min_balance_wei:
+                print(f"WARN signer {slot.account.address} balance low: {balance / WEI_PER_ETH:.6f} ETH")
+        return {s.account.address: s.balance for s in self._slots}
+
+    def stats(self) -> list:
+        return [
+            {
+                "address": s.account.address,
+                "primary": s.index == 0,
+                "inflight": s.inflight,
+                "sent": s.sent,
+                "balance_eth": s.balance / WEI_PER_ETH if s.balance is not None else None,
+                "low_balance": not self._funded(s),
+            }
+            for s in self._slots
+        ]
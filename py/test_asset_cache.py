@@ -0,0 +1,80 @@
+"""
+Test AssetCache (LRU + TTL + invalidate) và read-through getAsset.
+
+Chạy: python -m pytest test_asset_cache.py -v
+"""
+
+import time
+from types import SimpleNamespace
+
+from eth_abi import encode
+
+import asset_cache
+from asset_cache import AssetCache
+
+H1 = b"\x01" * 32
+H2 = b"\x02" * 32
+H3 = b"\x03" * 32
+
+
+def test_lru_eviction_and_stats():
+    cache = AssetCache(maxsize=2, ttl=60)
+    cache.put(H1, "a")
+    cache.put(H2, "b")
+    assert cache.get(H1) == "a"      # H1 mới dùng -> H2 bị đẩy ra
+    cache.put(H3, "c")
+    assert cache.get(H2) is None
+    assert cache.get("0x" + "03" * 32) == "c"
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["evictions"] == 1 and stats["size"] == 2
+
+
+def test_ttl_and_invalidate():
+    cache = AssetCache(maxsize=10, ttl=0.01)
+    cache.put(H1, "a")
+    time.sleep(0.02)
+    assert cache.get(H1) is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.ttl = 60
+    cache.put(H1, "a")
+    cache.invalidate(H1)
+    assert cache.get(H1) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+class FakeEth:
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, params):
+        self.calls += 1
+        return encode(["(bytes32,string,address,bool,uint256)"], [(H1, "QmCid", OWNER, False, 1)])
+
+
+class FakeRegistry:
+    address = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+
+    def __init__(self):
+        self.w3 = SimpleNamespace(eth=FakeEth())
+
+    @property
+    def calls(self):
+        return self.w3.eth.calls
+
+
+def test_read_through_shared_between_call_sites(monkeypatch):
+    monkeypatch.setattr(asset_cache, "asset_cache", AssetCache(maxsize=10, ttl=60))
+    registry = FakeRegistry()
+    first = asset_cache.get_asset(registry, H1)
+    second = asset_cache.get_asset(registry, H1)
+    assert first == second and registry.calls == 1
+
+    asset_cache.on_registry_event({"name": "AssetVerified", "args": {"assetHash": H1}})
+    asset_cache.get_asset(registry, H1)
+    assert registry.calls == 2
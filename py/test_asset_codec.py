@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from eth_abi import encode
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput
+
+import asset_codec
+from asset_codec import (
+    Asset,
+    asset_key_hash,
+    decode_asset,
+    async_call_get_asset_by_token,
+    encode_get_asset,
+    encode_get_asset_by_token,
+)
+from ipfs_gateway import gateway_link
+
+OWNER = Web3.to_checksum_address("0x" + "ab" * 20)
+
+
+def _encoded(asset_hash, cid, owner, verified, token_id) -> bytes:
+    return encode(["(bytes32,string,address,bool,uint256)"], [(asset_hash, cid, owner, verified, token_id)])
+
+
+def test_encode_get_asset_matches_web3_abi():
+    h = asset_key_hash("key-1")
+    expected = Web3.keccak(text="getAsset(bytes32)")[:4] + h
+    assert encode_get_asset(h) == "0x" + expected.hex()
+    with pytest.raises(ValueError):
+        encode_get_asset(b"short")
+
+
+def test_encode_get_asset_by_token():
+    data = encode_get_asset_by_token(7)
+    assert data.startswith("0x" + bytes(Web3.keccak(text="getAssetByToken(uint256)")[:4]).hex())
+    assert int(data[-64:], 16) == 7
+
+
+def test_async_call_get_asset_by_token_decodes_eth_call():
+    h = asset_key_hash("key-token")
+    calls = []
+
+    class FakeEth:
+        async def call(self, params):
+            calls.append(params)
+            return _encoded(h, "QmCid", OWNER, True, 7)
+
+    w3 = type("W3", (), {"eth": FakeEth()})()
+    registry = "0x" + "cd" * 20
+    asset = asyncio.run(async_call_get_asset_by_token(w3, registry, 7))
+    assert asset == (h, "QmCid", OWNER, True, 7)
+    assert calls == [{"to": registry, "data": encode_get_asset_by_token(7)}]
+
+
+@pytest.mark.parametrize("cid", ["", "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o", "x" * 100])
+def test_decode_roundtrip(cid):
+    h = asset_key_hash("key-2")
+    raw = _encoded(h, cid, OWNER, True, 42)
+    for data in (raw, "0x" + raw.hex()):
+        asset = decode_asset(data)
+        assert isinstance(asset, Asset)
+        assert asset == (h, cid, OWNER, True, 42)
+        assert asset.owner == OWNER and asset.verified is True and asset.token_id == 42
+
+
+def test_decode_rejects_empty_and_truncated():
+    with pytest.raises(BadFunctionCallOutput):
+        decode_asset(b"")
+    raw = _encoded(b"\x01" * 32, "QmCid", OWNER, False, 1)
+    with pytest.raises(BadFunctionCallOutput):
+        decode_asset(raw[:-40])
+    with pytest.raises(BadFunctionCallOutput):
+        decode_asset(raw[:100])
+
+
+def test_asset_positional_access_and_dict():
+    asset = Asset(b"\x00" * 32, "QmCid", OWNER, False, 3)
+    assert asset[2] == OWNER and len(asset) == 5 and list(asset)[4] == 3
+    out = asset.to_dict("k", gateway_link)
+    assert out["asset_key"] == "k" and out["tokenId"] == 3 and out["ipfsGateway"].endswith("/QmCid")
+    assert Asset(b"\x00" * 32, "", OWNER, False, 0).to_dict(gateway_link=gateway_link)["ipfsGateway"] is None
+    assert asset.to_dict("k")["ipfsGateway"] is None
+
+
+def test_asset_key_hash_memoized():
+    asset_codec.asset_key_hash.cache_clear()
+    assert asset_key_hash("memo") == bytes(Web3.keccak(text="memo"))
+    asset_key_hash("memo")
+    assert asset_codec.asset_key_hash.cache_info().hits == 1
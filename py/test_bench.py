@@ -0,0 +1,85 @@
+"""
+Test phần thống kê của bench.py (không chạy benchmark) và chain context mà bench dựng trên
+eth-tester (bỏ qua nếu chưa cài eth-tester).
+
+Chạy: python -m pytest test_bench.py -v
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from bench import compare, percentile, serve_eth_tester, summarize, use_chain
+
+
+def test_percentile_interpolates():
+    samples = [4, 1, 3, 2, 5]
+    assert percentile(samples, 0) == 1
+    assert percentile(samples, 50) == 3
+    assert percentile(samples, 100) == 5
+    assert percentile([1, 2], 90) == 1.9
+
+
+def test_summarize_and_compare():
+    fast = summarize([0.001] * 10)
+    assert fast["n"] == 10 and round(fast["ops_per_sec"]) == 1000
+    assert round(fast["p99_ms"], 6) == 1.0
+
+    slow = summarize([0.002] * 10)
+    regressions = compare({"case": slow, "new": slow}, {"case": fast}, tolerance=0.25)
+    assert [r[0] for r in regressions] == ["case"]
+    assert compare({"case": fast}, {"case": slow}) == []
+
+
+@pytest.fixture
+def eth_tester_chain(monkeypatch):
+    """EVM eth-tester qua JSON-RPC HTTP; cấu hình chain được khôi phục sau test."""
+    pytest.importorskip("eth_tester")
+    from web3 import Web3
+    from web3.providers.eth_tester import EthereumTesterProvider
+
+    import util_contract
+
+    for name in ("SEPOLIA_RPC", "PRIVATE_KEY", "REGISTRY_ADDRESS", "NFT_ADDRESS"):
+        monkeypatch.setenv(name, os.getenv(name, ""))
+    for name in ("RPC_URL", "RPC_URLS", "RPC_WRITE_URLS", "PRIVATE_KEY", "REGISTRY_ADDRESS", "NFT_ADDRESS"):
+        monkeypatch.setattr(util_contract, name, getattr(util_contract, name))
+    # không cần artifacts: test chỉ dùng w3 / signer pool / receipt watcher của context
+    monkeypatch.setattr(util_contract, "load_abi", lambda: ([], []))
+
+    provider = EthereumTesterProvider()
+    rpc, url = serve_eth_tester(Web3(provider))
+    key = provider.ethereum_tester.backend.account_keys[0]
+    address = "0x" + "11" * 20
+    use_chain(url, key.to_hex() if hasattr(key, "to_hex") else key, address, address)
+    yield util_contract
+    util_contract.close_chain()
+    rpc.shutdown()
+    rpc.server_close()
+
+
+def test_bench_context_is_built_by_the_server_factory(eth_tester_chain):
+    util_contract = eth_tester_chain
+
+    async def run():
+        ctx = await util_contract.init_async_chain()
+        try:
+            # SignerPool có w3 -> _prewarm đọc được số dư
+            balances = await ctx.signers.refresh_balances()
+            assert balances[ctx.account.address] > 0
+            # receipt lấy bằng JSON-RPC batch qua RpcPool
+            assert ctx.pool is not None
+            assert util_contract.get_receipt_watcher(ctx.w3).batch is util_contract.async_rpc_batch
+
+            nonce = await ctx.w3.eth.get_transaction_count(ctx.account.address)
+            tx = util_contract._tx_params(ctx.w3, ctx.account, nonce, 21_000)
+            tx.update(to="0x" + "22" * 20, value=1, chainId=await ctx.w3.eth.chain_id)
+            tx_hash = await ctx.w3.eth.send_raw_transaction(ctx.account.sign_transaction(tx).rawTransaction)
+            receipt = await util_contract.async_wait_for_receipt(ctx.w3, tx_hash, ctx.account)
+            return receipt
+        finally:
+            await util_contract.close_async_chain()
+
+    receipt = asyncio.run(run())
+    assert receipt["status"] == 1 and receipt["gasUsed"] == 21_000
@@ -0,0 +1,112 @@
+"""
+Test /asset/check-content: CID tính dạng stream khớp compute_cid, so với CID on-chain (giả), không cần RPC.
+
+Chạy: python -m pytest test_content_check.py -v
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import content_check
+from asset_codec import Asset
+from cid import compute_cid
+
+DOC = os.urandom(700_000)
+OTHER = os.urandom(5_000)
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_stream_cid_matches_compute_cid(monkeypatch, version):
+    monkeypatch.setattr(content_check, "CHECK_CONTENT_READ_SIZE", 100_000)
+
+    async def chunks():
+        for i in range(0, len(DOC), 65_536):
+            yield DOC[i:i + 65_536]
+
+    cid, size = asyncio.run(content_check.async_stream_cid(chunks(), version))
+    assert cid == compute_cid(DOC, version) and size == len(DOC)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import server
+
+    onchain = {"deed-1": compute_cid(DOC), "deed-2": compute_cid(DOC, 1), "legacy": "ipfs-hash-v0?"}
+
+    async def fake_resolve(keys):
+        return {
+            k: (Asset(b"\0" * 32, onchain[k], OWNER, True, 1), None) if k in onchain else (None, "Not found")
+            for k in keys
+        }, "cache"
+
+    monkeypatch.setattr(server, "resolve_assets", fake_resolve)
+    return TestClient(server.app)
+
+
+def test_raw_body_stream(client):
+    ok = client.post("/asset/check-content", params={"asset_key": "deed-1"}, content=DOC,
+                     headers={"Content-Type": "application/octet-stream"})
+    assert ok.status_code == 200
+    assert ok.json()["status"] == "match" and ok.json()["size"] == len(DOC)
+
+    bad = client.post("/asset/check-content", params={"asset_key": "deed-2"}, content=OTHER)
+    assert bad.json()["status"] == "mismatch" and bad.json()["onchain_cid"] == compute_cid(DOC, 1)
+
+    assert client.post("/asset/check-content", params={"asset_key": "nope"}, content=DOC).status_code == 404
+    assert client.post("/asset/check-content", content=DOC).status_code == 400
+
+
+def test_multipart_batch(client):
+    res = client.post(
+        "/asset/check-content",
+        data={"asset_key": ["deed-1", "deed-2", "missing", "legacy"]},
+        files=[("file", ("a.pdf", DOC)), ("file", ("b.pdf", DOC)), ("file", ("c.pdf", OTHER)),
+               ("file", ("d.pdf", OTHER))],
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["status"] for r in body["results"]] == ["match", "match", "not_found", "unsupported_cid"]
+    assert body["matched"] == 2 and body["results"][1]["filename"] == "b.pdf"
+
+    uneven = client.post("/asset/check-content", data={"asset_key": ["deed-1"]},
+                         files=[("file", ("a.pdf", DOC)), ("file", ("b.pdf", DOC))])
+    assert uneven.status_code == 400
+
+
+def test_rpc_batch_revert_is_not_found_other_errors_are_502(monkeypatch):
+    import server
+    from asset_cache import asset_cache
+    from eth_abi import encode
+
+    found = encode(["(bytes32,string,address,bool,uint256)"], [(b"\1" * 32, compute_cid(DOC), OWNER, True, 1)])
+    replies = {
+        "deed-1": ("0x" + found.hex(), None),
+        "missing": (None, "execution reverted: Not found"),
+        "flaky": (None, "upstream connect error"),
+    }
+    calls = {server.asset_key_hash(k).hex(): k for k in replies}
+    registry = type("Registry", (), {"address": "0x" + "ab" * 20})()
+
+    async def fake_contracts():
+        return registry, None, None, None
+
+    async def no_view(registry, hashes):
+        raise ValueError("getAssets not in ABI")  # contract cũ -> fallback JSON-RPC batch
+
+    async def fake_batch(batch):
+        return [replies[calls[params[0]["data"][10:]]] for _, params in batch]
+
+    monkeypatch.setattr(server, "get_async_contracts", fake_contracts)
+    monkeypatch.setattr(server, "get_many_view", no_view)
+    monkeypatch.setattr(server, "async_rpc_batch", fake_batch)
+    asset_cache.clear()
+
+    cids = asyncio.run(server.onchain_cids(["deed-1", "missing"]))
+    assert cids == {"deed-1": compute_cid(DOC), "missing": None}
+    with pytest.raises(server.HTTPException) as exc:
+        asyncio.run(server.onchain_cids(["flaky"]))
+    assert exc.value.status_code == 502
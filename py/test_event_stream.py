@@ -0,0 +1,200 @@
+"""
+Test event stream (fan-out, lọc, resume, buffer giới hạn) + endpoint SSE / WebSocket, không cần RPC.
+
+Chạy: python -m pytest test_event_stream.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import event_stream
+from event_stream import EventHub, chain_message, tx_message
+from indexer import IndexStore
+
+ALICE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+BOB = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+SIGNER = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+H1 = "0x" + "11" * 32
+H2 = "0x" + "22" * 32
+TX = "0x" + "ab" * 32
+
+
+def registered(block, index, asset_hash, owner):
+    return {
+        "name": "AssetRegistered",
+        "args": {"assetHash": bytes.fromhex(asset_hash[2:]), "owner": owner, "tokenId": block, "cid": f"cid-{block}"},
+        "block_number": block,
+        "log_index": index,
+        "block_hash": "0x" + "00" * 32,
+        "tx_hash": "0x" + f"{block:064x}",
+    }
+
+
+def owner_assigned(block, index, asset_hash, owner):
+    return {
+        "name": "AssetOwnerAssigned",
+        "args": {"assetHash": bytes.fromhex(asset_hash[2:]), "owner": owner},
+        "block_number": block,
+        "log_index": index,
+        "tx_hash": "0x" + f"{block:064x}",
+    }
+
+
+def verified(block, index, asset_hash):
+    return {
+        "name": "AssetVerified",
+        "args": {"assetHash": bytes.fromhex(asset_hash[2:]), "verifier": BOB, "status": True},
+        "block_number": block,
+        "log_index": index,
+        "tx_hash": "0x" + f"{block:064x}",
+    }
+
+
+async def collect(gen, n):
+    out = []
+    async for msg in gen:
+        if msg is not None:
+            out.append(msg)
+        if len(out) == n:
+            break
+    await gen.aclose()
+    return out
+
+
+@pytest.fixture
+def server():
+    # import trong fixture (như test_startup): không đọc cấu hình .env lúc collect test
+    import server
+    return server
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = IndexStore(str(tmp_path / "index.db"))
+    yield s
+    s.close()
+
+
+def test_filters_by_asset_owner_and_event(store):
+    async def run():
+        hub = EventHub()  # không gắn store: lọc owner dùng owner do indexer gắn vào event
+        by_asset = hub.subscribe(assets=[H1])
+        by_owner = hub.subscribe(owners=[ALICE])
+        by_signer = hub.subscribe(owners=[SIGNER])
+        only_tx = hub.subscribe(names=["tx"])
+
+        # backend signer đăng ký H1 cho ALICE, H2 cho BOB; apply() gắn "owner" vào từng event
+        first = [registered(5, 0, H1, SIGNER), owner_assigned(5, 1, H1, ALICE),
+                 registered(5, 2, H2, SIGNER), owner_assigned(5, 3, H2, BOB)]
+        later = [verified(6, 0, H1)]
+        store.apply(first, 5)
+        store.apply(later, 6)
+        for ev in first + later:
+            hub.on_indexer_event(ev)
+        hub.on_tx_update({"tx_hash": TX, "kind": "verify", "status": "pending", "assets": [H2]})
+
+        def drain(sub):
+            return [sub.queue.get_nowait()["event"] for _ in range(sub.queue.qsize())]
+
+        return drain(by_asset), drain(by_owner), drain(by_signer), drain(only_tx)
+
+    by_asset, by_owner, by_signer, only_tx = asyncio.run(run())
+    assert by_asset == ["AssetRegistered", "AssetOwnerAssigned", "AssetVerified"]
+    assert by_owner == ["AssetRegistered", "AssetOwnerAssigned", "AssetVerified"]
+    assert by_signer == []  # AssetRegistered.owner là ví gửi tx, không phải owner
+    assert only_tx == ["tx"]
+
+
+def test_replay_then_live_without_duplicates(store):
+    async def run():
+        hub = EventHub()
+        hub.store = store
+        store.apply([registered(10, 0, H1, ALICE), registered(10, 1, H2, BOB)], 10)
+        sub = hub.subscribe()
+
+        # indexer ghi store rồi mới notify -> event 11:0 có cả trong store lẫn queue
+        store.apply([verified(11, 0, H1)], 11)
+        hub.on_indexer_event(verified(11, 0, H1))
+        hub.on_indexer_event(registered(12, 0, H2, BOB))
+
+        msgs = await collect(hub.messages(sub, (10, 0)), 3)
+        return msgs, hub.stats()["subscribers"]
+
+    msgs, subscribers = asyncio.run(run())
+    assert [m["id"] for m in msgs] == ["10:1", "11:0", "12:0"]
+    assert msgs[0]["asset_hash"] == H2 and msgs[0]["args"]["owner"] == BOB
+    assert subscribers == 0
+
+
+def test_slow_subscriber_is_cut_with_resume_cursor(monkeypatch):
+    monkeypatch.setattr(event_stream, "EVENT_STREAM_BUFFER", 3)
+
+    async def run():
+        hub = EventHub()
+        sub = hub.subscribe()
+        gen = hub.messages(sub, heartbeat=1)
+        hub.on_indexer_event(registered(1, 0, H1, ALICE))
+        first = await gen.__anext__()
+        for i in range(10):
+            hub.on_indexer_event(registered(2, i, H1, ALICE))
+        rest = [m async for m in gen]
+        return first, rest, sub.queue.qsize(), hub.stats()["subscribers"]
+
+    first, rest, backlog, subscribers = asyncio.run(run())
+    assert first["id"] == "1:0"
+    assert rest == [{"type": "overflow", "event": "overflow", "resume_from": "1:0"}]
+    assert backlog == 0 and subscribers == 0
+
+
+def test_sse_stream_replays_and_follows_tx_status(server, store, monkeypatch):
+    async def run():
+        monkeypatch.setattr(server.event_hub, "store", store)
+        store.apply([registered(7, 0, H1, ALICE)], 7)
+        response = await server.events_stream(
+            asset=None, asset_hash=H1, owner=None, events=None, from_block=None, last_event_id="6:0"
+        )
+        assert response.media_type == "text/event-stream"
+        frames = response.body_iterator
+
+        async def read(n):
+            return [await frames.__anext__() for _ in range(n)]
+
+        head = await read(2)
+
+        async def mined():
+            return {"status": 1, "blockNumber": 8, "gasUsed": 50000}
+
+        server.tx_tracker.track(TX, mined(), kind="verify", assets=[bytes.fromhex(H1[2:])])
+        tail = await read(2)
+        await frames.aclose()
+        return head + tail
+
+    connected, replayed, pending, done = asyncio.run(run())
+    assert connected.startswith(":")
+    assert replayed.startswith("id: 7:0\nevent: AssetRegistered\ndata: ")
+    assert "event: tx" in pending and '"status":"pending"' in pending and "id:" not in pending
+    assert '"status":"mined"' in done and '"block_number":8' in done
+    assert server.event_hub.stats()["subscribers"] == 0
+
+
+def test_stream_params_validation(server):
+    client = TestClient(server.app)
+    assert client.get("/events/stream", params={"owner": "0x123"}).status_code == 400
+    assert client.get("/events/stream", params={"events": "Minted"}).status_code == 400
+    assert client.get("/events/stream", headers={"Last-Event-ID": "abc"}).status_code == 400
+    # resume cần event index
+    assert client.get("/events/stream", params={"from_block": 1}).status_code == 503
+
+
+def test_websocket_receives_filtered_messages(server):
+    client = TestClient(server.app)
+    with client.websocket_connect(f"/events/ws?events=tx&asset_hash={H2}") as ws:
+        ws.portal.call(server.event_hub.on_tx_update, {"tx_hash": TX, "status": "pending", "assets": [H1]})
+        ws.portal.call(server.event_hub.on_tx_update, {"tx_hash": TX, "status": "mined", "assets": [H2]})
+        ws.portal.call(server.event_hub.on_indexer_event, registered(3, 0, H2, BOB))
+        ws.portal.call(server.event_hub.on_tx_update, {"tx_hash": TX, "status": "failed", "assets": [H2]})
+        first, second = ws.receive_json(), ws.receive_json()
+    assert (first["status"], second["status"]) == ("mined", "failed")
+    assert first["assets"] == [H2]
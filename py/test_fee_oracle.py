@@ -0,0 +1,100 @@
+"""
+Test fee oracle (eth_feeHistory, cache theo block) và baseline gas theo selector.
+
+Chạy: python -m pytest test_fee_oracle.py -v
+"""
+
+import asyncio
+
+from fee_oracle import GWEI, FeeOracle, GasEstimator, fees_from_history
+
+
+def history(oldest=100, base_gwei=(1, 1, 2), rewards_gwei=(0.5, 2, 1)):
+    return {
+        "oldestBlock": oldest,
+        "baseFeePerGas": [int(b * GWEI) for b in base_gwei],
+        "gasUsedRatio": [0.5] * (len(base_gwei) - 1),
+        "reward": [[int(r * GWEI)] for r in rewards_gwei],
+    }
+
+
+def test_fees_from_history():
+    fees = fees_from_history(history())
+    assert fees["block_number"] == 101
+    assert fees["base_fee_per_gas"] == 2 * GWEI
+    assert fees["max_priority_fee_per_gas"] == 1 * GWEI  # median reward
+    assert fees["max_fee_per_gas"] == 2 * 2 * GWEI + 1 * GWEI
+
+
+class FakeEth:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def fee_history(self, count, newest, percentiles):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ValueError("method not found")
+        return history(oldest=100 + self.calls)
+
+
+class FakeW3:
+    def __init__(self, **kwargs):
+        self.eth = FakeEth(**kwargs)
+
+
+def test_concurrent_callers_share_one_fee_history():
+    oracle, w3 = FeeOracle(ttl=60), FakeW3()
+
+    async def run():
+        return await asyncio.gather(*(oracle.async_get_fees(w3) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert w3.eth.calls == 1
+    assert all(r == results[0] for r in results)
+
+    # block mới -> fee cũ hết hạn
+    oracle.observe_block(results[0]["block_number"] + 1)
+    fees = asyncio.run(oracle.async_get_fees(w3))
+    assert w3.eth.calls == 2 and fees["block_number"] == results[0]["block_number"] + 1
+
+
+def test_fallback_when_fee_history_unsupported():
+    fees = asyncio.run(FeeOracle().async_get_fees(FakeW3(fail=True)))
+    assert fees["source"] == "fallback"
+    assert fees["max_fee_per_gas"] == 30 * GWEI
+
+
+class FakeFunc:
+    address = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+
+    def __init__(self, data, gas):
+        self.data, self.gas, self.estimated = data, gas, 0
+
+    def _encode_transaction_data(self):
+        return self.data
+
+    async def estimate_gas(self, tx):
+        self.estimated += 1
+        return self.gas
+
+
+def test_gas_estimator_memoizes_per_selector():
+    est = GasEstimator(margin=1.5, refresh=3)
+    short = FakeFunc("0xaabbccdd" + "00" * 64, 100_000)
+
+    assert asyncio.run(est.async_estimate(short, "0x1")) == 150_000
+    assert asyncio.run(est.async_estimate(short, "0x1")) == 150_000
+    assert short.estimated == 1
+
+    # calldata dài hơn baseline (ví dụ CID dài hơn) -> estimate lại, baseline lấy max
+    longer = FakeFunc("0xaabbccdd" + "00" * 128, 120_000)
+    assert asyncio.run(est.async_estimate(longer, "0x1")) == 180_000
+    assert longer.estimated == 1
+    assert asyncio.run(est.async_estimate(short, "0x1")) == 180_000
+
+    # selector khác -> baseline riêng
+    other = FakeFunc("0x11223344", 50_000)
+    assert asyncio.run(est.async_estimate(other, "0x1")) == 75_000
+    assert est.stats()["estimates"] == 3
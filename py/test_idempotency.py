@@ -0,0 +1,153 @@
+"""
+Test gộp request ghi trùng + Idempotency-Key: SingleFlight và endpoint /asset/register (chain giả, không cần RPC).
+
+Chạy: python -m pytest test_idempotency.py -v
+"""
+
+import asyncio
+import contextlib
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from idempotency import IdempotencyConflict, SingleFlight, fingerprint
+
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+OTHER = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+
+
+def test_concurrent_duplicates_run_once():
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "tx"
+
+    async def scenario():
+        flights = SingleFlight()
+        fp = fingerprint({"cid": "Qm1"})
+        results = await asyncio.gather(*(flights.run("register:a", fp, fn) for _ in range(5)))
+        # ttl=0: xong là bỏ, lần sau chạy lại
+        again = await flights.run("register:a", fp, fn)
+        return results, again, flights.stats()
+
+    results, again, stats = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert again == ("tx", False)
+    assert (stats["executed"], stats["shared"], stats["inflight"], stats["stored"]) == (2, 4, 0, 0)
+
+
+def test_stored_outcome_replayed_and_conflict():
+    calls = []
+
+    async def ok():
+        calls.append("ok")
+        return {"tx_hash": "0x1"}
+
+    async def scenario():
+        flights = SingleFlight()
+        first = await flights.run("k1", fingerprint({"a": 1}), ok, ttl=60)
+        replay = await flights.run("k1", fingerprint({"a": 1}), ok, ttl=60)
+        with pytest.raises(IdempotencyConflict):
+            await flights.run("k1", fingerprint({"a": 2}), ok, ttl=60)
+        expired = await flights.run("k2", "fp", ok, ttl=0.01)
+        await asyncio.sleep(0.02)
+        rerun = await flights.run("k2", "fp", ok, ttl=0.01)
+        return first, replay, expired, rerun, flights.stats()
+
+    first, replay, expired, rerun, stats = asyncio.run(scenario())
+    assert first == ({"tx_hash": "0x1"}, False) and replay == ({"tx_hash": "0x1"}, True)
+    assert expired[1] is False and rerun[1] is False and len(calls) == 3
+    assert stats["conflicts"] == 1 and stats["stored"] == 2
+
+
+def test_client_errors_stored_server_errors_retried():
+    calls = []
+
+    def failing(status):
+        async def fn():
+            calls.append(status)
+            raise HTTPException(status_code=status, detail="boom")
+        return fn
+
+    async def scenario():
+        flights = SingleFlight()
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await flights.run("bad", "fp", failing(400), ttl=60)
+            with pytest.raises(HTTPException):
+                await flights.run("rpc", "fp", failing(500), ttl=60)
+
+    asyncio.run(scenario())
+    assert calls == [400, 500, 500]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import idempotency
+    import server
+    from request_chain import get_request_chain
+
+    sent = []
+
+    class Signers:
+        @contextlib.asynccontextmanager
+        async def lease(self):
+            yield type("Signer", (), {"address": OWNER})()
+
+    class Functions:
+        def registerAsset(self, key, cid, owner):
+            return ("registerAsset", key, cid, owner)
+
+    chain = type("Chain", (), {
+        "registry": type("Registry", (), {"functions": Functions()})(),
+        "w3": None,
+        "owner": type("Owner", (), {"address": OWNER})(),
+        "signers": Signers(),
+    })()
+
+    async def fake_send_tx(w3, tx_func, signer, kind, wait=None, asset_hashes=(), chain=None):
+        sent.append(tx_func)
+        await asyncio.sleep(0.05)
+        return bytes([len(sent)]) * 32, {"status": "mined"}
+
+    monkeypatch.setattr(server, "send_tx", fake_send_tx)
+    monkeypatch.setattr(idempotency, "write_flights", SingleFlight())
+    monkeypatch.setattr(server, "write_flights", idempotency.write_flights)
+    server.app.dependency_overrides[get_request_chain] = lambda: chain
+    yield server.app, sent
+    server.app.dependency_overrides.pop(get_request_chain, None)
+
+
+def test_register_endpoint_coalesces_and_replays(api):
+    app, sent = api
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"asset_key": "deed-1", "cid": "Qm1"}
+            dupes = await asyncio.gather(*(client.post("/asset/register", json=body) for _ in range(3)))
+            headers = {"Idempotency-Key": "order-42"}
+            keyed = await client.post("/asset/register", json=body, headers=headers)
+            retry = await client.post("/asset/register", json=body, headers=headers)
+            reused = await client.post("/asset/register", json={"asset_key": "deed-2", "cid": "Qm2"},
+                                       headers=headers)
+            # caller khác dùng trùng key + body: không nhận lại kết quả của caller đầu
+            other = await client.post("/asset/register", json=body,
+                                      headers={**headers, "X-User-Address": OTHER})
+            stats = (await client.get("/idempotency/stats")).json()
+        return dupes, keyed, retry, reused, other, stats
+
+    dupes, keyed, retry, reused, other, stats = asyncio.run(scenario())
+    assert len({r.json()["tx_hash"] for r in dupes}) == 1
+    assert sorted(r.headers.get("idempotent-replayed", "") for r in dupes) == ["", "true", "true"]
+    assert "idempotent-replayed" not in keyed.headers
+    assert retry.json() == keyed.json() and retry.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422
+    assert other.status_code == 200 and "idempotent-replayed" not in other.headers
+    assert other.json()["tx_hash"] != keyed.json()["tx_hash"] and other.json()["user_address"] == OTHER
+    assert len(sent) == 3
+    assert stats["stored"] == 2 and stats["conflicts"] == 1
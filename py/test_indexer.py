@@ -0,0 +1,235 @@
+"""
+Test event indexer (SQLite store + sync loop với node giả, không cần RPC).
+
+Chạy: python -m pytest test_indexer.py -v
+"""
+
+import asyncio
+import threading
+
+import pytest
+from eth_abi import encode
+from web3 import AsyncWeb3, Web3
+from web3.exceptions import BadFunctionCallOutput
+
+import indexer as indexer_module
+from indexer import AssetIndexer, IndexStore, check_registry_version, is_range_error, is_timeout_error
+
+REGISTRY = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+ALICE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+BOB = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+SIGNER = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+
+EVENTS_ABI = [
+    {"type": "event", "name": "AssetRegistered", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "assetHash", "type": "bytes32"},
+        {"indexed": True, "name": "owner", "type": "address"},
+        {"indexed": False, "name": "tokenId", "type": "uint256"},
+        {"indexed": False, "name": "cid", "type": "string"}]},
+    {"type": "event", "name": "AssetOwnerAssigned", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "assetHash", "type": "bytes32"},
+        {"indexed": True, "name": "owner", "type": "address"}]},
+    {"type": "event", "name": "AssetVerified", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "assetHash", "type": "bytes32"},
+        {"indexed": True, "name": "verifier", "type": "address"},
+        {"indexed": False, "name": "status", "type": "bool"}]},
+    {"type": "event", "name": "AssetTransferred", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "assetHash", "type": "bytes32"},
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": False, "name": "tokenId", "type": "uint256"}]},
+]
+
+H = Web3.keccak(text="doc-001")
+
+
+def topic_addr(addr):
+    return "0x" + "00" * 12 + addr[2:].lower()
+
+
+def make_log(block, index, name, topics, data):
+    sig = {
+        "AssetRegistered": "AssetRegistered(bytes32,address,uint256,string)",
+        "AssetOwnerAssigned": "AssetOwnerAssigned(bytes32,address)",
+        "AssetVerified": "AssetVerified(bytes32,address,bool)",
+        "AssetTransferred": "AssetTransferred(bytes32,address,address,uint256)",
+    }[name]
+    return {
+        "address": REGISTRY,
+        "topics": [Web3.keccak(text=sig)] + topics,
+        "data": data,
+        "blockNumber": block,
+        "logIndex": index,
+        "transactionIndex": 0,
+        "transactionHash": Web3.keccak(text=f"tx-{block}-{index}"),
+        "blockHash": Web3.keccak(text=f"block-{block}"),
+        "removed": False,
+    }
+
+
+class FakeEth:
+    def __init__(self, logs, head, max_range=None):
+        self.logs = logs
+        self.head = head
+        self.max_range = max_range
+        self.ranges = []
+        self.fork = {}  # block -> hash override (giả lập reorg)
+
+    @property
+    async def block_number(self):
+        return self.head
+
+    async def get_logs(self, params):
+        lo, hi = params["fromBlock"], params["toBlock"]
+        if self.max_range and hi - lo + 1 > self.max_range:
+            raise ValueError({"code": -32600, "message": "block range is too large"})
+        self.ranges.append((lo, hi))
+        return [l for l in self.logs if lo <= l["blockNumber"] <= hi]
+
+    async def get_block(self, number):
+        return {"hash": self.fork.get(number, Web3.keccak(text=f"block-{number}"))}
+
+
+class FakeW3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def registry():
+    return AsyncWeb3().eth.contract(address=REGISTRY, abi=EVENTS_ABI)
+
+
+def sample_logs():
+    return [
+        # backend signer gửi tx, owner là ALICE
+        make_log(5, 0, "AssetRegistered", [H, topic_addr(SIGNER)], encode(["uint256", "string"], [1, "QmCid"])),
+        make_log(5, 1, "AssetOwnerAssigned", [H, topic_addr(ALICE)], b""),
+        make_log(12, 0, "AssetVerified", [H, topic_addr(ALICE)], encode(["bool"], [True])),
+        make_log(30, 1, "AssetTransferred", [H, topic_addr(REGISTRY), topic_addr(BOB)], encode(["uint256"], [1])),
+    ]
+
+
+def sync_all(indexer, w3, reg):
+    async def run():
+        while not await indexer.sync_once(w3, reg):
+            pass
+    asyncio.run(run())
+
+
+def test_backfill_with_adaptive_range(tmp_path):
+    eth = FakeEth(sample_logs(), head=40, max_range=20)
+    indexer = AssetIndexer(IndexStore(str(tmp_path / "idx.db")), start_block=0)
+    indexer.chunk = 64
+    seen = []
+    owners = []
+    indexer.add_listener(lambda ev: seen.append(ev["name"]))
+    indexer.add_listener(lambda ev: owners.append(ev["owner"]))
+
+    sync_all(indexer, FakeW3(eth), registry())
+
+    # listener nhận sẵn owner hiện tại (EventHub không phải đọc SQLite trong event loop)
+    assert owners[1] == ALICE and owners[-1] == BOB
+    assert [row["owner"] for row in indexer.store.events_since(0)] == [BOB] * 4
+    asset = indexer.store.get_asset(H)
+    assert asset["owner"] == BOB and asset["verified"] is True
+    assert asset["tokenId"] == 1 and asset["ipfsCid"] == "QmCid"
+    assert indexer.checkpoint == 40
+    assert all(hi - lo + 1 <= 20 for lo, hi in eth.ranges)
+    assert seen == ["AssetRegistered", "AssetOwnerAssigned", "AssetVerified", "AssetTransferred"]
+
+
+def test_sqlite_writes_run_off_the_event_loop(tmp_path):
+    eth = FakeEth(sample_logs(), head=40)
+    indexer = AssetIndexer(IndexStore(str(tmp_path / "idx.db")), start_block=0)
+    threads = []
+    apply = indexer.store.apply
+
+    def recording_apply(*args):
+        threads.append(threading.get_ident())
+        return apply(*args)
+
+    indexer.store.apply = recording_apply
+    sync_all(indexer, FakeW3(eth), registry())
+    assert threads and threading.get_ident() not in threads
+    assert indexer.store.get_asset(H)["owner"] == BOB
+    # checkpoint giữ trong bộ nhớ: đọc được cả khi transaction apply đang giữ khoá SQLite
+    with indexer.store._lock:
+        assert indexer.checkpoint == 40
+
+
+def test_range_errors_are_provider_specific():
+    assert is_range_error(ValueError({"message": "block range is too large"}))
+    assert is_range_error(ValueError("query returned more than 10000 results"))
+    assert is_range_error(ValueError("Log response size exceeded. You can make eth_getLogs requests with ..."))
+    assert not is_range_error(ValueError("Rate limit exceeded, retry later"))
+    assert not is_range_error(asyncio.TimeoutError())
+    assert is_timeout_error(asyncio.TimeoutError()) and is_timeout_error(ValueError("request timed out"))
+
+
+def test_timeouts_retry_same_range_with_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(indexer_module, "INDEX_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(indexer_module, "INDEX_POLL_INTERVAL", 0.001)
+    eth = FakeEth(sample_logs(), head=40)
+    get_logs = eth.get_logs
+    failures = [asyncio.TimeoutError(), ValueError({"code": 429, "message": "rate limit exceeded"})]
+
+    async def flaky_get_logs(params):
+        if failures:
+            raise failures.pop(0)
+        return await get_logs(params)
+
+    eth.get_logs = flaky_get_logs
+    indexer = AssetIndexer(IndexStore(str(tmp_path / "idx.db")), start_block=0)
+    indexer.chunk = 64
+
+    async def run():
+        task = asyncio.create_task(indexer.run(FakeW3(eth), registry()))
+        while indexer.store.get_checkpoint() != 40:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert eth.ranges == [(0, 40)]
+    assert indexer.chunk_ceiling == indexer_module.INDEX_MAX_CHUNK_BLOCKS
+
+
+def test_reorg_rolls_back_and_replays(tmp_path):
+    eth = FakeEth(sample_logs(), head=40)
+    indexer = AssetIndexer(IndexStore(str(tmp_path / "idx.db")), start_block=0)
+    indexer.chunk = 10
+    w3, reg = FakeW3(eth), registry()
+    sync_all(indexer, w3, reg)
+    assert indexer.store.get_asset(H)["owner"] == BOB
+
+    # block 30 trở đi bị thay thế; trên nhánh mới không có transfer
+    eth.logs = sample_logs()[:3]
+    for b in range(30, 41):
+        eth.fork[b] = Web3.keccak(text=f"fork-{b}")
+    sync_all(indexer, w3, reg)
+
+    assert indexer.store.get_asset(H)["owner"] == ALICE
+    assert indexer.checkpoint == 40
+
+
+class FakeVersionCall:
+    def __init__(self, result):
+        self.result = result
+
+    async def call(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_registry_version_check_refuses_old_registries():
+    def reg(result):
+        functions = type("Functions", (), {"REGISTRY_VERSION": lambda self: FakeVersionCall(result)})()
+        return type("Registry", (), {"functions": functions})()
+
+    assert asyncio.run(check_registry_version(reg(2))) == 2
+    with pytest.raises(RuntimeError, match="redeploy"):
+        asyncio.run(check_registry_version(reg(1)))
+    # registry cũ không có hàm REGISTRY_VERSION: eth_call trả về rỗng
+    with pytest.raises(RuntimeError, match="deployed before"):
+        asyncio.run(check_registry_version(reg(BadFunctionCallOutput("empty"))))
@@ -0,0 +1,190 @@
+"""
+Test upload IPFS dạng stream với node IPFS giả (HTTP server local, không gọi Pinata).
+
+Chạy: python -m pytest test_ipfs_client.py -v
+"""
+
+import asyncio
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ.setdefault("PINATA_API_KEY", "test")
+os.environ.setdefault("PINATA_SECRET_API_KEY", "test")
+
+import ipfs_client  # noqa: E402
+from cid import compute_cid  # noqa: E402
+from cid_index import CidIndex  # noqa: E402
+
+
+class FakeIpfsHandler(BaseHTTPRequestHandler):
+    received = []
+    # response lỗi trả trước (status, headers), hết thì trả 200
+    script = []
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers["Content-Length"]))
+
+    def do_POST(self):
+        body = self._read_body()
+        FakeIpfsHandler.received.append((self.path, dict(self.headers), body))
+        if FakeIpfsHandler.script:
+            status, headers = FakeIpfsHandler.script.pop(0)
+            payload = b'{"error": "try later"}'
+        else:
+            status, headers = 200, {}
+            payload = json.dumps({"Hash": "QmFake", "IpfsHash": "QmPinata", "Size": str(len(body))}).encode()
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ipfs(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeIpfsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakeIpfsHandler.received = []
+    FakeIpfsHandler.script = []
+    monkeypatch.setattr(ipfs_client, "IPFS_API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(ipfs_client, "UPLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(ipfs_client, "get_cid_index", lambda: None)
+    yield FakeIpfsHandler.received
+    server.shutdown()
+
+
+def upload(filename, fileobj, size=None, max_bytes=None):
+    """async_upload với PinataClient riêng cho mỗi event loop của asyncio.run."""
+    async def go():
+        try:
+            return await ipfs_client.async_upload(filename, fileobj, size, max_bytes)
+        finally:
+            await ipfs_client.close_pinata_client()
+    return asyncio.run(go())
+
+
+def test_upload_sends_multipart_with_content_length(fake_ipfs):
+    data = os.urandom(10_000)
+    before = ipfs_client.upload_stats()
+
+    cid = upload("doc.pdf", io.BytesIO(data), size=len(data))
+
+    assert cid == "QmFake"
+    path, headers, body = fake_ipfs[0]
+    assert path.startswith("/api/v0/add")
+    assert int(headers["Content-Length"]) == len(body)
+    assert b'filename="doc.pdf"' in body and data in body
+    stats = ipfs_client.upload_stats()
+    assert stats["uploads"] == before["uploads"] + 1
+    assert stats["bytes"] == before["bytes"] + len(data)
+
+
+def test_upload_unknown_size_uses_chunked(fake_ipfs):
+    data = b"x" * 5000
+    assert upload("a.txt", io.BytesIO(data)) == "QmFake"
+    _, headers, body = fake_ipfs[0]
+    assert headers.get("Transfer-Encoding") == "chunked"
+    assert data in body
+
+
+def test_upload_rejects_too_large(fake_ipfs):
+    with pytest.raises(ipfs_client.UploadTooLarge):
+        upload("big.bin", io.BytesIO(b"x" * 100), size=100, max_bytes=50)
+    assert fake_ipfs == []
+
+    # size không biết trước -> dừng giữa chừng khi vượt giới hạn
+    with pytest.raises(ipfs_client.UploadTooLarge):
+        upload("big.bin", io.BytesIO(b"x" * 5000), max_bytes=2000)
+
+
+def test_duplicate_upload_short_circuits(fake_ipfs, monkeypatch, tmp_path):
+    index = CidIndex(str(tmp_path / "cid.db"))
+    monkeypatch.setattr(ipfs_client, "get_cid_index", lambda: index)
+    data = os.urandom(3000)
+
+    first = upload("a.bin", io.BytesIO(data), size=len(data))
+    second = upload("b.bin", io.BytesIO(data), size=len(data))
+    third = upload("c.bin", io.BytesIO(data))
+
+    assert first == second == third == "QmFake"
+    assert len(fake_ipfs) == 1
+    assert index.lookup(compute_cid(data)) == "QmFake"
+    assert index.stats()["dedup_hits"] == 3
+
+    # nội dung khác -> vẫn upload
+    upload("d.bin", io.BytesIO(data + b"!"), size=len(data) + 1)
+    assert len(fake_ipfs) == 2
+
+
+@pytest.fixture
+def fake_pinata(fake_ipfs, monkeypatch):
+    base = ipfs_client.IPFS_API_URL
+    monkeypatch.setattr(ipfs_client, "IPFS_API_URL", None)
+    monkeypatch.setattr(ipfs_client, "PINATA_UPLOAD_URL", f"{base}/pinning/pinFileToIPFS")
+    monkeypatch.setattr(ipfs_client, "PINATA_BACKOFF_BASE", 0.01)
+    return fake_ipfs
+
+
+def run_pin(fileobj, size=None, **kwargs):
+    async def go():
+        client = ipfs_client.PinataClient(**kwargs)
+        try:
+            return await client.pin_file("doc.bin", fileobj, size), client.retries
+        finally:
+            await client.aclose()
+    return asyncio.run(go())
+
+
+def test_async_client_retries_429_and_5xx(fake_pinata):
+    FakeIpfsHandler.script = [(429, {"Retry-After": "0"}), (503, {})]
+    data = os.urandom(4000)
+
+    cid, retries = run_pin(io.BytesIO(data), size=len(data))
+
+    assert cid == "QmPinata" and retries == 2
+    assert len(fake_pinata) == 3
+    path, headers, body = fake_pinata[-1]
+    assert path == "/pinning/pinFileToIPFS"
+    assert headers["pinata_api_key"] and int(headers["Content-Length"]) == len(body)
+    assert data in body
+
+
+def test_async_client_does_not_retry_client_errors(fake_pinata):
+    FakeIpfsHandler.script = [(401, {})]
+    with pytest.raises(RuntimeError, match="401"):
+        run_pin(io.BytesIO(b"abc"), size=3)
+    assert len(fake_pinata) == 1
+
+
+def test_async_client_gives_up_after_max_retries(fake_pinata):
+    FakeIpfsHandler.script = [(500, {})] * 5
+    with pytest.raises(RuntimeError, match="500"):
+        run_pin(io.BytesIO(b"abc"), size=3, max_retries=2)
+    assert len(fake_pinata) == 3
+
+
+def test_retry_after_parsing():
+    assert ipfs_client.retry_after_seconds({"retry-after": "7"}) == 7
+    assert ipfs_client.retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=1445412480) == 10
+    assert ipfs_client.retry_after_seconds({"x-ratelimit-reset": "1000000060"}, now=1000000000) == 60
+    assert ipfs_client.retry_after_seconds({}) is None
+    assert ipfs_client.backoff_delay(0, retry_after=5) >= 5
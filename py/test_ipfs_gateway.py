@@ -0,0 +1,164 @@
+"""
+Test proxy GET /ipfs/{cid}: cache trên đĩa (LRU), gộp request khi miss, kiểm tra CID,
+Range / ETag - với gateway giả (HTTP server local).
+
+Chạy: python -m pytest test_ipfs_gateway.py -v
+"""
+
+import asyncio
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from cid import compute_cid
+from ipfs_gateway import CidNotFound, DiskCidCache, IpfsGateway, UpstreamError
+
+DOC = os.urandom(300_000)
+DOC_CID = compute_cid(DOC)
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    content = {}
+    requests = []
+    delay = 0.0
+
+    def do_GET(self):
+        FakeGatewayHandler.requests.append(self.path)
+        time.sleep(FakeGatewayHandler.delay)
+        body = FakeGatewayHandler.content.get(self.path.rsplit("/", 1)[-1])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    FakeGatewayHandler.content = {DOC_CID: DOC}
+    FakeGatewayHandler.requests = []
+    FakeGatewayHandler.delay = 0.0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeGatewayHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def run_gateway(tmp_path, upstream, coro_fn, max_bytes=10 ** 9):
+    async def go():
+        gateway = IpfsGateway(DiskCidCache(str(tmp_path), max_bytes), upstream=upstream)
+        try:
+            return await coro_fn(gateway)
+        finally:
+            await gateway.aclose()
+    return asyncio.run(go())
+
+
+def test_concurrent_misses_share_one_fetch_then_hit(tmp_path, upstream):
+    FakeGatewayHandler.delay = 0.2
+
+    async def scenario(gateway):
+        first = await asyncio.gather(*(gateway.get(DOC_CID) for _ in range(5)))
+        again = await gateway.get(DOC_CID)
+        return first, again, gateway.stats()
+
+    first, again, stats = run_gateway(tmp_path, upstream, scenario)
+    assert len(FakeGatewayHandler.requests) == 1
+    path, size, content_type = again
+    assert open(path, "rb").read() == DOC and size == len(DOC) and content_type == "application/pdf"
+    assert all(r[0] == path for r in first)
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+    assert not [p for p in os.listdir(tmp_path) if p.startswith(".tmp-")]
+
+
+def test_fetch_writes_and_hashes_off_the_event_loop(tmp_path, upstream, monkeypatch):
+    import ipfs_gateway
+
+    threads = set()
+
+    class RecordingBuilder(ipfs_gateway.CidBuilder):
+        def update(self, chunk):
+            threads.add(threading.get_ident())
+            return super().update(chunk)
+
+    monkeypatch.setattr(ipfs_gateway, "CidBuilder", RecordingBuilder)
+
+    async def scenario(gateway):
+        path, size, _ = await gateway.get(DOC_CID)
+        return threading.get_ident(), path, size
+
+    loop_thread, path, size = run_gateway(tmp_path, upstream, scenario)
+    assert threads and loop_thread not in threads
+    assert open(path, "rb").read() == DOC and size == len(DOC)
+
+
+def test_not_found_and_cid_mismatch_are_not_cached(tmp_path, upstream):
+    other = compute_cid(b"other document")
+    FakeGatewayHandler.content[other] = b"tampered content"
+    missing = compute_cid(b"missing")
+
+    async def scenario(gateway):
+        with pytest.raises(CidNotFound):
+            await gateway.get(missing)
+        with pytest.raises(UpstreamError, match="does not match"):
+            await gateway.get(other)
+        with pytest.raises(ValueError):
+            await gateway.get("../etc/passwd")
+        return gateway.stats()
+
+    stats = run_gateway(tmp_path, upstream, scenario)
+    assert stats["files"] == 0 and os.listdir(tmp_path) == []
+
+
+def test_lru_eviction_by_total_size(tmp_path):
+    cache = DiskCidCache(str(tmp_path), max_bytes=250)
+    cids = [compute_cid(bytes([i]) * 100) for i in range(3)]
+    cache.put_file(cids[0], io.BytesIO(b"a" * 100))
+    cache.put_file(cids[1], io.BytesIO(b"b" * 100))
+    cache.lookup(cids[0])  # cids[1] thành ít dùng nhất
+    cache.put_file(cids[2], io.BytesIO(b"c" * 100))
+
+    assert cache.lookup(cids[1]) is None and not (tmp_path / cids[1]).exists()
+    assert cache.lookup(cids[0]) and cache.lookup(cids[2])
+    assert cache.stats()["bytes"] == 200 and cache.stats()["evictions"] == 1
+
+    # khởi động lại: dựng index từ file có sẵn
+    assert DiskCidCache(str(tmp_path), max_bytes=250).stats()["files"] == 2
+
+
+def test_endpoint_range_etag_and_validation(tmp_path, monkeypatch):
+    import ipfs_gateway
+    import server
+
+    gateway = IpfsGateway(DiskCidCache(str(tmp_path)), upstream="http://127.0.0.1:1")
+    gateway.cache.put_file(DOC_CID, io.BytesIO(DOC), "application/pdf")
+    monkeypatch.setattr(ipfs_gateway, "_gateway", gateway)
+    client = TestClient(server.app)
+
+    full = client.get(f"/ipfs/{DOC_CID}")
+    assert full.status_code == 200 and full.content == DOC
+    assert full.headers["etag"] == f'"{DOC_CID}"' and full.headers["content-type"] == "application/pdf"
+    assert "immutable" in full.headers["cache-control"]
+
+    part = client.get(f"/ipfs/{DOC_CID}", headers={"Range": "bytes=100-199", "If-Range": f'"{DOC_CID}"'})
+    assert part.status_code == 206 and part.content == DOC[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(DOC)}"
+
+    assert client.get(f"/ipfs/{DOC_CID}", headers={"If-None-Match": f'"{DOC_CID}"'}).status_code == 304
+    named = client.get(f"/ipfs/{DOC_CID}", params={"filename": "deed.png"})
+    assert named.headers["content-type"] == "image/png" and "inline" in named.headers["content-disposition"]
+    assert client.get("/ipfs/not-a-cid").status_code == 400
+    assert client.get("/ipfs/stats").json()["gateway_cache"]["hits"] == 3
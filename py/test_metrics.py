@@ -0,0 +1,59 @@
+"""
+Test đếm RPC (web3 middleware + bộ đếm theo request) và output /metrics.
+
+Chạy: python -m pytest test_metrics.py -v
+"""
+
+import asyncio
+
+import metrics
+from metrics import RPC_REQUESTS
+
+
+def sample(method, outcome):
+    return RPC_REQUESTS.labels(method, outcome)._value.get()
+
+
+def test_middleware_counts_per_method_and_request():
+    def make_request(method, params):
+        if method == "eth_fail":
+            return {"error": {"message": "boom"}}
+        return {"result": "0x1"}
+
+    mw = metrics.rpc_metrics_middleware(make_request, None)
+    before_ok, before_err = sample("eth_test", "ok"), sample("eth_fail", "error")
+
+    token = metrics.start_request_accounting()
+    mw("eth_test", [])
+    mw("eth_test", [])
+    mw("eth_fail", [])
+    assert metrics.request_rpc_calls() == 3
+    metrics.end_request_accounting(token)
+
+    assert metrics.request_rpc_calls() == 0
+    assert sample("eth_test", "ok") == before_ok + 2
+    assert sample("eth_fail", "error") == before_err + 1
+
+
+def test_async_middleware_counts_inside_request_context():
+    async def make_request(method, params):
+        return {"result": "0x1"}
+
+    async def run():
+        mw = await metrics.async_rpc_metrics_middleware(make_request, None)
+        token = metrics.start_request_accounting()
+        # task con (gather) dùng chung bộ đếm của request
+        await asyncio.gather(mw("eth_call", []), mw("eth_call", []))
+        calls = metrics.request_rpc_calls()
+        metrics.end_request_accounting(token)
+        return calls
+
+    assert asyncio.run(run()) == 2
+
+
+def test_render_includes_cache_and_rpc_metrics():
+    body, content_type = metrics.render()
+    text = body.decode()
+    assert content_type.startswith("text/plain")
+    assert "rpc_requests_total" in text
+    assert "asset_cache_hits_total" in text
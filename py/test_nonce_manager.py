@@ -0,0 +1,93 @@
+"""
+Test NonceManager (cấp nonce cục bộ, không cần RPC).
+
+Chạy: python -m pytest test_nonce_manager.py -v
+"""
+
+import threading
+
+from nonce_manager import NonceManager, is_nonce_error
+
+
+class FakeEth:
+    def __init__(self, pending):
+        self.pending = pending
+        self.calls = 0
+
+    def get_transaction_count(self, address, block_identifier="latest"):
+        assert block_identifier == "pending"
+        self.calls += 1
+        return self.pending
+
+
+class FakeW3:
+    def __init__(self, pending):
+        self.eth = FakeEth(pending)
+
+
+def test_seeds_once_from_pending_count():
+    w3 = FakeW3(pending=5)
+    mgr = NonceManager("0xabc")
+    assert [mgr.allocate(w3) for _ in range(3)] == [5, 6, 7]
+    assert w3.eth.calls == 1
+
+
+def test_concurrent_allocations_are_unique():
+    w3 = FakeW3(pending=0)
+    mgr = NonceManager("0xabc")
+    got = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(100):
+            n = mgr.allocate(w3)
+            with lock:
+                got.append(n)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(got) == list(range(800))
+
+
+def test_released_nonce_is_reused_first():
+    w3 = FakeW3(pending=10)
+    mgr = NonceManager("0xabc")
+    a, b, c = mgr.allocate(w3), mgr.allocate(w3), mgr.allocate(w3)
+    mgr.confirm(a)
+    mgr.release(b)  # broadcast lỗi -> nonce 11 chưa dùng
+    mgr.confirm(c)
+    assert mgr.allocate(w3) == 11
+    assert mgr.allocate(w3) == 13
+
+
+def test_resync_skips_nonces_still_inflight():
+    w3 = FakeW3(pending=0)
+    mgr = NonceManager("0xabc")
+    for _ in range(3):
+        mgr.confirm(mgr.allocate(w3))
+    inflight = mgr.allocate(w3)  # nonce 3 đang broadcast
+    mgr.resync(3)
+    assert mgr.allocate(w3) == 4
+    mgr.confirm(inflight)
+
+
+def test_gap_detection():
+    w3 = FakeW3(pending=0)
+    mgr = NonceManager("0xabc")
+    for _ in range(3):
+        mgr.confirm(mgr.allocate(w3))
+    # node chỉ thấy nonce 0 -> tx nonce 1 đã bị drop
+    assert mgr.has_gap(1)
+    assert not mgr.has_gap(3)
+    mgr.resync(1)
+    assert mgr.allocate(w3) == 1
+
+
+def test_is_nonce_error():
+    assert is_nonce_error(ValueError({"code": -32000, "message": "nonce too low"}))
+    assert is_nonce_error(Exception("replacement transaction underpriced"))
+    assert not is_nonce_error(Exception("execution reverted: Asset exists"))
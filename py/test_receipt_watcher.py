@@ -0,0 +1,143 @@
+"""
+Test ReceiptWatcher: 1 vòng poll theo block cho nhiều tx, không cần RPC.
+
+Chạy: python -m pytest test_receipt_watcher.py -v
+"""
+
+import asyncio
+
+import pytest
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from receipt_watcher import ReceiptWatcher
+
+
+def tx(i) -> str:
+    return "0x" + f"{i:064x}"
+
+
+class FakeChain:
+    """w3 giả: block tăng khi gọi mine(), receipt có sau khi tx được mined."""
+
+    def __init__(self):
+        self.block = 1
+        self.mined = {}
+        self.calls = []
+        self.eth = self
+
+    @property
+    async def block_number(self):
+        self.calls.append("eth_blockNumber")
+        return self.block
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.calls.append("eth_getTransactionReceipt")
+        if tx_hash not in self.mined:
+            raise TransactionNotFound(tx_hash)
+        return {"status": 1, "blockNumber": self.mined[tx_hash], "transactionHash": tx_hash}
+
+    async def batch(self, calls):
+        self.calls.append("batch")
+        out = []
+        for _, (tx_hash,) in calls:
+            block = self.mined.get(tx_hash)
+            raw = None if block is None else {"status": "0x1", "blockNumber": hex(block), "transactionHash": tx_hash}
+            out.append((raw, None))
+        return out
+
+    def mine(self, *hashes):
+        self.block += 1
+        for h in hashes:
+            self.mined[h] = self.block
+
+
+def test_many_waiters_share_one_poll_stream():
+    chain = FakeChain()
+    watcher = ReceiptWatcher(chain, batch=chain.batch, poll_interval=0.01)
+
+    async def run():
+        waits = [asyncio.ensure_future(watcher.wait(tx(i), timeout=2)) for i in range(20)]
+        await asyncio.sleep(0.05)
+        chain.mine(*[tx(i) for i in range(20)])
+        return await asyncio.gather(*waits)
+
+    receipts = asyncio.run(run())
+    assert [r["blockNumber"] for r in receipts] == [2] * 20
+    # 1 lần hỏi hash mới ở block 1 + 1 lần ở block 2; không phải 20 luồng poll
+    assert chain.calls.count("batch") == 2
+    assert "eth_getTransactionReceipt" not in chain.calls
+    assert watcher.pending() == 0
+    assert watcher.stats()["blocks_seen"] == 2
+
+
+def test_receipts_only_refetched_on_new_block():
+    chain = FakeChain()
+    watcher = ReceiptWatcher(chain, poll_interval=0.01)
+
+    async def run():
+        waiting = asyncio.ensure_future(watcher.wait(tx(1), timeout=2))
+        await asyncio.sleep(0.1)
+        fetches_before_block = chain.calls.count("eth_getTransactionReceipt")
+        chain.mine(tx(1))
+        receipt = await waiting
+        await asyncio.sleep(0.03)
+        return fetches_before_block, receipt
+
+    fetches, receipt = asyncio.run(run())
+    assert fetches == 1
+    assert receipt["blockNumber"] == 2
+    assert chain.calls.count("eth_getTransactionReceipt") == 2
+    assert not watcher.stats()["running"]
+
+
+def test_already_mined_and_duplicate_waiters():
+    chain = FakeChain()
+    chain.mine(tx(7))
+    watcher = ReceiptWatcher(chain, poll_interval=0.01)
+
+    async def run():
+        return await asyncio.gather(watcher.wait(tx(7), 1), watcher.wait(bytes.fromhex(tx(7)[2:]), 1))
+
+    a, b = asyncio.run(run())
+    assert a is b
+    assert chain.calls.count("eth_getTransactionReceipt") == 1
+
+
+def test_timeout_raises_time_exhausted_and_forgets_hash():
+    chain = FakeChain()
+    watcher = ReceiptWatcher(chain, poll_interval=0.01)
+
+    async def run():
+        with pytest.raises(TimeExhausted):
+            await watcher.wait(tx(3), timeout=0.05)
+        await asyncio.sleep(0.03)
+        return watcher.pending(), watcher.stats()["running"]
+
+    assert asyncio.run(run()) == (0, False)
+
+
+RAW_RECEIPT = {
+    "blockHash": "0x" + "cd" * 32, "blockNumber": "0x1b4", "contractAddress": None,
+    "cumulativeGasUsed": "0x33bc", "effectiveGasPrice": "0x3b9aca00", "gasUsed": "0x4dc",
+    "from": "0x7e5f4552091a69125d5dfcb7b8c2659029395bdf", "to": "0x2b5ad5c4795c026514f8317c7a215e218dccd6cf",
+    "logsBloom": "0x" + "00" * 256, "status": "0x1", "transactionHash": "0x" + "ef" * 32,
+    "transactionIndex": "0x3", "type": "0x2",
+    "logs": [{
+        "address": "0x2b5ad5c4795c026514f8317c7a215e218dccd6cf", "topics": ["0x" + "ab" * 32],
+        "data": "0x01", "blockNumber": "0x1b4", "logIndex": "0x0", "transactionIndex": "0x3",
+        "blockHash": "0x" + "cd" * 32, "transactionHash": "0x" + "ef" * 32, "removed": False,
+    }],
+}
+
+
+def test_format_receipt_matches_web3_formatting():
+    # formatter nội bộ của web3 chỉ dùng làm chuẩn so sánh trong test
+    method_formatters = pytest.importorskip("web3._utils.method_formatters")
+    from web3.datastructures import AttributeDict
+
+    from receipt_watcher import format_receipt
+
+    expected = AttributeDict.recursive(method_formatters.receipt_formatter(RAW_RECEIPT))
+    receipt = format_receipt(RAW_RECEIPT)
+    assert receipt == expected
+    assert receipt.blockNumber == 436 and receipt.logs[0].topics[0] == bytes.fromhex("ab" * 32)
@@ -0,0 +1,99 @@
+"""
+Test memo đọc chain theo request (RequestChain) và auth dùng chung chain đó.
+
+Chạy: python -m pytest test_request_chain.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from eth_abi import encode
+from fastapi import HTTPException
+from web3 import Web3
+
+from asset_cache import asset_cache
+from auth import async_check_asset_owner
+from request_chain import RequestChain
+
+OWNER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+class FakeEth:
+    def __init__(self, registry):
+        self.registry = registry
+
+    async def call(self, params):
+        self.registry.calls += 1
+        await asyncio.sleep(0.01)
+        asset_hash = bytes.fromhex(params["data"][10:])
+        if asset_hash not in self.registry.assets:
+            raise ValueError("execution reverted: Not found")
+        return encode(["(bytes32,string,address,bool,uint256)"], [self.registry.assets[asset_hash]])
+
+
+class FakeRegistry:
+    address = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.calls = 0
+        self.w3 = SimpleNamespace(eth=FakeEth(self))
+
+
+def make_chain(assets):
+    asset_cache.clear()
+    return RequestChain(FakeRegistry(assets), None, None, None)
+
+
+def test_same_asset_read_once_per_request():
+    h = Web3.keccak(text="doc")
+    chain = make_chain({bytes(h): (bytes(h), "QmCid", OWNER, True, 1)})
+
+    async def run():
+        # auth + endpoint đọc cùng asset đồng thời
+        await asyncio.gather(
+            async_check_asset_owner("doc", OWNER, chain),
+            chain.get_asset(h),
+            chain.get_asset("0x" + bytes(h).hex()),
+        )
+
+    asyncio.run(run())
+    assert chain.registry.calls == 1
+
+
+def test_errors_are_memoized_and_write_allows_reread(monkeypatch):
+    import server
+
+    chain = make_chain({})
+    h = Web3.keccak(text="missing")
+
+    async def fake_build_and_send(w3, tx_func, signer, wait=True, info=None, **kwargs):
+        # tx register được mined -> asset có trên chain
+        chain.registry.assets[bytes(h)] = (bytes(h), "QmNew", OWNER, False, 2)
+        return b"\x01" * 32
+
+    monkeypatch.setattr(server, "async_build_and_send", fake_build_and_send)
+
+    async def run():
+        with pytest.raises(HTTPException) as exc:
+            await async_check_asset_owner("missing", OWNER, chain)
+        assert exc.value.status_code == 404
+        with pytest.raises(ValueError):
+            await chain.get_asset(h)
+        assert chain.registry.calls == 1
+
+        # đọc -> ghi -> đọc trong cùng request: send_tx bỏ memo của asset vừa ghi
+        await server.send_tx(None, "registerAsset", None, "register", wait=True, asset_hashes=[bytes(h)], chain=chain)
+        assert (await chain.get_asset(h)).ipfs_cid == "QmNew"
+
+    asyncio.run(run())
+    assert chain.registry.calls == 2
+
+
+def test_non_owner_rejected():
+    h = Web3.keccak(text="doc")
+    chain = make_chain({bytes(h): (bytes(h), "QmCid", OWNER, True, 1)})
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(async_check_asset_owner("doc", "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC", chain))
+    assert exc.value.status_code == 403
@@ -0,0 +1,204 @@
+"""
+Test RpcPool với các JSON-RPC server giả (HTTP local): định tuyến theo latency,
+failover, loại / nhận lại endpoint, hedged eth_call và tách endpoint ghi.
+
+Chạy: python -m pytest test_rpc_pool.py -v
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+from web3 import AsyncWeb3
+
+import rpc_pool
+from rpc_pool import PooledAsyncHTTPProvider, RpcPool, endpoint_label, is_write, split_urls
+
+
+class StubRpc:
+    """JSON-RPC server giả: trả tên của mình trong result, có thể chậm hoặc trả HTTP lỗi."""
+
+    def __init__(self, name: str, delay: float = 0.0, status: int = 200):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.methods = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                requests = body if isinstance(body, list) else [body]
+                stub.methods.extend(r["method"] for r in requests)
+                time.sleep(stub.delay)
+                replies = [{"jsonrpc": "2.0", "id": r["id"], "result": stub.result(r["method"])} for r in requests]
+                payload = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v2/secret-key"
+
+    def result(self, method):
+        if method == "eth_blockNumber":
+            return hex(100)
+        return "0x" + self.name.encode().hex()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(*args, **kwargs):
+        stub = StubRpc(*args, **kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def run_with_pool(read_urls, fn, write_urls=None, hedge_after_ms=0):
+    async def main():
+        async with aiohttp.ClientSession() as session:
+            pool = RpcPool(read_urls, write_urls, session, hedge_after_ms=hedge_after_ms)
+            return await fn(pool)
+
+    return asyncio.run(main())
+
+
+def call(method="eth_call", params=None):
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []}).encode()
+
+
+def served_by(body) -> str:
+    return bytes.fromhex(body["result"][2:]).decode()
+
+
+def test_helpers():
+    assert split_urls(" http://a , http://b,http://a,") == ["http://a", "http://b"]
+    assert endpoint_label("https://user:pw@eth.example.org:8545/v2/KEY") == "eth.example.org:8545"
+    assert is_write("eth_sendRawTransaction", ["0x"])
+    assert is_write("eth_getTransactionCount", ["0xabc", "pending"])
+    assert not is_write("eth_getTransactionCount", ["0xabc", "latest"])
+    assert not is_write("eth_call", [{}, "latest"])
+
+
+def test_reads_route_to_lowest_latency(stubs):
+    slow, fast = stubs("slow", delay=0.05), stubs("fast")
+
+    async def scenario(pool):
+        # lần đầu chưa có số đo -> thử theo thứ tự; sau đó ưu tiên endpoint nhanh
+        for _ in range(2):
+            await pool.request(call(), write=False)
+        for _ in range(5):
+            await pool.request(call())
+        return pool.stats()
+
+    stats = run_with_pool([slow.url, fast.url], scenario)
+    assert len(fast.methods) >= 5
+    assert len(slow.methods) <= 2
+    latencies = {s["endpoint"]: s["latency_ms"] for s in stats["readers"]}
+    assert latencies[endpoint_label(slow.url)] > latencies[endpoint_label(fast.url)]
+
+
+def test_failover_eject_and_readmit(stubs, monkeypatch):
+    monkeypatch.setattr(rpc_pool, "RPC_EJECT_AFTER", 2)
+    monkeypatch.setattr(rpc_pool, "RPC_EJECT_SECONDS", 0.2)
+    bad, good = stubs("bad", status=503), stubs("good", delay=0.01)
+
+    async def scenario(pool):
+        results = []
+        for _ in range(3):
+            results.append(served_by(await pool.request(call())))
+        ejected = pool.stats()["readers"][0]
+        assert pool.candidates()[0].url == good.url
+
+        await asyncio.sleep(0.25)
+        bad.status = 200
+        bad.methods.clear()
+        results.append(served_by(await pool.request(call())))
+        return results, ejected, pool.stats()["readers"][0]
+
+    results, ejected, readmitted = run_with_pool([bad.url, good.url], scenario)
+    assert results[:3] == ["good"] * 3
+    assert ejected["healthy"] is False and ejected["errors"] == 2
+    # hết thời gian loại: endpoint được thử lại (latency cũ = chưa đo -> xếp đầu)
+    assert readmitted["healthy"] is True
+    assert results[3] == "bad" and bad.methods == ["eth_call"]
+
+
+def test_all_endpoints_failing_raises(stubs):
+    a, b = stubs("a", status=502), stubs("b", status=429)
+    with pytest.raises(rpc_pool.EndpointError, match="429"):
+        run_with_pool([a.url, b.url], lambda pool: pool.request(call()))
+
+
+def test_hedged_call_returns_faster_backup(stubs):
+    slow, fast = stubs("slow", delay=0.5), stubs("fast")
+
+    async def scenario(pool):
+        started = time.perf_counter()
+        body = await pool.request(call(), hedge=True)
+        return served_by(body), time.perf_counter() - started, pool.hedges, pool.hedges_won
+
+    name, elapsed, hedges, won = run_with_pool([slow.url, fast.url], scenario, hedge_after_ms=50)
+    assert name == "fast"
+    assert elapsed < 0.4
+    assert (hedges, won) == (1, 1)
+
+
+def test_fast_primary_is_not_hedged(stubs):
+    a, b = stubs("a"), stubs("b")
+
+    async def scenario(pool):
+        body = await pool.request(call(), hedge=True)
+        return served_by(body), pool.hedges
+
+    assert run_with_pool([a.url, b.url], scenario, hedge_after_ms=500) == ("a", 0)
+    assert b.methods == []
+
+
+def test_provider_sends_writes_to_write_set_only(stubs):
+    reader, writer = stubs("reader"), stubs("writer")
+
+    async def scenario(pool):
+        w3 = AsyncWeb3(PooledAsyncHTTPProvider(pool))
+        block = await w3.eth.block_number
+        await w3.eth.get_transaction_count("0x" + "11" * 20, "pending")
+        await w3.eth.send_raw_transaction(b"\x01\x02")
+        return block
+
+    assert run_with_pool([reader.url], scenario, write_urls=[writer.url]) == 100
+    assert reader.methods == ["eth_blockNumber"]
+    assert writer.methods == ["eth_getTransactionCount", "eth_sendRawTransaction"]
+
+
+def test_batch_goes_through_pool(stubs):
+    a = stubs("a")
+
+    async def scenario(pool):
+        payload = json.dumps([
+            {"jsonrpc": "2.0", "id": i, "method": "eth_call", "params": []} for i in range(3)
+        ]).encode()
+        return await pool.request(payload, hedge=True)
+
+    body = run_with_pool([a.url], scenario, hedge_after_ms=50)
+    assert [r["id"] for r in body] == [0, 1, 2]
+    assert a.methods == ["eth_call"] * 3
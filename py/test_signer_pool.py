@@ -0,0 +1,158 @@
+"""
+Test SignerPool: chọn signer ít việc nhất, bỏ qua signer thiếu tiền, đọc số dư.
+
+Chạy: python -m pytest test_signer_pool.py -v
+"""
+
+import asyncio
+from collections import Counter
+
+from eth_account import Account
+
+from signer_pool import SignerPool
+
+KEYS = ["0x" + f"{i:064x}" for i in range(1, 5)]
+ACCOUNTS = [Account.from_key(k) for k in KEYS]
+
+
+class FakeEth:
+    def __init__(self, balances):
+        self.balances = balances
+        self.calls = 0
+
+    async def get_balance(self, address):
+        self.calls += 1
+        balance = self.balances[address]
+        if isinstance(balance, Exception):
+            raise balance
+        return balance
+
+
+class FakeW3:
+    def __init__(self, balances):
+        self.eth = FakeEth(balances)
+
+
+def test_concurrent_leases_spread_across_signers():
+    pool = SignerPool(ACCOUNTS + [ACCOUNTS[0]])
+    assert len(pool) == 4 and pool.primary is ACCOUNTS[0]
+    used = Counter()
+
+    async def send(i):
+        async with pool.lease() as signer:
+            used[signer.address] += 1
+            await asyncio.sleep(0.01 * (i % 3))
+
+    async def run():
+        await asyncio.gather(*(send(i) for i in range(40)))
+
+    asyncio.run(run())
+    assert set(used) == {a.address for a in ACCOUNTS}
+    assert max(used.values()) - min(used.values()) <= 4
+    assert all(s["inflight"] == 0 for s in pool.stats())
+
+
+def test_least_loaded_signer_is_picked():
+    pool = SignerPool(ACCOUNTS[:2])
+
+    async def run():
+        async with pool.lease() as first:
+            async with pool.lease() as second:
+                assert first is not second
+            async with pool.lease() as third:
+                # first vẫn đang bận -> lấy signer còn lại
+                assert third is second
+
+    asyncio.run(run())
+
+
+def test_low_balance_signers_are_skipped_and_reported():
+    w3 = FakeW3({
+        ACCOUNTS[0].address: 10 ** 18,
+        ACCOUNTS[1].address: 10 ** 12,
+        ACCOUNTS[2].address: RuntimeError("rpc down"),
+    })
+    pool = SignerPool(ACCOUNTS[:3], w3, min_balance_wei=10 ** 15)
+
+    async def run():
+        balances = await pool.refresh_balances()
+        picked = []
+        for _ in range(4):
+            async with pool.lease() as signer:
+                picked.append(signer.address)
+        return balances, picked
+
+    balances, picked = asyncio.run(run())
+    assert balances[ACCOUNTS[1].address] == 10 ** 12
+    assert balances[ACCOUNTS[2].address] is None
+    assert ACCOUNTS[1].address not in picked
+    stats = {s["address"]: s for s in pool.stats()}
+    assert stats[ACCOUNTS[1].address]["low_balance"] is True
+    assert stats[ACCOUNTS[0].address]["balance_eth"] == 1.0
+
+
+def test_all_signers_low_still_sends():
+    w3 = FakeW3({a.address: 0 for a in ACCOUNTS[:2]})
+    pool = SignerPool(ACCOUNTS[:2], w3, min_balance_wei=1)
+
+    async def run():
+        await pool.refresh_balances()
+        async with pool.lease() as signer:
+            return signer
+
+    assert asyncio.run(run()) is ACCOUNTS[0]
+
+
+def test_balances_refreshed_in_background_when_stale():
+    w3 = FakeW3({a.address: 10 ** 18 for a in ACCOUNTS[:2]})
+    pool = SignerPool(ACCOUNTS[:2], w3)
+
+    async def run():
+        async with pool.lease():
+            pass
+        await asyncio.sleep(0)
+        await pool._refresh_task
+        async with pool.lease():
+            pass
+        return w3.eth.calls
+
+    # lần đầu: số dư chưa có -> làm mới 1 lần; lần sau còn trong TTL -> không gọi lại
+    assert asyncio.run(run()) == 2
+
+
+def test_send_batch_splits_before_leasing(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "BATCH_MAX_ITEMS", 8)
+    monkeypatch.setattr(server, "BATCH_MAX_GAS", 300_000)
+    monkeypatch.setattr(server, "BATCH_GAS_MARGIN", 1.0)
+    pool = SignerPool(ACCOUNTS)
+    sent = []
+
+    class FakeCall:
+        def __init__(self, chunk):
+            self.chunk = chunk
+
+        async def estimate_gas(self, params):
+            return 100_000 * len(self.chunk)
+
+    async def fake_send(w3, tx_func, signer, wait=False, gas=None, info=None):
+        # mỗi chunk cuối cùng giữ đúng 1 lease lúc gửi
+        sent.append((len(tx_func.chunk), signer.address, sum(s.inflight for s in pool._slots)))
+        await asyncio.sleep(0.01)
+        return bytes([len(sent)]) * 32
+
+    async def fake_receipt(w3, tx_hash, signer):
+        return None
+
+    monkeypatch.setattr(server, "async_build_and_send", fake_send)
+    monkeypatch.setattr(server, "async_wait_for_receipt", fake_receipt)
+    entries = [{"key_bytes": bytes([i]) * 32} for i in range(8)]
+
+    out = asyncio.run(server.send_batch(None, pool, entries, FakeCall, "register-batch", wait=True))
+    # 8 item x 100k gas > 300k -> 4 + 4 -> 2 + 2 + 2 + 2
+    assert [len(o["entries"]) for o in out] == [2, 2, 2, 2]
+    assert sorted(size for size, _, _ in sent) == [2, 2, 2, 2]
+    assert max(inflight for _, _, inflight in sent) <= 4
+    assert len({addr for _, addr, _ in sent}) == 4
+    assert all(s.inflight == 0 for s in pool._slots)
@@ -0,0 +1,126 @@
+"""
+Test khởi động server: import không raise / không gọi mạng, trong ngân sách thời gian,
+và cặp /healthz - /readyz phản ánh trạng thái prewarm.
+
+Chạy: python -m pytest test_startup.py -v
+"""
+
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ngân sách import server.py (giây) - web3/eth_account chiếm phần lớn
+SERVER_IMPORT_BUDGET = float(os.getenv("SERVER_IMPORT_BUDGET", "6"))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHAIN_ENV = {
+    "SEPOLIA_RPC": "http://127.0.0.1:1",
+    "PRIVATE_KEY": "0x" + "11" * 32,
+    "REGISTRY_ADDRESS": "0x" + "22" * 20,
+    "NFT_ADDRESS": "0x" + "33" * 20,
+}
+
+
+def test_import_is_side_effect_free_and_within_budget():
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("PINATA_", "IPFS_API_URL"))}
+    code = (
+        "import time; t = time.perf_counter(); import server; "
+        "elapsed = time.perf_counter() - t; "
+        "import util_contract, ipfs_client; "
+        "assert util_contract._actx is None and util_contract._ctx is None; "
+        "assert ipfs_client._client is None; "
+        "print(elapsed)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=HERE, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert out.returncode == 0, out.stderr
+    elapsed = float(out.stdout.strip().splitlines()[-1])
+    assert elapsed < SERVER_IMPORT_BUDGET, f"import server took {elapsed:.2f}s"
+
+
+@pytest.fixture
+def server_app(monkeypatch):
+    import server
+
+    for name, value in CHAIN_ENV.items():
+        monkeypatch.setenv(name, value)
+    calls = {"init": 0, "fees": 0, "fail": True}
+
+    async def fake_init():
+        calls["init"] += 1
+        if calls["fail"]:
+            raise RuntimeError("Cannot connect to RPC at SEPOLIA_RPC")
+        return types.SimpleNamespace(w3=object(), signers=types.SimpleNamespace(refresh_balances=noop))
+
+    async def fake_fees(w3):
+        calls["fees"] += 1
+        return {}
+
+    async def fake_health(max_age=None):
+        return {"ok": True, "block_number": 1, "error": None}
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(server, "init_async_chain", fake_init)
+    monkeypatch.setattr(server.fee_oracle, "async_get_fees", fake_fees)
+    monkeypatch.setattr(server, "async_chain_health", fake_health)
+    monkeypatch.setattr(server, "close_async_chain", noop)
+    monkeypatch.setattr(server, "INDEXER_ENABLED", False)
+    monkeypatch.setattr(server, "READY_RETRY_INTERVAL", 0)
+    monkeypatch.setitem(server._startup, "attempted_at", 0.0)
+    return server, calls
+
+
+def test_readyz_reports_not_ready_then_recovers(server_app):
+    server, calls = server_app
+    with TestClient(server.app) as client:
+        assert calls["init"] == 1
+        assert client.get("/healthz").json()["ready"] is False
+        r = client.get("/readyz")
+        assert r.status_code == 503
+        assert "Cannot connect" in r.json()["error"]
+
+        calls["fail"] = False
+        r = client.get("/readyz")
+        assert r.status_code == 200, r.json()
+        assert r.json()["chain"]["block_number"] == 1
+        assert calls["fees"] == 1
+
+        health = client.get("/healthz").json()
+        assert health["ready"] is True
+        assert health["boot_seconds"] >= health["import_seconds"] > 0
+
+        # đã ready -> không prewarm lại
+        inits = calls["init"]
+        client.get("/readyz")
+        assert calls["init"] == inits
+
+
+def test_readyz_reports_missing_config(server_app, monkeypatch):
+    server, calls = server_app
+    monkeypatch.delenv("REGISTRY_ADDRESS")
+    with TestClient(server.app) as client:
+        r = client.get("/readyz")
+        assert r.status_code == 503
+        assert "REGISTRY_ADDRESS is not set" in r.json()["config"]["errors"]
+    assert calls["init"] == 0
+
+
+def test_upload_without_credentials_is_503(server_app, monkeypatch):
+    server, calls = server_app
+    import ipfs_client
+
+    monkeypatch.setattr(ipfs_client, "IPFS_API_URL", None)
+    monkeypatch.setattr(ipfs_client, "PINATA_API_KEY", None)
+    monkeypatch.setattr(ipfs_client, "get_cid_index", lambda: None)
+    with TestClient(server.app) as client:
+        r = client.post("/ipfs/upload", files={"file": ("a.txt", b"hello")})
+    assert r.status_code == 503
+    assert "Pinata API keys" in r.json()["detail"]
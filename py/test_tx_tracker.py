@@ -0,0 +1,43 @@
+"""
+Test tx_tracker (fire-and-track), không cần RPC.
+
+Chạy: python -m pytest test_tx_tracker.py -v
+"""
+
+import asyncio
+
+import tx_tracker
+
+TX = "0x" + "ab" * 32
+
+
+async def fake_receipt(delay, status=1):
+    await asyncio.sleep(delay)
+    return {"status": status, "blockNumber": 42, "gasUsed": 21000, "effectiveGasPrice": 7}
+
+
+def test_track_then_long_poll_until_mined():
+    async def run():
+        record = tx_tracker.track(bytes.fromhex("ab" * 32), fake_receipt(0.05), kind="register")
+        assert record["status"] == "pending"
+        assert tx_tracker.get_status(TX.upper().replace("0X", "0x"))["status"] == "pending"
+        return await tx_tracker.wait_status(TX, timeout=1)
+
+    record = asyncio.run(run())
+    assert record["status"] == "mined"
+    assert record["block_number"] == 42 and record["gas_used"] == 21000
+
+
+def test_failed_and_timeout():
+    async def run():
+        tx_tracker.track(TX, fake_receipt(0.01, status=0))
+        failed = await tx_tracker.wait_status(TX, timeout=1)
+
+        tx_tracker.track(TX, fake_receipt(10))
+        still_pending = await tx_tracker.wait_status(TX, timeout=0.01)
+        await tx_tracker.shutdown()
+        return failed, still_pending
+
+    failed, still_pending = asyncio.run(run())
+    assert failed["status"] == "failed"
+    assert still_pending["status"] == "pending"
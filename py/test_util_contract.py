@@ -0,0 +1,90 @@
+"""
+Test chain context dùng chung trong util_contract (không cần RPC thật).
+
+Chạy: python -m pytest test_util_contract.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import util_contract
+
+# Account test mặc định của Hardhat (chỉ dùng cho local)
+TEST_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+ABI = [{
+    "type": "function", "name": "getAsset", "stateMutability": "view",
+    "inputs": [{"name": "assetHash", "type": "bytes32"}],
+    "outputs": [{"name": "", "type": "bool"}],
+}]
+
+
+@pytest.fixture
+def chain_env(tmp_path, monkeypatch):
+    reg = tmp_path / "AssetRegistry.json"
+    nft = tmp_path / "AssetNFT.json"
+    reg.write_text(json.dumps({"abi": ABI}))
+    nft.write_text(json.dumps({"abi": []}))
+
+    monkeypatch.setattr(util_contract, "REGISTRY_ARTIFACT", reg)
+    monkeypatch.setattr(util_contract, "NFT_ARTIFACT", nft)
+    # Port 9 (discard) để mọi RPC đều lỗi ngay mà không cần mạng
+    monkeypatch.setattr(util_contract, "RPC_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(util_contract, "PRIVATE_KEY", TEST_KEY)
+    monkeypatch.setattr(util_contract, "REGISTRY_ADDRESS", "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512")
+    monkeypatch.setattr(util_contract, "NFT_ADDRESS", "0x5FbDB2315678afecb367f032d93F642f64180aa3")
+    util_contract.load_abi.cache_clear()
+    util_contract.close_chain()
+    yield
+    util_contract.close_chain()
+    util_contract.load_abi.cache_clear()
+
+
+def test_get_contracts_reuses_context(chain_env):
+    first = util_contract.get_contracts()
+    second = util_contract.get_contracts()
+    for a, b in zip(first, second):
+        assert a is b
+    assert util_contract.load_abi.cache_info().misses == 1
+
+
+def test_close_chain_rebuilds_context(chain_env):
+    registry, _, _, _ = util_contract.get_contracts()
+    util_contract.close_chain()
+    registry2, _, _, _ = util_contract.get_contracts()
+    assert registry is not registry2
+
+
+def test_chain_health_is_cached(chain_env, monkeypatch):
+    calls = []
+    real = util_contract.init_chain
+
+    def counting_init(check_connection=True):
+        calls.append(check_connection)
+        return real(check_connection=check_connection)
+
+    monkeypatch.setattr(util_contract, "init_chain", counting_init)
+
+    first = util_contract.chain_health(max_age=60)
+    second = util_contract.chain_health(max_age=60)
+    assert first["ok"] is False and first["error"]
+    assert second == first
+    assert len(calls) == 1
+
+
+def test_init_chain_raises_when_rpc_down(chain_env):
+    with pytest.raises(RuntimeError):
+        util_contract.init_chain()
+
+
+def test_get_async_contracts_reuses_context(chain_env):
+    async def run():
+        first = await util_contract.get_async_contracts()
+        second = await util_contract.get_async_contracts()
+        await util_contract.close_async_chain()
+        return first, second
+
+    first, second = asyncio.run(run())
+    for a, b in zip(first, second):
+        assert a is b
@@ -0,0 +1,16 @@
+"""
+Test hex_key (key dùng chung cho cache / tracker / event stream).
+
+Chạy: python -m pytest test_util_hex.py -v
+"""
+
+from web3 import Web3
+
+from util_hex import hex_key
+
+
+def test_hex_key_normalises_bytes_and_strings():
+    h = bytes(Web3.keccak(text="key-1"))
+    key = "0x" + h.hex()
+    assert hex_key(h) == hex_key(bytearray(h)) == key
+    assert hex_key(key.upper().replace("0X", "0x")) == hex_key(h.hex()) == key
@@ -0,0 +1,144 @@
+"""
+Theo dõi transaction đã broadcast (chế độ fire-and-track).
+
+Endpoint ghi (register/verify/transfer) có thể trả tx hash ngay sau khi broadcast;
+tracker chạy task nền chờ receipt và lưu trạng thái pending/mined/failed
+để GET /tx/{hash} tra cứu (có long-poll).
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from util_hex import hex_key
+
+# Số record tối đa giữ trong bộ nhớ (record cũ nhất bị xoá trước)
+TX_TRACKER_MAX = int(os.getenv("TX_TRACKER_MAX", "10000"))
+
+_records = OrderedDict()
+_events = {}
+_tasks = set()
+_listeners = []  # callback(record) khi tx bắt đầu được theo dõi và khi hết pending (event stream)
+
+
+def receipt_to_record(receipt) -> dict:
+    """Chuyển receipt của web3 thành các field trạng thái trả về cho client."""
+    return {
+        "status": "mined" if receipt["status"] == 1 else "failed",
+        "block_number": receipt["blockNumber"],
+        "gas_used": receipt["gasUsed"],
+        "effective_gas_price": receipt.get("effectiveGasPrice"),
+    }
+
+
+def add_listener(callback):
+    """Đăng ký callback(record) nhận mọi thay đổi trạng thái tx (record là bản copy)."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def _notify(record: dict):
+    for callback in _listeners:
+        try:
+            callback(dict(record))
+        except Exception as e:
+            print("WARN tx_tracker listener:", e)
+
+
+def track(tx_hash, wait_coro, kind: str = None, on_complete=None, assets=()) -> dict:
+    """
+    Bắt đầu theo dõi 1 tx đã broadcast.
+
+    Args:
+        tx_hash: hash của tx (bytes hoặc hex)
+        wait_coro: coroutine chờ receipt, ví dụ util_contract.async_wait_for_receipt(...)
+        kind: loại thao tác (register/verify/transfer) để hiển thị
+        on_complete: callback(record) khi tx hết pending (ví dụ invalidate cache)
+        assets: asset hash (bytes/hex) mà tx thay đổi, để subscriber lọc theo asset
+
+    Returns:
+        record trạng thái ban đầu (pending)
+    """
+    key = hex_key(tx_hash)
+    record = {
+        "tx_hash": key,
+        "kind": kind,
+        "assets": [hex_key(h) for h in assets],
+        "status": "pending",
+        "block_number": None,
+        "gas_used": None,
+        "effective_gas_price": None,
+        "error": None,
+        "submitted_at": time.time(),
+        "completed_at": None,
+    }
+    _records[key] = record
+    _events[key] = asyncio.Event()
+    while len(_records) > TX_TRACKER_MAX:
+        old, _ = _records.popitem(last=False)
+        _events.pop(old, None)
+
+    task = asyncio.create_task(_resolve(key, wait_coro, on_complete))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    _notify(record)
+    return dict(record)
+
+
+async def _resolve(key: str, wait_coro, on_complete=None):
+    try:
+        receipt = await wait_coro
+        update = receipt_to_record(receipt)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # TimeExhausted hoặc lỗi RPC: chưa biết tx đã mined chưa -> giữ pending,
+        # GET /tx/{hash} sẽ hỏi trực tiếp node cho các record này
+        update = {"error": str(e)}
+
+    record = _records.get(key)
+    if record is not None:
+        record.update(update)
+        record["completed_at"] = time.time()
+    if on_complete is not None:
+        try:
+            on_complete(record)
+        except Exception as e:
+            print("WARN tx_tracker on_complete:", e)
+    if record is not None:
+        _notify(record)
+    event = _events.get(key)
+    if event is not None:
+        event.set()
+
+
+def get_status(tx_hash):
+    """Trả về record (copy) nếu tx đang/đã được theo dõi, ngược lại None."""
+    record = _records.get(hex_key(tx_hash))
+    return dict(record) if record is not None else None
+
+
+async def wait_status(tx_hash, timeout: float):
+    """Long-poll: chờ tối đa timeout giây cho tới khi tx hết pending."""
+    key = hex_key(tx_hash)
+    event = _events.get(key)
+    if event is not None and timeout > 0:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return get_status(key)
+
+
+async def shutdown():
+    """Huỷ các task chờ receipt còn chạy (gọi khi shutdown)."""
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
@@ -1,11 +1,31 @@
 import os
 import json
+import asyncio
+import threading
+import time
+import weakref
+from functools import lru_cache
 from pathlib import Path
 
-from dotenv import load_dotenv
-from web3 import Web3
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+from web3.exceptions import TimeExhausted
+from web3.middleware import (
+    async_construct_simple_cache_middleware,
+    construct_simple_cache_middleware,
+)
 
-load_dotenv()
+from config import load_env
+from fee_oracle import describe_fees, fallback_fees, fee_oracle, gas_estimator
+from metrics import RECEIPT_WAIT_SECONDS, async_rpc_metrics_middleware, record_rpc, rpc_metrics_middleware
+from nonce_manager import get_nonce_manager, is_nonce_error
+from receipt_watcher import ReceiptWatcher
+from signer_pool import SIGNER_KEYS, SignerPool
+from rpc_pool import HEDGE_METHODS, PooledAsyncHTTPProvider, RpcPool, split_urls
+
+load_env()
 
 # Thư mục gốc project: .../asset-tokenization-full-b
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -15,14 +35,64 @@ REGISTRY_ARTIFACT = BASE_DIR / "artifacts/contracts/AssetRegistry.sol/AssetRegis
 NFT_ARTIFACT = BASE_DIR / "artifacts/contracts/AssetNFT.sol/AssetNFT.json"
 
 # Biến môi trường
-RPC_URL = os.getenv("SEPOLIA_RPC")
+# RPC_URLS (tuỳ chọn): nhiều endpoint cách nhau bởi dấu phẩy cho pool async; mặc định chỉ SEPOLIA_RPC.
+# RPC_WRITE_URLS (tuỳ chọn): endpoint nhận tx (theo thứ tự ưu tiên); mặc định = các endpoint đọc
+RPC_URLS = split_urls(os.getenv("RPC_URLS"))
+RPC_WRITE_URLS = split_urls(os.getenv("RPC_WRITE_URLS")) or None
+RPC_URL = os.getenv("SEPOLIA_RPC") or (RPC_URLS[0] if RPC_URLS else None)
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 REGISTRY_ADDRESS = os.getenv("REGISTRY_ADDRESS")
 NFT_ADDRESS = os.getenv("NFT_ADDRESS")
 
+# Kích thước pool keep-alive tới RPC và thời gian cache kết quả health probe (giây)
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "20"))
+RPC_HEALTH_TTL = float(os.getenv("RPC_HEALTH_TTL", "5"))
+
+# Các RPC không đổi trong suốt vòng đời node -> cache để eth_call không kéo theo eth_chainId
+STATIC_RPC_METHODS = ("eth_chainId", "net_version", "web3_clientVersion")
+
+# Số lần thử lại khi node báo lỗi nonce (sau khi resync nonce cục bộ)
+NONCE_RETRIES = int(os.getenv("NONCE_RETRIES", "2"))
+
+# Gas limit dự phòng khi _tx_params không được truyền gas (bình thường gas lấy từ gas_estimator)
+DEFAULT_GAS = 500_000
+
+# Thời gian tối đa chờ receipt (giây)
+TX_RECEIPT_TIMEOUT = float(os.getenv("TX_RECEIPT_TIMEOUT", "120"))
+
+
+class ChainContext:
+    """Kết nối + contract dùng chung cho cả process, tạo 1 lần rồi tái sử dụng."""
+
+    __slots__ = ("w3", "account", "registry", "nft", "session", "pool", "signers")
+
+    def __init__(self, w3, account, registry, nft, session, pool=None, signers=None):
+        self.w3 = w3
+        self.account = account
+        self.registry = registry
+        self.nft = nft
+        self.session = session
+        self.pool = pool
+        self.signers = signers if signers is not None else SignerPool([account])
+
+
+_ctx = None
+_ctx_lock = threading.Lock()
+
+# Bản async (AsyncWeb3 + aiohttp) cho các endpoint FastAPI, không block event loop
+_actx = None
+_actx_lock = asyncio.Lock()
+
+# ReceiptWatcher theo từng AsyncWeb3
+_receipt_watchers = weakref.WeakKeyDictionary()
 
+_health = {"ok": None, "block_number": None, "error": None, "checked_at": 0.0}
+_health_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
 def load_abi():
-    """Đọc ABI của 2 contract từ thư mục artifacts/ của Hardhat."""
+    """Đọc ABI của 2 contract từ thư mục artifacts/ của Hardhat (chỉ đọc đĩa 1 lần)."""
     if not REGISTRY_ARTIFACT.exists():
         raise FileNotFoundError(f"Registry artifact not found at {REGISTRY_ARTIFACT}")
     if not NFT_ARTIFACT.exists():
@@ -36,30 +106,42 @@ def load_abi():
     return reg_json["abi"], nft_json["abi"]
 
 
-def get_w3_and_signer():
-    """Kết nối Web3 và lấy account từ PRIVATE_KEY."""
+def _make_session():
+    """requests.Session với pool keep-alive, dùng chung cho mọi RPC request."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=RPC_POOL_SIZE, pool_maxsize=RPC_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_w3_and_signer(session=None):
+    """Tạo Web3 (dùng session keep-alive nếu có) và lấy account từ PRIVATE_KEY."""
     if not RPC_URL:
         raise RuntimeError("SEPOLIA_RPC is not set in .env")
     if not PRIVATE_KEY:
         raise RuntimeError("PRIVATE_KEY is not set in .env")
 
-    w3 = Web3(Web3.HTTPProvider(RPC_URL))
-    if not w3.is_connected():
-        raise RuntimeError("Cannot connect to RPC at SEPOLIA_RPC")
-
+    w3 = Web3(Web3.HTTPProvider(RPC_URL, session=session))
+    w3.middleware_onion.add(
+        construct_simple_cache_middleware(rpc_whitelist=STATIC_RPC_METHODS),
+        "static_rpc_cache",
+    )
+    # lớp trong cùng: chỉ đếm request thực sự gửi tới provider (sau cache)
+    w3.middleware_onion.inject(rpc_metrics_middleware, "rpc_metrics", layer=0)
     account = w3.eth.account.from_key(PRIVATE_KEY)
     return w3, account
 
 
-def get_contracts():
-    """Trả về (registry, nft, w3, owner_account)."""
+def _build_context():
     if not REGISTRY_ADDRESS or not NFT_ADDRESS:
         raise RuntimeError(
             "Missing contract addresses. Set REGISTRY_ADDRESS and NFT_ADDRESS in .env"
         )
 
     reg_abi, nft_abi = load_abi()
-    w3, account = get_w3_and_signer()
+    session = _make_session()
+    w3, account = get_w3_and_signer(session)
 
     registry = w3.eth.contract(
         address=Web3.to_checksum_address(REGISTRY_ADDRESS), abi=reg_abi
@@ -67,34 +149,342 @@ def get_contracts():
     nft = w3.eth.contract(
         address=Web3.to_checksum_address(NFT_ADDRESS), abi=nft_abi
     )
+    return ChainContext(w3, account, registry, nft, session)
+
+
+def init_chain(check_connection: bool = True) -> ChainContext:
+    """
+    Tạo chain context dùng chung (gọi 1 lần lúc startup, ví dụ trong FastAPI lifespan).
+    Các lần gọi sau trả về context đã có.
+
+    Raises:
+        RuntimeError nếu thiếu cấu hình, hoặc không kết nối được RPC khi check_connection=True
+    """
+    global _ctx
+    if _ctx is None:
+        with _ctx_lock:
+            if _ctx is None:
+                _ctx = _build_context()
+    if check_connection and not chain_health(max_age=0)["ok"]:
+        raise RuntimeError("Cannot connect to RPC at SEPOLIA_RPC")
+    return _ctx
 
-    return registry, nft, w3, account
 
+def close_chain():
+    """Đóng session HTTP và xoá context (gọi khi shutdown)."""
+    global _ctx
+    with _ctx_lock:
+        ctx, _ctx = _ctx, None
+    if ctx is not None:
+        ctx.session.close()
+    with _health_lock:
+        _health.update(ok=None, block_number=None, error=None, checked_at=0.0)
 
-def build_and_send(w3: Web3, tx_func, account):
+
+def chain_health(max_age: float = None) -> dict:
+    """
+    Health probe rẻ: chỉ gọi eth_blockNumber khi kết quả cache cũ hơn max_age giây
+    (mặc định RPC_HEALTH_TTL), nên có thể gọi thoải mái từ health check.
+    """
+    if max_age is None:
+        max_age = RPC_HEALTH_TTL
+    with _health_lock:
+        if _health["ok"] is not None and time.monotonic() - _health["checked_at"] < max_age:
+            return dict(_health)
+
+    try:
+        block_number = init_chain(check_connection=False).w3.eth.block_number
+        fee_oracle.observe_block(block_number)
+        result = {"ok": True, "block_number": block_number, "error": None}
+    except Exception as e:
+        result = {"ok": False, "block_number": None, "error": str(e)}
+    result["checked_at"] = time.monotonic()
+
+    with _health_lock:
+        _health.update(result)
+        return dict(_health)
+
+
+def get_contracts():
+    """Trả về (registry, nft, w3, owner_account) từ chain context dùng chung."""
+    ctx = _ctx or init_chain(check_connection=False)
+    return ctx.registry, ctx.nft, ctx.w3, ctx.account
+
+
+def _tx_params(w3, account, nonce, gas=None, fees=None):
+    fees = fees or fallback_fees()
+    return {
+        "from": account.address,
+        "nonce": nonce,
+        "gas": gas or DEFAULT_GAS,
+        "maxFeePerGas": fees["max_fee_per_gas"],
+        "maxPriorityFeePerGas": fees["max_priority_fee_per_gas"],
+    }
+
+
+def build_and_send(w3: Web3, tx_func, account, gas: int = None, info: dict = None):
     """
     Build + sign + gửi 1 transaction.
 
     tx_func: something like registry.functions.registerAsset(...)
+    gas: gas limit (mặc định: baseline estimate_gas theo hàm * GAS_MARGIN, xem fee_oracle)
+    info: dict (tuỳ chọn) nhận gas limit / fee đã dùng để trả về cho client
+
+    Nonce lấy từ NonceManager cục bộ của signer nên nhiều transaction có thể
+    cùng nằm trong mempool; gặp lỗi nonce thì resync với node và thử lại.
+    Fee EIP-1559 lấy từ fee_oracle (eth_feeHistory, cache theo block).
     """
-    nonce = w3.eth.get_transaction_count(account.address)
-
-    tx = tx_func.build_transaction(
-        {
-            "from": account.address,
-            "nonce": nonce,
-            "gas": 500_000,
-            # bạn có thể chỉnh fee cho phù hợp Sepolia
-            "maxFeePerGas": w3.to_wei("30", "gwei"),
-            "maxPriorityFeePerGas": w3.to_wei("1", "gwei"),
-        }
+    nonces = get_nonce_manager(account.address)
+    if gas is None:
+        gas = gas_estimator.estimate(tx_func, account.address)
+    fees = fee_oracle.get_fees(w3)
+    if info is not None:
+        info.update(describe_fees(fees, gas))
+
+    for attempt in range(NONCE_RETRIES + 1):
+        nonce = nonces.allocate(w3)
+        try:
+            tx = tx_func.build_transaction(_tx_params(w3, account, nonce, gas, fees))
+            signed = account.sign_transaction(tx)
+            tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+        except Exception as e:
+            nonces.release(nonce)
+            if not is_nonce_error(e):
+                raise
+            nonces.resync(w3.eth.get_transaction_count(account.address, "pending"))
+            if attempt == NONCE_RETRIES:
+                raise
+            continue
+        nonces.confirm(nonce)
+        break
+
+    started = time.monotonic()
+    try:
+        w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_RECEIPT_TIMEOUT)
+        RECEIPT_WAIT_SECONDS.labels("mined").observe(time.monotonic() - started)
+    except TimeExhausted:
+        RECEIPT_WAIT_SECONDS.labels("timeout").observe(time.monotonic() - started)
+        # tx có thể đã bị drop khỏi mempool -> các nonce sau sẽ kẹt, cần resync
+        pending = w3.eth.get_transaction_count(account.address, "pending")
+        if nonces.has_gap(pending):
+            nonces.resync(pending)
+        raise
+
+    return tx_hash
+
+
+# ---------------------------------------------------------------------------
+# Async variant: AsyncWeb3 + aiohttp session dùng chung
+# ---------------------------------------------------------------------------
+
+async def _build_async_context():
+    if not REGISTRY_ADDRESS or not NFT_ADDRESS:
+        raise RuntimeError(
+            "Missing contract addresses. Set REGISTRY_ADDRESS and NFT_ADDRESS in .env"
+        )
+    read_urls = RPC_URLS or split_urls(RPC_URL)
+    if not read_urls:
+        raise RuntimeError("SEPOLIA_RPC is not set in .env")
+    if not PRIVATE_KEY:
+        raise RuntimeError("PRIVATE_KEY is not set in .env")
+
+    reg_abi, nft_abi = load_abi()
+    # 1 session keep-alive dùng chung cho mọi endpoint trong pool
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=RPC_POOL_SIZE, keepalive_timeout=30),
+    )
+    pool = RpcPool(read_urls, RPC_WRITE_URLS, session)
+    w3 = AsyncWeb3(PooledAsyncHTTPProvider(pool))
+    w3.middleware_onion.add(
+        await async_construct_simple_cache_middleware(rpc_whitelist=STATIC_RPC_METHODS),
+        "static_rpc_cache",
     )
+    w3.middleware_onion.inject(async_rpc_metrics_middleware, "rpc_metrics", layer=0)
+    account = w3.eth.account.from_key(PRIVATE_KEY)
+
+    registry = w3.eth.contract(
+        address=Web3.to_checksum_address(REGISTRY_ADDRESS), abi=reg_abi
+    )
+    nft = w3.eth.contract(
+        address=Web3.to_checksum_address(NFT_ADDRESS), abi=nft_abi
+    )
+    # account chính (owner) + các ví trong SIGNER_KEYS cho tx không cần quyền owner
+    signers = SignerPool([account] + [w3.eth.account.from_key(k) for k in SIGNER_KEYS], w3)
+    return ChainContext(w3, account, registry, nft, session, pool, signers)
+
+
+async def init_async_chain(check_connection: bool = True) -> ChainContext:
+    """
+    Tạo chain context async dùng chung (gọi trong FastAPI lifespan).
+
+    Raises:
+        RuntimeError nếu thiếu cấu hình, hoặc không kết nối được RPC khi check_connection=True
+    """
+    global _actx
+    if _actx is None:
+        async with _actx_lock:
+            if _actx is None:
+                _actx = await _build_async_context()
+    if check_connection and not (await async_chain_health(max_age=0))["ok"]:
+        raise RuntimeError("Cannot connect to RPC at SEPOLIA_RPC")
+    return _actx
+
+
+async def close_async_chain():
+    """Đóng aiohttp session và xoá context async (gọi khi shutdown)."""
+    global _actx
+    async with _actx_lock:
+        ctx, _actx = _actx, None
+    if ctx is not None:
+        watcher = _receipt_watchers.pop(ctx.w3, None)
+        if watcher is not None:
+            await watcher.close()
+        await ctx.session.close()
+    with _health_lock:
+        _health.update(ok=None, block_number=None, error=None, checked_at=0.0)
+
+
+async def async_chain_health(max_age: float = None) -> dict:
+    """Giống chain_health() nhưng probe qua AsyncWeb3."""
+    if max_age is None:
+        max_age = RPC_HEALTH_TTL
+    with _health_lock:
+        if _health["ok"] is not None and time.monotonic() - _health["checked_at"] < max_age:
+            return dict(_health)
 
-    signed = account.sign_transaction(tx)
-    tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    try:
+        ctx = await init_async_chain(check_connection=False)
+        block_number = await ctx.w3.eth.block_number
+        fee_oracle.observe_block(block_number)
+        result = {"ok": True, "block_number": block_number, "error": None}
+    except Exception as e:
+        result = {"ok": False, "block_number": None, "error": str(e)}
+    result["checked_at"] = time.monotonic()
 
-    # Có thể log status nếu muốn:
-    # print("TX status:", receipt.status)
+    with _health_lock:
+        _health.update(result)
+        return dict(_health)
+
+
+async def get_signer_pool() -> SignerPool:
+    """SignerPool của context async (registerAsset ký bằng signer ít việc nhất)."""
+    ctx = _actx or await init_async_chain(check_connection=False)
+    return ctx.signers
+
+
+async def get_async_contracts():
+    """Trả về (registry, nft, w3, owner_account) bản AsyncWeb3."""
+    ctx = _actx or await init_async_chain(check_connection=False)
+    return ctx.registry, ctx.nft, ctx.w3, ctx.account
+
+
+async def async_build_and_send(
+    w3: AsyncWeb3, tx_func, account, wait: bool = True, gas: int = None, info: dict = None
+):
+    """
+    Giống build_and_send() nhưng mọi RPC đều await, không block event loop.
+
+    tx_func: something like registry.functions.registerAsset(...) (AsyncContract)
+    wait: False -> trả tx hash ngay sau khi broadcast, không chờ receipt
+          (dùng với tx_tracker.track(..., async_wait_for_receipt(...)))
+    gas: gas limit (mặc định: baseline estimate_gas theo hàm * GAS_MARGIN)
+    info: dict (tuỳ chọn) nhận gas limit / fee đã dùng
+    """
+    nonces = get_nonce_manager(account.address)
+    if gas is None:
+        gas = await gas_estimator.async_estimate(tx_func, account.address)
+    fees = await fee_oracle.async_get_fees(w3)
+    if info is not None:
+        info.update(describe_fees(fees, gas))
+
+    for attempt in range(NONCE_RETRIES + 1):
+        nonce = await nonces.async_allocate(w3)
+        try:
+            tx = await tx_func.build_transaction(_tx_params(w3, account, nonce, gas, fees))
+            signed = account.sign_transaction(tx)
+            tx_hash = await w3.eth.send_raw_transaction(signed.rawTransaction)
+        except Exception as e:
+            nonces.release(nonce)
+            if not is_nonce_error(e):
+                raise
+            nonces.resync(await w3.eth.get_transaction_count(account.address, "pending"))
+            if attempt == NONCE_RETRIES:
+                raise
+            continue
+        nonces.confirm(nonce)
+        break
+
+    if wait:
+        await async_wait_for_receipt(w3, tx_hash, account)
 
     return tx_hash
+
+
+def get_receipt_watcher(w3: AsyncWeb3) -> ReceiptWatcher:
+    """ReceiptWatcher dùng chung cho w3 (receipt lấy bằng JSON-RPC batch nếu w3 đi qua RpcPool)."""
+    watcher = _receipt_watchers.get(w3)
+    if watcher is None:
+        batch = async_rpc_batch if _actx is not None and _actx.w3 is w3 and _actx.pool else None
+        watcher = _receipt_watchers[w3] = ReceiptWatcher(w3, batch)
+    return watcher
+
+
+async def async_wait_for_receipt(w3: AsyncWeb3, tx_hash, account):
+    """
+    Chờ receipt qua ReceiptWatcher chung (1 vòng poll theo block cho mọi tx);
+    hết thời gian thì kiểm tra tx có bị drop (gap nonce) không.
+    """
+    started = time.monotonic()
+    try:
+        receipt = await get_receipt_watcher(w3).wait(tx_hash, TX_RECEIPT_TIMEOUT)
+        RECEIPT_WAIT_SECONDS.labels("mined").observe(time.monotonic() - started)
+        return receipt
+    except TimeExhausted:
+        RECEIPT_WAIT_SECONDS.labels("timeout").observe(time.monotonic() - started)
+        nonces = get_nonce_manager(account.address)
+        pending = await w3.eth.get_transaction_count(account.address, "pending")
+        if nonces.has_gap(pending):
+            nonces.resync(pending)
+        raise
+
+
+async def async_rpc_batch(calls: list) -> list:
+    """
+    Gửi nhiều JSON-RPC request trong 1 HTTP round-trip (JSON-RPC batch).
+
+    Args:
+        calls: list (method, params)
+
+    Returns:
+        list (result, error) theo đúng thứ tự calls; error là message string hoặc None
+    """
+    ctx = _actx or await init_async_chain(check_connection=False)
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    started, ok = time.perf_counter(), False
+    try:
+        body = await ctx.pool.request(
+            json.dumps(payload).encode(), hedge=all(method in HEDGE_METHODS for method, _ in calls)
+        )
+        ok = True
+    finally:
+        elapsed = time.perf_counter() - started
+        for method in {m for m, _ in calls}:
+            record_rpc(method, elapsed, ok, count=sum(1 for m, _ in calls if m == method))
+    if not isinstance(body, list):
+        raise RuntimeError(f"RPC does not support JSON-RPC batch: {body}")
+
+    by_id = {r.get("id"): r for r in body if isinstance(r, dict)}
+    out = []
+    for i in range(len(calls)):
+        r = by_id.get(i)
+        if r is None:
+            out.append((None, "Missing response in RPC batch"))
+        elif r.get("error"):
+            err = r["error"]
+            out.append((None, err.get("message", str(err)) if isinstance(err, dict) else str(err)))
+        else:
+            out.append((r.get("result"), None))
+    return out
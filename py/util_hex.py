@@ -0,0 +1,11 @@
+"""
+Chuẩn hoá hash / tx hash về 1 dạng key dùng chung (cache, tracker, memo, event stream).
+"""
+
+
+def hex_key(value) -> str:
+    """Hash/tx hash (bytes hoặc hex, có/không 0x) -> "0x..." lowercase, dùng làm key dict/cache."""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    value = value.lower()
+    return value if value.startswith("0x") else "0x" + value
@@ -15,12 +15,18 @@ async function main() {
   const reg = await AssetRegistry.deploy(nftAddr);
   await reg.waitForDeployment();
   const regAddr = await reg.getAddress();
-  console.log("AssetRegistry:", regAddr);
+  const regBlock = (await reg.deploymentTransaction().wait()).blockNumber;
+  console.log("AssetRegistry:", regAddr, "at block", regBlock);
+
+  // AssetNFT only lets the registry mint, and reads token URIs (ipfs://<cid>) from it
+  await (await nft.setRegistry(regAddr)).wait();
+  console.log("AssetNFT registry set");
 
   fs.writeFileSync("deploy-addresses.json", JSON.stringify({
     network: "sepolia-or-local",
     nft: nftAddr,
     registry: regAddr,
+    registryBlock: regBlock,
     deployer: deployer.address,
     timestamp: new Date().toISOString()
   }, null, 2));
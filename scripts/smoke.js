@@ -34,7 +34,7 @@ async function main() {
   const cid = "bafybeigdyr-placeholder"; // CID tạm
 
   console.log("=== registerAsset by user ===");
-  const tx1 = await reg.connect(user).registerAsset(assetHash, cid);
+  const tx1 = await reg.connect(user).registerAsset(assetHash, cid, user.address);
   const r1 = await tx1.wait();
   console.log("register tx:", r1.hash);
 
@@ -0,0 +1,73 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+
+// Gas report: legacy layout (contracts/legacy) vs current AssetRegistry/AssetNFT.
+// Run: npx hardhat test test/gas.test.js
+describe("Gas: AssetRegistry storage layout", function () {
+  async function deployPair(nftName, regName, linkRegistry) {
+    const NFT = await ethers.getContractFactory(nftName);
+    const nft = await NFT.deploy();
+    await nft.waitForDeployment();
+    const REG = await ethers.getContractFactory(regName);
+    const reg = await REG.deploy(await nft.getAddress());
+    await reg.waitForDeployment();
+    if (linkRegistry) {
+      await (await nft.setRegistry(await reg.getAddress())).wait();
+    }
+    return { nft, reg };
+  }
+
+  async function measure({ reg }, owner, user, other) {
+    const h = ethers.keccak256(ethers.toUtf8Bytes("gas-doc-001"));
+    const h2 = ethers.keccak256(ethers.toUtf8Bytes("gas-doc-002"));
+    const cid = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi";
+    const gasOf = async (tx) => (await (await tx).wait()).gasUsed;
+
+    const out = {};
+    // first registration pays for the NFT counter/balance slots; the second is the steady-state cost
+    out.registerFirst = await gasOf(reg.registerAsset(h, cid, user.address));
+    out.register = await gasOf(reg.registerAsset(h2, cid, user.address));
+    out.verify = await gasOf(reg.connect(owner).verifyAsset(h, true));
+    out.getAsset = await reg.getAsset.estimateGas(h);
+    out.getAssetByToken = await reg.getAssetByToken.estimateGas((await reg.getAsset(h)).tokenId);
+    out.transfer = await gasOf(reg.connect(user).transferAsset(h2, other.address));
+    return out;
+  }
+
+  it("reports register/verify/transfer/get gas before and after", async () => {
+    const [owner, user, other] = await ethers.getSigners();
+    const before = await measure(await deployPair("AssetNFTV1", "AssetRegistryV1", false), owner, user, other);
+    const after = await measure(await deployPair("AssetNFT", "AssetRegistry", true), owner, user, other);
+
+    console.log("      operation          before      after      saved");
+    for (const op of Object.keys(before)) {
+      const saved = before[op] - after[op];
+      console.log(`      ${op.padEnd(18)} ${String(before[op]).padStart(7)} ${String(after[op]).padStart(10)} ${String(saved).padStart(10)}`);
+    }
+
+    expect(after.registerFirst).to.be.lessThan(before.registerFirst);
+    expect(after.register).to.be.lessThan(before.register);
+    expect(after.verify).to.be.lessThan(before.verify);
+    expect(after.getAsset).to.be.lessThan(before.getAsset);
+    expect(after.getAssetByToken).to.be.lessThan(before.getAssetByToken);
+    expect(after.transfer).to.be.at.most(before.transfer);
+  });
+
+  it("keeps the getAsset ABI and derives tokenURI from the CID", async () => {
+    const [, user] = await ethers.getSigners();
+    const { nft, reg } = await deployPair("AssetNFT", "AssetRegistry", true);
+    const h = ethers.keccak256(ethers.toUtf8Bytes("uri-doc"));
+    await (await reg.registerAsset(h, "QmCidForUri", user.address)).wait();
+
+    const a = await reg.getAsset(h);
+    expect(a.assetHash).to.eq(h);
+    expect(a.ipfsCid).to.eq("QmCidForUri");
+    expect(a.owner).to.eq(user.address);
+    expect(a.verified).to.eq(false);
+    expect(await nft.tokenURI(a.tokenId)).to.eq("ipfs://QmCidForUri");
+    expect((await reg.getAssetByToken(a.tokenId)).assetHash).to.eq(h);
+
+    await expect(nft.mint(user.address)).to.be.revertedWith("Not registry");
+    await expect(nft.setRegistry(user.address)).to.be.revertedWith("Registry already set");
+  });
+});
@@ -10,6 +10,7 @@ describe("AssetRegistry", function () {
     const REG = await ethers.getContractFactory("AssetRegistry");
     const reg = await REG.deploy(await nft.getAddress());
     await reg.waitForDeployment();
+    await (await nft.setRegistry(await reg.getAddress())).wait();
     return { owner, user, nft, reg };
   }
 
@@ -17,8 +18,12 @@ describe("AssetRegistry", function () {
     const { owner, user, reg } = await deployAll();
     const h = ethers.keccak256(ethers.toUtf8Bytes("doc-001"));
     const cid = "bafybeigdyr...";
-    await expect(reg.connect(user).registerAsset(h, cid))
-      .to.emit(reg, "AssetRegistered");
+    // backend signer (owner) registers on behalf of user: AssetRegistered keeps the caller,
+    // AssetOwnerAssigned carries the logical owner
+    await expect(reg.connect(owner).registerAsset(h, cid, user.address))
+      .to.emit(reg, "AssetRegistered").withArgs(h, owner.address, 1n, cid)
+      .and.to.emit(reg, "AssetOwnerAssigned").withArgs(h, user.address);
+    expect(await reg.REGISTRY_VERSION()).to.eq(2n);
 
     await expect(reg.connect(user).verifyAsset(h, true)).to.be.reverted;
     await expect(reg.connect(owner).verifyAsset(h, true))
@@ -26,7 +31,58 @@ describe("AssetRegistry", function () {
 
     const a = await reg.getAsset(h);
     expect(a.verified).to.eq(true);
-    expect(a.owner).to.match(/^0x[0-9a-fA-F]{40}$/);
+    expect(a.owner).to.eq(user.address);
     expect(Number(a.tokenId)).to.be.greaterThan(0);
   });
+
+  it("registerAssets / verifyAssets: per-item skip and gas vs single calls", async () => {
+    const { owner, user, reg } = await deployAll();
+    const N = 10;
+    const keys = (prefix) => Array.from({ length: N }, (_, i) => ethers.keccak256(ethers.toUtf8Bytes(`${prefix}-${i}`)));
+    const cids = Array.from({ length: N }, (_, i) => `bafybeigdyr-${i}`);
+    const owners = Array(N).fill(user.address);
+
+    let singleGas = 0n;
+    for (const [i, h] of keys("single").entries()) {
+      const tx = await reg.registerAsset(h, cids[i], user.address);
+      singleGas += (await tx.wait()).gasUsed;
+    }
+
+    const batchKeys = keys("batch");
+    const batchRcpt = await (await reg.registerAssets(batchKeys, cids, owners)).wait();
+    console.log(`      register x${N}: single total ${singleGas} gas, batch ${batchRcpt.gasUsed} gas`);
+    expect(batchRcpt.gasUsed).to.be.lessThan(singleGas);
+
+    // already registered + empty CID are skipped, the rest of the batch still goes through
+    const fresh = ethers.keccak256(ethers.toUtf8Bytes("fresh"));
+    const empty = ethers.keccak256(ethers.toUtf8Bytes("empty"));
+    const mixed = await (await reg.registerAssets([batchKeys[0], fresh, empty], ["x", "cid-fresh", ""], [user.address, user.address, user.address])).wait();
+    const registered = mixed.logs.map((l) => reg.interface.parseLog(l)).filter((e) => e && e.name === "AssetRegistered");
+    expect(registered.map((e) => e.args.assetHash)).to.deep.eq([fresh]);
+    await expect(reg.registerAssets([fresh], [], [])).to.be.revertedWith("Length mismatch");
+
+    let singleVerifyGas = 0n;
+    for (const h of keys("single")) {
+      singleVerifyGas += (await (await reg.connect(owner).verifyAsset(h, true)).wait()).gasUsed;
+    }
+    const verifyRcpt = await (await reg.connect(owner).verifyAssets(batchKeys, Array(N).fill(true))).wait();
+    console.log(`      verify x${N}: single total ${singleVerifyGas} gas, batch ${verifyRcpt.gasUsed} gas`);
+    expect(verifyRcpt.gasUsed).to.be.lessThan(singleVerifyGas);
+    expect((await reg.getAsset(batchKeys[N - 1])).verified).to.eq(true);
+
+    await expect(reg.connect(user).verifyAssets(batchKeys, Array(N).fill(true))).to.be.reverted;
+  });
+
+  it("getAssets returns found flags instead of reverting", async () => {
+    const { user, reg } = await deployAll();
+    const known = ethers.keccak256(ethers.toUtf8Bytes("known"));
+    const unknown = ethers.keccak256(ethers.toUtf8Bytes("unknown"));
+    await (await reg.registerAsset(known, "cid-known", user.address)).wait();
+
+    const [found, records] = await reg.getAssets([unknown, known]);
+    expect(found).to.deep.eq([false, true]);
+    expect(records[1].ipfsCid).to.eq("cid-known");
+    expect(records[1].owner).to.eq(user.address);
+    expect(records[0].owner).to.eq(ethers.ZeroAddress);
+  });
 });